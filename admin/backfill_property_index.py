@@ -0,0 +1,25 @@
+import logging
+import os
+import threading
+
+from admin.set_logging import set_logging
+from toll_booth.alg_obj.aws.sapper.property_index import PropertyIndex
+
+
+def backfill_property_index(table_name=None, total_segments=8):
+    if not table_name:
+        table_name = os.getenv('TABLE_NAME', 'VdGraphObjects')
+    property_index = PropertyIndex(table_name)
+    workers = []
+    for segment in range(total_segments):
+        worker = threading.Thread(target=property_index.backfill, args=(segment, total_segments))
+        worker.start()
+        workers.append(worker)
+    for worker in workers:
+        worker.join()
+    logging.info(f'completed backfilling the property index: {property_index.table_name} from table: {table_name}')
+
+
+if __name__ == '__main__':
+    set_logging()
+    backfill_property_index()
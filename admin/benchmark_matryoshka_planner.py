@@ -0,0 +1,24 @@
+import logging
+import time
+
+from admin.set_logging import set_logging
+from toll_booth.alg_obj.aws.matryoshkas.matryoshka import MatryoshkaCluster
+
+
+def benchmark_matryoshka_planner(task_counts=(10, 1000, 100000, 1000000), desired_concurrency=100,
+                                 max_m_concurrency=25):
+    timings = {}
+    for task_count in task_counts:
+        task_args = [{'task_number': x} for x in range(task_count)]
+        start = time.perf_counter()
+        MatryoshkaCluster.calculate_for_concurrency(
+            desired_concurrency, 'benchmark', 'benchmark', task_args=task_args, max_m_concurrency=max_m_concurrency)
+        timings[task_count] = time.perf_counter() - start
+        logging.info(f'planned {task_count} task args across {desired_concurrency} workers '
+                     f'in {timings[task_count]:.3f} seconds')
+    return timings
+
+
+if __name__ == '__main__':
+    set_logging()
+    benchmark_matryoshka_planner()
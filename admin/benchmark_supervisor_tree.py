@@ -0,0 +1,48 @@
+import logging
+import random
+import time
+
+from admin.set_logging import set_logging
+from toll_booth.alg_obj.posts.accountant.supervisory_tree import SupervisorTree, SupervisionBranch
+
+
+def _generate_branches(staff_count, span_of_control):
+    random_generator = random.Random(staff_count)
+    branches = [SupervisionBranch(0)]
+    for staff_id in range(1, staff_count):
+        supervisor_ids = [(staff_id - 1) // span_of_control]
+        if staff_id > span_of_control and random_generator.random() < 0.1:
+            supervisor_ids.append(random_generator.randrange(staff_id // span_of_control))
+        branches.append(SupervisionBranch(staff_id, list(dict.fromkeys(supervisor_ids))))
+    return branches
+
+
+def benchmark_supervisor_tree(staff_counts=(1000, 5000, 20000), span_of_control=6, query_count=100000):
+    timings = {}
+    random_generator = random.Random(staff_counts[-1])
+    for staff_count in staff_counts:
+        branches = _generate_branches(staff_count, span_of_control)
+        start = time.perf_counter()
+        SupervisorTree.from_branches(branches)
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        tree = SupervisorTree()
+        for branch in _generate_branches(staff_count, span_of_control):
+            tree.add_branch(branch)
+        incremental_time = time.perf_counter() - start
+        query_ids = [(random_generator.randrange(staff_count), random_generator.randrange(staff_count))
+                     for _ in range(query_count)]
+        start = time.perf_counter()
+        for branch_id, supervisor_id in query_ids:
+            tree.is_supervised_by(branch_id, supervisor_id)
+        query_time = time.perf_counter() - start
+        timings[staff_count] = (build_time, incremental_time, query_time)
+        logging.info(f'{staff_count} staff: built the closure in {build_time:.3f} seconds, added branches '
+                     f'incrementally in {incremental_time:.3f} seconds, answered {query_count} ancestor '
+                     f'queries in {query_time:.3f} seconds')
+    return timings
+
+
+if __name__ == '__main__':
+    set_logging()
+    benchmark_supervisor_tree()
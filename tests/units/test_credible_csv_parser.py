@@ -0,0 +1,260 @@
+import csv
+import datetime
+import io
+from decimal import Decimal
+
+import pytest
+import pytz
+from hypothesis import given, settings, strategies as st
+
+from toll_booth.alg_obj.forge.extractors.credible_fe.credible_csv_parser import CredibleCsvParser, CsvColumn
+
+_reference_field_value_maps = {
+    'Date': 'datetime',
+    'Service Date': 'date',
+    'Time In': 'datetime',
+    'Time Out': 'datetime',
+    'Service ID': 'number',
+    'UTCDate': 'utc_datetime',
+    'change_date': 'datetime',
+    'by_emp_id': 'number',
+    'Transfer Date': 'datetime',
+    'Approved Date': 'datetime'
+}
+
+
+def _reference_set_data_type(header_name, entry):
+    data_type = _reference_field_value_maps.get(header_name, 'string')
+    if not entry:
+        return None
+    if data_type == 'string':
+        entry = str(entry)
+    if data_type == 'datetime':
+        try:
+            entry = datetime.datetime.strptime(entry, '%m/%d/%Y %I:%M:%S %p')
+        except ValueError:
+            entry = f'{entry} 12:00:00 AM'
+            entry = datetime.datetime.strptime(entry, '%m/%d/%Y %I:%M:%S %p')
+    if data_type == 'date':
+        entry = datetime.datetime.strptime(entry, '%m/%d/%Y')
+    if data_type == 'utc_datetime':
+        try:
+            entry = datetime.datetime.strptime(entry, '%m/%d/%Y %I:%M:%S %p')
+        except ValueError:
+            entry = f'{entry} 12:00:00 AM'
+            entry = datetime.datetime.strptime(entry, '%m/%d/%Y %I:%M:%S %p')
+        entry = entry.replace(tzinfo=pytz.UTC)
+    if data_type == 'number':
+        entry = Decimal(entry)
+    return entry
+
+
+def _reference_parse_csv_response(csv_string, key_name=None):
+    response = []
+    if key_name:
+        response = {}
+    header = []
+    first = True
+    with io.StringIO(csv_string, newline='\r\n') as csv_string:
+        reader = csv.reader(csv_string, delimiter=',', quotechar='"')
+        for row in reader:
+            header_index = 0
+            row_entry = {}
+            if first:
+                for entry in row:
+                    header.append(entry)
+                first = False
+                continue
+            for entry in row:
+                try:
+                    header_name = header[header_index]
+                except IndexError:
+                    raise RuntimeError(
+                        'the returned data from a csv query contained insufficient information to create the table')
+                entry = _reference_set_data_type(header_name, entry)
+                row_entry[header_name] = entry
+                header_index += 1
+            if key_name:
+                key_value = row_entry[key_name]
+                response[key_value] = row_entry
+                continue
+            response.append(row_entry)
+    return response
+
+
+def _write_csv(rows):
+    csv_file = io.StringIO()
+    writer = csv.writer(csv_file, delimiter=',', quotechar='"', lineterminator='\r\n')
+    writer.writerows(rows)
+    return csv_file.getvalue()
+
+
+_timestamps = st.datetimes(min_value=datetime.datetime(1990, 1, 1), max_value=datetime.datetime(2030, 12, 31))
+
+
+@st.composite
+def _datetime_entries(draw):
+    timestamp = draw(_timestamps)
+    style = draw(st.sampled_from(['full', 'padded', 'date', 'blank']))
+    if style == 'full':
+        return f'{timestamp.month}/{timestamp.day}/{timestamp.year} {timestamp.strftime("%I:%M:%S %p").lstrip("0")}'
+    if style == 'padded':
+        return timestamp.strftime('%m/%d/%Y %I:%M:%S %p')
+    if style == 'date':
+        return f'{timestamp.month}/{timestamp.day}/{timestamp.year}'
+    return ''
+
+
+_date_entries = st.one_of(st.just(''), _timestamps.map(lambda x: x.strftime('%m/%d/%Y')))
+_number_entries = st.one_of(st.just(''), st.integers(0, 10 ** 9).map(str))
+_string_entries = st.text(alphabet='abc ,"\'-12', max_size=8)
+
+
+@st.composite
+def _changelog_rows(draw):
+    return [
+        draw(_number_entries),
+        draw(_datetime_entries()),
+        draw(_datetime_entries()),
+        draw(_date_entries),
+        draw(_string_entries)
+    ]
+
+
+_changelog_header = ['Service ID', 'change_date', 'UTCDate', 'Service Date', 'Notes']
+
+
+@pytest.mark.credible_csv_parser
+class TestCredibleCsvParser:
+    @settings(max_examples=200, deadline=None)
+    @given(rows=st.lists(_changelog_rows(), max_size=20))
+    def test_parse_csv_response_matches_reference(self, rows):
+        csv_string = _write_csv([_changelog_header] + rows)
+        assert CredibleCsvParser.parse_csv_response(csv_string) == _reference_parse_csv_response(csv_string)
+
+    @settings(max_examples=100, deadline=None)
+    @given(rows=st.lists(_changelog_rows(), max_size=20))
+    def test_iter_csv_rows_matches_reference(self, rows):
+        csv_string = _write_csv([_changelog_header] + rows)
+        expected = _reference_parse_csv_response(csv_string)
+        assert list(CredibleCsvParser.iter_csv_rows(csv_string)) == expected
+        assert list(CredibleCsvParser.iter_csv_rows(io.StringIO(csv_string, newline=''))) == expected
+
+    def test_parse_csv_response_keyed(self):
+        csv_string = _write_csv([
+            ['Service ID', 'Date'],
+            ['101', '1/2/2019 3:04:05 PM'],
+            ['102', '1/3/2019'],
+            ['101', '']
+        ])
+        parsed = CredibleCsvParser.parse_csv_response(csv_string, key_name='Service ID')
+        assert parsed == _reference_parse_csv_response(csv_string, key_name='Service ID')
+        assert parsed[Decimal('101')]['Date'] is None
+        assert parsed[Decimal('102')]['Date'] == datetime.datetime(2019, 1, 3)
+
+    def test_parse_csv_response_ragged_rows(self):
+        csv_string = _write_csv([
+            ['Service ID', 'Date', 'Notes'],
+            ['101', '1/2/2019 3:04:05 PM'],
+            ['102']
+        ])
+        parsed = CredibleCsvParser.parse_csv_response(csv_string)
+        assert parsed == _reference_parse_csv_response(csv_string)
+        assert parsed[1] == {'Service ID': Decimal('102')}
+
+    def test_parse_csv_response_rejects_long_rows(self):
+        csv_string = _write_csv([['Service ID'], ['101', 'extra']])
+        with pytest.raises(RuntimeError):
+            CredibleCsvParser.parse_csv_response(csv_string)
+        with pytest.raises(RuntimeError):
+            list(CredibleCsvParser.iter_csv_rows(csv_string))
+
+    def test_parse_csv_response_empty(self):
+        assert CredibleCsvParser.parse_csv_response('') == []
+        assert CredibleCsvParser.parse_csv_response('', key_name='Service ID') == {}
+        assert CredibleCsvParser.parse_csv_response(_write_csv([['Service ID']])) == []
+
+    def test_parse_csv_response_schema(self):
+        csv_string = _write_csv([['Service ID', 'Visit Count'], ['101', '3']])
+        parsed = CredibleCsvParser.parse_csv_response(
+            csv_string, schema={'Service ID': 'string', 'Visit Count': 'number'})
+        assert parsed == [{'Service ID': '101', 'Visit Count': Decimal('3')}]
+
+    def test_parse_csv_response_infer_types(self):
+        csv_string = _write_csv([
+            ['Visit Count', 'Visit Day', 'Visit Time', 'Notes', 'Service ID'],
+            ['3', '1/2/2019', '1/2/2019 3:04:05 PM', '12 visits', '101'],
+            ['', '1/3/2019', '1/3/2019', '', '102']
+        ])
+        assert CredibleCsvParser.parse_csv_response(csv_string)[0]['Visit Count'] == '3'
+        parsed = CredibleCsvParser.parse_csv_response(csv_string, infer_types=True)
+        assert parsed == [
+            {
+                'Visit Count': Decimal('3'),
+                'Visit Day': datetime.datetime(2019, 1, 2),
+                'Visit Time': datetime.datetime(2019, 1, 2, 15, 4, 5),
+                'Notes': '12 visits',
+                'Service ID': Decimal('101')
+            },
+            {
+                'Visit Count': None,
+                'Visit Day': datetime.datetime(2019, 1, 3),
+                'Visit Time': datetime.datetime(2019, 1, 3),
+                'Notes': None,
+                'Service ID': Decimal('102')
+            }
+        ]
+
+    def test_iter_csv_rows_infers_from_sample(self):
+        csv_string = _write_csv([['Visit Count'], ['3'], ['4'], ['many']])
+        rows = CredibleCsvParser.iter_csv_rows(csv_string, infer_types=True, sample_size=2)
+        assert next(rows) == {'Visit Count': Decimal('3')}
+        assert next(rows) == {'Visit Count': Decimal('4')}
+        with pytest.raises(ArithmeticError):
+            next(rows)
+
+    def test_iter_csv_rows_is_lazy(self):
+        def csv_lines():
+            yield 'Service ID\r\n'
+            yield '101\r\n'
+            raise AssertionError('read past the requested row')
+
+        rows = CredibleCsvParser.iter_csv_rows(csv_lines())
+        assert next(rows) == {'Service ID': Decimal('101')}
+
+    def test_set_data_type(self):
+        assert CredibleCsvParser._set_data_type('UTCDate', '1/2/2019') == datetime.datetime(
+            2019, 1, 2, tzinfo=pytz.UTC)
+        assert CredibleCsvParser._set_data_type('Service ID', '') is None
+        assert CredibleCsvParser._set_data_type('Notes', 'text') == 'text'
+
+
+@pytest.mark.credible_csv_parser
+class TestCsvColumn:
+    def test_detected_format(self):
+        column = CsvColumn('change_date', 'datetime')
+        assert column.detected_format == '%m/%d/%Y %I:%M:%S %p'
+        assert column.convert('1/2/2019') == datetime.datetime(2019, 1, 2)
+        assert column.detected_format == '%m/%d/%Y'
+        assert column.convert('1/2/2019 12:30:00 AM') == datetime.datetime(2019, 1, 2, 0, 30)
+        assert column.detected_format == '%m/%d/%Y %I:%M:%S %p'
+        assert CsvColumn('Service ID', 'number').detected_format is None
+
+    def test_convert_skips_exceptions_on_fast_path(self):
+        column = CsvColumn('change_date', 'datetime')
+        with pytest.MonkeyPatch.context() as patch:
+            patch.setattr(datetime, 'datetime', _NoStrptime)
+            converted = column.convert_all(['1/2/2019 12:00:00 PM', '', '01/02/2019 11:59:59 PM'])
+        assert converted == [datetime.datetime(2019, 1, 2, 12), None, datetime.datetime(2019, 1, 2, 23, 59, 59)]
+
+    def test_convert_falls_back_to_strptime(self):
+        column = CsvColumn('change_date', 'datetime')
+        assert column.convert('01/02/2019  3:04:05 PM') == datetime.datetime(2019, 1, 2, 15, 4, 5)
+        with pytest.raises(ValueError):
+            column.convert('1/2/2019 13:04:05 PM')
+
+
+class _NoStrptime(datetime.datetime):
+    @classmethod
+    def strptime(cls, *args):
+        raise AssertionError('strptime should not be needed for well formed entries')
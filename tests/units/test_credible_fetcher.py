@@ -0,0 +1,113 @@
+import datetime
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from toll_booth.alg_obj.forge.extractors.credible_fe.credible_fe import CredibleLoginCredentials
+from toll_booth.alg_obj.forge.extractors.credible_fe.fetcher import CredibleFetcher, CredibleFetchException
+
+
+class _FakeResponse:
+    def __init__(self, status_code, text, url='https://www.crediblebh.com/common/hipaalog_details.asp'):
+        self.status_code = status_code
+        self.text = text
+        self.url = url
+
+
+class _FakeSession:
+    def __init__(self, responder):
+        self.cookies = None
+        self._responder = responder
+
+    def request(self, method, url, **kwargs):
+        return self._responder(self, method, url, **kwargs)
+
+
+def _generate_credentials():
+    return CredibleLoginCredentials('MBI', 'first_cookie', datetime.datetime.now())
+
+
+@pytest.mark.credible_fetcher
+class TestCredibleFetcher:
+    def test_fetch_all_preserves_order(self):
+        def _respond(session, method, url, **kwargs):
+            changelog_id = kwargs['params']['changelog_id']
+            time.sleep(0.01 * (changelog_id % 3))
+            return _FakeResponse(200, f'detail_{changelog_id}')
+
+        fetcher = CredibleFetcher(
+            _generate_credentials(), max_workers=4, requests_per_second=0,
+            session_factory=lambda: _FakeSession(_respond))
+        fetch_requests = [{'method': 'GET', 'url': 'https://www.crediblebh.com/x', 'params': {'changelog_id': x}}
+                          for x in range(20)]
+        results = fetcher.fetch_all(fetch_requests)
+        assert results == [f'detail_{x}' for x in range(20)]
+
+    def test_sessions_reused_across_batches(self):
+        created_sessions = []
+
+        def _generate_session():
+            session = _FakeSession(lambda *args, **kwargs: _FakeResponse(200, 'done'))
+            session.close = lambda: setattr(session, 'closed', True)
+            created_sessions.append(session)
+            return session
+
+        fetch_requests = [{'method': 'GET', 'url': 'https://www.crediblebh.com/x'} for _ in range(8)]
+        with CredibleFetcher(
+                _generate_credentials(), max_workers=2, requests_per_second=0,
+                session_factory=_generate_session) as fetcher:
+            for _ in range(5):
+                assert fetcher.fetch_all(fetch_requests) == ['done'] * 8
+            assert len(created_sessions) <= 2
+        assert fetcher._executor is None
+        assert all(getattr(x, 'closed', False) for x in created_sessions)
+
+    def test_fetch_retries_with_backoff(self):
+        attempts = []
+
+        def _respond(session, method, url, **kwargs):
+            attempts.append(url)
+            if len(attempts) < 3:
+                return _FakeResponse(503, 'busy')
+            return _FakeResponse(200, 'done')
+
+        fetcher = CredibleFetcher(
+            _generate_credentials(), requests_per_second=0, backoff_base=0.001,
+            session_factory=lambda: _FakeSession(_respond))
+        assert fetcher.fetch('GET', 'https://www.crediblebh.com/x') == 'done'
+        assert len(attempts) == 3
+
+    def test_fetch_gives_up(self):
+        fetcher = CredibleFetcher(
+            _generate_credentials(), requests_per_second=0, max_attempts=2, backoff_base=0.001,
+            session_factory=lambda: _FakeSession(lambda *args, **kwargs: _FakeResponse(500, 'broken')))
+        with pytest.raises(CredibleFetchException):
+            fetcher.fetch('GET', 'https://www.crediblebh.com/x')
+
+    def test_expired_cookie_refreshes_once(self):
+        credentials = _generate_credentials()
+        gate = threading.Barrier(4)
+
+        def _respond(session, method, url, **kwargs):
+            cookie_value = session.cookies
+            if cookie_value == 'first_cookie':
+                gate.wait(timeout=5)
+                return _FakeResponse(200, 'login page', url='https://www.crediblebh.com/login.aspx')
+            return _FakeResponse(200, f'{cookie_value}_{kwargs["params"]["changelog_id"]}')
+
+        new_credentials = CredibleLoginCredentials('MBI', 'second_cookie', datetime.datetime.now())
+        retrieve_patch = patch.object(CredibleLoginCredentials, 'retrieve', return_value=new_credentials)
+        cookie_patch = patch.object(
+            CredibleLoginCredentials, 'as_request_cookie_jar', property(lambda x: x.cookie_value))
+        with retrieve_patch as mock_retrieve, cookie_patch:
+            fetcher = CredibleFetcher(
+                credentials, max_workers=4, requests_per_second=0,
+                session_factory=lambda: _FakeSession(_respond))
+            fetch_requests = [{'method': 'GET', 'url': 'https://www.crediblebh.com/x', 'params': {'changelog_id': x}}
+                              for x in range(4)]
+            results = fetcher.fetch_all(fetch_requests)
+        assert mock_retrieve.call_count == 1
+        assert credentials.cookie_value == 'second_cookie'
+        assert results == [f'second_cookie_{x}' for x in range(4)]
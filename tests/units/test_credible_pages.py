@@ -0,0 +1,134 @@
+import datetime
+import os
+import re
+from decimal import Decimal
+
+import bs4
+import pytest
+import pytz
+
+from toll_booth.alg_obj.forge.extractors.credible_fe.page_parser import CrediblePageParser
+
+_fixture_directory = os.path.join(os.path.dirname(__file__), 'test_data', 'credible_pages')
+_row_pattern = '(<table border=\"\\d\"\\scellpadding=\"\\d\"\\scellspacing=\"\\d\"\\swidth=\"[\\d]+%\">)(?P<rows>[.\\s\\S]+?)(</table>)'
+
+
+def _read_fixture(fixture_name):
+    with open(os.path.join(_fixture_directory, fixture_name)) as fixture_file:
+        return fixture_file.read()
+
+
+def _reference_row_soup(page_text):
+    row_match = re.compile(_row_pattern).search(page_text).group('rows')
+    return bs4.BeautifulSoup(row_match, features='html.parser')
+
+
+def _reference_utc_date(utc_change_date_string):
+    try:
+        change_date_utc = datetime.datetime.strptime(utc_change_date_string, '%m/%d/%Y %I:%M:%S %p')
+    except ValueError:
+        utc_change_date_string = f'{utc_change_date_string} 12:00:00 AM'
+        change_date_utc = datetime.datetime.strptime(utc_change_date_string, '%m/%d/%Y %I:%M:%S %p')
+    return change_date_utc.replace(tzinfo=pytz.UTC)
+
+
+def _reference_done_by(page_text):
+    name_pattern = re.compile("(?P<last_name>\\w+),\\s+(?P<first_initial>\\w)")
+    done_by = []
+    for row in _reference_row_soup(page_text).find_all('tr'):
+        if 'style' in row.attrs:
+            change_date_utc = _reference_utc_date(row.contents[15].string)
+            matches = name_pattern.search(row.contents[9].string)
+            done_by.append((change_date_utc.timestamp(), matches.group('last_name'), matches.group('first_initial')))
+    return done_by
+
+
+def _reference_emp_ids(page_text):
+    emp_ids = {}
+    for row in _reference_row_soup(page_text).find_all('tr'):
+        if 'style' in row.attrs:
+            utc_change_date = row.contents[15].string
+            entry = datetime.datetime.strptime(utc_change_date, '%m/%d/%Y %I:%M:%S %p')
+            entry = entry.timestamp()
+            change_time = datetime.datetime.fromtimestamp(entry, tz=datetime.timezone.utc)
+            emp_entry = row.contents[3]
+            numeric_inside = re.compile('(?P<outside>[\\w\\s]+?)\\s*\\((?P<inside>[\\d]+)\\)')
+            match = numeric_inside.search(emp_entry.string).group('inside')
+            emp_ids[change_time] = Decimal(match)
+    return emp_ids
+
+
+def _reference_clid_links(page_text):
+    changelog_links = []
+    for row in _reference_row_soup(page_text).find_all('a'):
+        if 'clid' in row.attrs:
+            containing_row = row.parent.parent
+            change_date_utc = _reference_utc_date(containing_row.contents[15].string)
+            changelog_links.append((row.attrs['clid'], change_date_utc.timestamp()))
+    return changelog_links
+
+
+def _reference_href_links(page_text):
+    changelog_links = []
+    for row in _reference_row_soup(page_text).find_all('a'):
+        if 'href' in row.attrs and 'title' in row.attrs and row.attrs['href'] != '#':
+            target = row.attrs['href']
+            changelog_id = re.compile('changelog_id=(?P<changelog_id>\\d+)').search(target).group('changelog_id')
+            containing_row = row.parent.parent
+            change_date = datetime.datetime.strptime(containing_row.contents[15].string, '%m/%d/%Y %I:%M:%S %p')
+            change_date = change_date.timestamp()
+            changelog_links.append((changelog_id, datetime.datetime.fromtimestamp(change_date, tz=datetime.timezone.utc)))
+    return changelog_links
+
+
+def _reference_change_details(detail_page):
+    changes = []
+    detail_soup = bs4.BeautifulSoup(detail_page, features='html.parser')
+    for row in detail_soup.find_all('tr')[4:]:
+        changes.append({
+            'id_name': str(row.contents[1].string).lower(),
+            'old_value': str(row.contents[3].string),
+            'new_value': str(row.contents[5].string)
+        })
+    return changes
+
+
+def _without_date_only_rows(page_text):
+    return re.sub(r'<td class="datacell">\d\d/\d\d/\d{4}</td>', '<td class="datacell">01/01/2019 1:00:00 AM</td>', page_text)
+
+
+@pytest.mark.credible_pages
+class TestCrediblePages:
+    @pytest.mark.parametrize('fixture_name', ['changelog_page.html', 'changelog_last_page.html'])
+    def test_changelog_rows_match(self, fixture_name):
+        page_text = _read_fixture(fixture_name)
+        row_soup = CrediblePageParser.parse_changelog_table(page_text)
+        reference_soup = _reference_row_soup(page_text)
+        assert len(row_soup.find_all('tr')) == len(reference_soup.find_all('tr'))
+        assert len(row_soup.find_all('a')) == len(reference_soup.find_all('a'))
+        assert CrediblePageParser.parse_done_by_rows(row_soup.find_all('tr')) == _reference_done_by(page_text)
+        anchors = row_soup.find_all('a')
+        assert CrediblePageParser.parse_clid_links(anchors) == _reference_clid_links(page_text)
+
+    def test_emp_ids_and_links_match(self):
+        page_text = _without_date_only_rows(_read_fixture('changelog_page.html'))
+        row_soup = CrediblePageParser.parse_changelog_table(page_text)
+        emp_ids = CrediblePageParser.parse_emp_id_rows(row_soup.find_all('tr'))
+        assert emp_ids == _reference_emp_ids(page_text)
+        assert len(emp_ids) > 1
+        href_links = CrediblePageParser.parse_href_links(row_soup.find_all('a'))
+        assert href_links == _reference_href_links(page_text)
+        assert len(href_links) == 60
+
+    def test_change_details_match(self):
+        detail_page = _read_fixture('change_detail.html')
+        changes = CrediblePageParser.parse_change_details(detail_page)
+        assert changes == _reference_change_details(detail_page)
+        assert changes[0] == {'id_name': 'first_name', 'old_value': 'Jon', 'new_value': 'John'}
+        assert changes[3]['old_value'] == '1 Main & 2nd'
+
+    def test_date_only_rows_fall_back_to_midnight(self):
+        done_by = CrediblePageParser.parse_done_by_rows(
+            CrediblePageParser.parse_changelog_table(_read_fixture('changelog_page.html')).find_all('tr'))
+        assert done_by[0] == (datetime.datetime(2019, 1, 1, tzinfo=pytz.UTC).timestamp(), 'Doe', 'J')
+        assert len(done_by) == 60
@@ -0,0 +1,87 @@
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from toll_booth.alg_obj.aws.sapper.dynamo_scanner import DynamoScanner
+
+
+def _generate_table(total_segments, pages_per_segment, page_size=3, throttle_first=False):
+    calls = []
+    call_lock = threading.Lock()
+    throttled = set()
+
+    def _scan(**kwargs):
+        segment = kwargs['Segment']
+        assert kwargs['TotalSegments'] == total_segments
+        page_number = kwargs.get('ExclusiveStartKey', {}).get('page', 0)
+        with call_lock:
+            calls.append((segment, page_number))
+            if throttle_first and segment not in throttled:
+                throttled.add(segment)
+                raise ClientError({'Error': {'Code': 'ProvisionedThroughputExceededException', 'Message': ''}}, 'Scan')
+        time.sleep(0.001)
+        items = [{'sid_value': f'{segment}-{page_number}-{x}', 'last_stage_seen': f'stage_{segment % 2}'}
+                 for x in range(page_size)]
+        results = {'Items': items, 'ConsumedCapacity': {'CapacityUnits': 0.5}}
+        if page_number + 1 < pages_per_segment:
+            results['LastEvaluatedKey'] = {'page': page_number + 1}
+        return results
+
+    table = MagicMock()
+    table.scan.side_effect = _scan
+    return table, calls
+
+
+def _expected_sid_values(total_segments, pages_per_segment, page_size=3):
+    return sorted(f'{x}-{y}-{z}' for x in range(total_segments) for y in range(pages_per_segment)
+                  for z in range(page_size))
+
+
+@pytest.mark.dynamo_scanner
+class TestDynamoScanner:
+    def test_each_segment_is_scanned_once(self):
+        table, calls = _generate_table(5, 4)
+        scanner = DynamoScanner(table=table, thread_count=5, queue_size=2)
+        results = scanner.scan_stalled_objects()
+        assert sorted(x['sid_value'] for x in results) == _expected_sid_values(5, 4)
+        assert sorted(calls) == sorted((x, y) for x in range(5) for y in range(4))
+        assert all(x['complete'] for x in scanner.checkpoint.values())
+        assert scanner.consumed_capacity == 10
+
+    def test_leech_stages_are_grouped(self):
+        table, calls = _generate_table(4, 2)
+        scanner = DynamoScanner(table=table, thread_count=4)
+        stages = scanner.scan_leech_stages()
+        assert set(stages) == {'stage_0', 'stage_1'}
+        assert sum(len(x) for x in stages.values()) == 24
+
+    def test_scan_resumes_from_checkpoint(self):
+        table, calls = _generate_table(3, 4, page_size=1)
+        scanner = DynamoScanner(table=table, thread_count=3, queue_size=1)
+        stream = scanner.stream({})
+        consumed = [next(stream) for _ in range(5)]
+        stream.close()
+        checkpoint = {x: y.copy() for x, y in scanner.checkpoint.items()}
+        resumed_table, resumed_calls = _generate_table(3, 4, page_size=1)
+        resumed = DynamoScanner(table=resumed_table, thread_count=3)
+        remaining = [x for x in resumed.stream({}, checkpoint)]
+        sid_values = [x['sid_value'] for x in consumed + remaining]
+        assert sorted(set(sid_values)) == _expected_sid_values(3, 4, page_size=1)
+        assert len(remaining) == 12 - 4
+
+    def test_throttled_pages_are_retried(self):
+        table, calls = _generate_table(2, 2, throttle_first=True)
+        scanner = DynamoScanner(table=table, thread_count=2, backoff_base=0.001)
+        results = scanner.scan_stalled_objects()
+        assert sorted(x['sid_value'] for x in results) == _expected_sid_values(2, 2)
+        assert len(calls) == 6
+
+    def test_segment_errors_are_raised(self):
+        table = MagicMock()
+        table.scan.side_effect = RuntimeError('boom')
+        scanner = DynamoScanner(table=table, thread_count=2)
+        with pytest.raises(RuntimeError):
+            scanner.scan_stalled_objects()
@@ -0,0 +1,204 @@
+import os
+import threading
+from decimal import Decimal
+from unittest.mock import patch, MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from toll_booth.alg_obj.forge.extractors.credible_fe.cache import CachedEmployeeIds, PromiseToken
+from toll_booth.alg_obj.forge.extractors.credible_fe.credible_fe import CredibleFrontEndDriver
+from toll_booth.alg_obj.forge.extractors.credible_fe.page_parser import CrediblePageParser
+
+_fixture_path = os.path.join(os.path.dirname(__file__), 'test_data', 'credible_pages', 'changelog_page.html')
+
+
+def _generate_table(items=None):
+    if items is None:
+        items = {}
+    mock_table = MagicMock()
+    mock_table.get_item.side_effect = lambda Key: {'Item': items[Key['emp_name']]} if Key['emp_name'] in items else {}
+    return mock_table
+
+
+def _generate_driver():
+    driver = CredibleFrontEndDriver.__new__(CredibleFrontEndDriver)
+    driver._id_source = 'MBI'
+    return driver
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    CachedEmployeeIds.clear()
+    yield
+    CachedEmployeeIds.clear()
+
+
+@pytest.mark.emp_id_cache
+class TestCachedEmployeeIds:
+    def test_local_store_shared_by_domain(self):
+        first_cache = CachedEmployeeIds(domain_name='MBI')
+        assert first_cache.get_emp_id('Doe', 'J', 1) is None
+        first_cache.add_emp_id('Doe', 'J', Decimal(201))
+        assert CachedEmployeeIds(domain_name='MBI').get_emp_id('Doe', 'J', 2) == Decimal(201)
+        assert CachedEmployeeIds(domain_name='ICFS').get_emp_id('Doe', 'J', 3) is None
+        assert CachedEmployeeIds(domain_name='MBI', cache_name='entity_ids').get_emp_id('Doe', 'J', 4) is None
+        assert CachedEmployeeIds().get_emp_id('Doe', 'J', 5) is None
+
+    def test_constructor_emp_ids(self):
+        cache = CachedEmployeeIds({'Doe, J': Decimal(201)})
+        assert cache.get_emp_id('Doe', 'J') == Decimal(201)
+        assert cache.emp_ids == {'Doe, J': Decimal(201)}
+
+    def test_negative_entries_expire_sooner(self):
+        cache = CachedEmployeeIds(domain_name='MBI', emp_id_ttl=100, negative_ttl=10)
+        with patch('toll_booth.alg_obj.forge.extractors.credible_fe.cache.datetime') as mock_datetime:
+            mock_datetime.utcnow.return_value.timestamp.return_value = 1000
+            cache.add_emp_id('Doe', 'J', Decimal(201))
+            cache.add_emp_id('Smith', 'J', 0)
+            assert cache.get_emp_id('Smith', 'J') == 0
+            mock_datetime.utcnow.return_value.timestamp.return_value = 1050
+            assert cache.get_emp_id('Doe', 'J') == Decimal(201)
+            assert cache.get_emp_id('Smith', 'J') is None
+            mock_datetime.utcnow.return_value.timestamp.return_value = 1200
+            assert cache.get_emp_id('Doe', 'J') is None
+
+    def test_stored_emp_ids(self):
+        mock_table = _generate_table({
+            'Doe, J': {'emp_id': Decimal(201), 'expires_at': Decimal(4102444800)},
+            'Old, J': {'emp_id': Decimal(301), 'expires_at': Decimal(1)}
+        })
+        cache = CachedEmployeeIds(domain_name='MBI', table=mock_table)
+        assert cache.get_emp_id('Doe', 'J') == Decimal(201)
+        assert cache.get_emp_id('Doe', 'J') == Decimal(201)
+        assert mock_table.get_item.call_count == 1
+        mock_table.get_item.assert_called_with(Key={'domain_name': 'MBI#emp_ids', 'emp_name': 'Doe, J'})
+        assert cache.get_emp_id('Old', 'J') is None
+        cache.add_emp_id('Old', 'J', 0)
+        stored_item = mock_table.put_item.call_args[1]['Item']
+        assert stored_item['emp_name'] == 'Old, J'
+        assert stored_item['emp_id'] == 0
+
+    def test_table_errors_fall_back_to_search(self):
+        mock_table = MagicMock()
+        mock_table.get_item.side_effect = ClientError({'Error': {'Code': 'ThrottlingException'}}, 'GetItem')
+        mock_table.put_item.side_effect = ClientError({'Error': {'Code': 'ThrottlingException'}}, 'PutItem')
+        cache = CachedEmployeeIds(domain_name='MBI', table=mock_table)
+        assert cache.get_emp_id('Doe', 'J') is None
+        cache.add_emp_id('Doe', 'J', Decimal(201))
+        assert cache.get_emp_id('Doe', 'J') == Decimal(201)
+
+    def test_warm_up(self):
+        mock_table = _generate_table()
+        cache = CachedEmployeeIds(domain_name='MBI', table=mock_table)
+        emp_names = [('Doe', 'J', Decimal(201)), ('Smith', 'J', Decimal(200))]
+        assert cache.warm_up(emp_names) == 2
+        assert cache.warm_up(emp_names) == 0
+        assert cache.get_emp_id('Smith', 'J') == Decimal(200)
+        batch = mock_table.batch_writer.return_value.__enter__.return_value
+        assert batch.put_item.call_count == 2
+        mock_table.get_item.assert_not_called()
+
+    def test_warm_up_skips_ambiguous_names(self):
+        mock_table = _generate_table()
+        cache = CachedEmployeeIds(domain_name='MBI', table=mock_table)
+        emp_names = [('Smith', 'J', Decimal(200)), ('Smith', 'J', Decimal(210)), ('Smith', 'J', Decimal(200))]
+        assert cache.warm_up(emp_names) == 0
+        assert cache.get_emp_id('Smith', 'J') is None
+        batch = mock_table.batch_writer.return_value.__enter__.return_value
+        batch.put_item.assert_not_called()
+        assert cache.warm_up([('Smith', 'J', Decimal(200))]) == 0
+        assert CachedEmployeeIds(domain_name='MBI').warm_up([('Smith', 'J', Decimal(200))]) == 0
+
+    def test_warm_up_conflicts_evict_cached_names(self):
+        mock_table = _generate_table()
+        cache = CachedEmployeeIds(domain_name='MBI', table=mock_table)
+        assert cache.warm_up([('Smith', 'J', Decimal(200))]) == 1
+        assert cache.warm_up([('Smith', 'J', Decimal(210))]) == 0
+        assert cache.get_emp_id('Smith', 'J') is None
+        batch = mock_table.batch_writer.return_value.__enter__.return_value
+        batch.delete_item.assert_called_once_with(Key={'domain_name': 'MBI#emp_ids', 'emp_name': 'Smith, J'})
+
+    def test_warm_up_replaces_negative_entries(self):
+        cache = CachedEmployeeIds(domain_name='MBI')
+        cache.add_emp_id('Smith', 'J', 0)
+        assert cache.warm_up([('Smith', 'J', Decimal(200))]) == 1
+        assert cache.get_emp_id('Smith', 'J') == Decimal(200)
+
+    def test_concurrent_lookups_coalesce(self):
+        cache = CachedEmployeeIds(domain_name='MBI')
+        start = threading.Barrier(8)
+        results = {}
+
+        def _lookup(timestamp):
+            start.wait()
+            results[timestamp] = cache.get_emp_id('Doe', 'J', timestamp)
+
+        threads = [threading.Thread(target=_lookup, args=(x,)) for x in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        claims = [x for x, y in results.items() if y is None]
+        promises = [y for y in results.values() if isinstance(y, PromiseToken)]
+        assert len(claims) == 1
+        assert len(promises) == 7
+        cache.add_emp_id('Doe', 'J', Decimal(201))
+        assert [int(x) for x in promises] == [201] * 7
+
+    def test_mark_emp_id_working(self):
+        cache = CachedEmployeeIds()
+        cache.mark_emp_id_working('Doe', 'J', 1)
+        promise = cache.get_emp_id('Doe', 'J', 2)
+        assert isinstance(promise, PromiseToken)
+        assert cache.emp_ids == {'Doe, J': 'working'}
+        cache.add_emp_id('Doe', 'J', Decimal(201))
+        assert promise.to_json == 201
+
+    def test_release_emp_id(self):
+        cache = CachedEmployeeIds(domain_name='MBI')
+        assert cache.get_emp_id('Doe', 'J', 1) is None
+        promise = cache.get_emp_id('Doe', 'J', 2)
+        cache.release_emp_id('Doe', 'J')
+        assert cache.emp_ids == {}
+        with pytest.raises(RuntimeError):
+            int(promise)
+        assert cache.get_emp_id('Doe', 'J', 3) is None
+
+    def test_strain_emp_ids_releases_failed_searches(self):
+        with open(_fixture_path) as fixture_file:
+            page_text = fixture_file.read()
+        driver = _generate_driver()
+        cache = CachedEmployeeIds(domain_name='MBI')
+        table_rows = CrediblePageParser.parse_changelog_table(page_text).find_all('tr')
+        with patch.object(CredibleFrontEndDriver, 'search_employees', side_effect=ConnectionError('credible is down')):
+            with pytest.raises(ConnectionError):
+                driver._strain_emp_ids(table_rows, cache)
+        assert cache.emp_ids == {}
+
+    def test_strain_emp_ids_searches_each_name_once(self):
+        with open(_fixture_path) as fixture_file:
+            page_text = fixture_file.read()
+        driver = _generate_driver()
+        cache = CachedEmployeeIds(domain_name='MBI')
+        table_rows = CrediblePageParser.parse_changelog_table(page_text).find_all('tr')
+        done_by = CrediblePageParser.parse_done_by_rows(table_rows)
+        with patch.object(CredibleFrontEndDriver, 'search_employees', return_value=Decimal(999)) as mock_search:
+            emp_ids = driver._strain_emp_ids(table_rows, cache)
+            assert set(emp_ids) == {x[0] for x in done_by}
+            assert mock_search.call_count == len({(x[1], x[2]) for x in done_by})
+            driver._strain_emp_ids(table_rows, CachedEmployeeIds(domain_name='MBI'))
+            assert mock_search.call_count == len({(x[1], x[2]) for x in done_by})
+
+    def test_parse_changelog_page_warms_cache(self):
+        with open(_fixture_path) as fixture_file:
+            page_text = fixture_file.read()
+        driver = _generate_driver()
+        cache = CachedEmployeeIds(domain_name='MBI')
+        with patch.object(CredibleFrontEndDriver, 'search_employees') as mock_search:
+            changelog_data, page_number = driver._parse_changelog_page(
+                page_text, get_emp_ids=True, cached_emp_ids=cache)
+        mock_search.assert_not_called()
+        assert page_number == 2
+        assert Decimal(201) in changelog_data['emp_ids'].values()
+        assert cache.get_emp_id('Doe', 'J') == Decimal(201)
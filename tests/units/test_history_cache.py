@@ -0,0 +1,197 @@
+import json
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from boto3.dynamodb.types import Binary
+
+from toll_booth.alg_obj.aws.gentlemen.command import General
+from toll_booth.alg_obj.aws.gentlemen.events.history import WorkflowHistory
+from toll_booth.alg_obj.aws.gentlemen.events.history_cache import HistoryCache, HistorySnapshot
+
+_start_time = datetime(2019, 1, 1)
+
+
+class _EventWriter:
+    def __init__(self):
+        self.events = []
+
+    def add(self, event_type, **attributes):
+        event_id = len(self.events) + 1
+        attribute_name = event_type[0].lower() + event_type[1:] + 'EventAttributes'
+        self.events.append({
+            'eventId': event_id,
+            'eventType': event_type,
+            'eventTimestamp': _start_time + timedelta(seconds=event_id),
+            attribute_name: attributes
+        })
+        return event_id
+
+    def add_decision(self):
+        self.add('DecisionTaskScheduled')
+        return self.add('DecisionTaskStarted')
+
+    def add_lambda(self, lambda_id, fail=False):
+        scheduled_id = self.add('LambdaFunctionScheduled', id=lambda_id, name='some_fn', input=json.dumps({}))
+        started_id = self.add('LambdaFunctionStarted', scheduledEventId=scheduled_id)
+        if fail:
+            self.add('LambdaFunctionFailed', scheduledEventId=scheduled_id, startedEventId=started_id)
+            return
+        self.add('LambdaFunctionCompleted', scheduledEventId=scheduled_id, startedEventId=started_id,
+                 result=json.dumps({'lambda_id': lambda_id}))
+
+
+class _DecisionPoller:
+    def __init__(self, writer, page_size=5):
+        self._writer = writer
+        self._page_size = page_size
+        self.pages_read = 0
+        self.previous_started_event_id = 0
+
+    def paginate(self, **kwargs):
+        events = list(self._writer.events)
+        if kwargs.get('reverseOrder'):
+            events.reverse()
+        for position in range(0, len(events), self._page_size):
+            self.pages_read += 1
+            yield {
+                'taskToken': f'token_{len(events)}',
+                'workflowType': {'name': 'some_flow'},
+                'workflowExecution': {'workflowId': 'some_flow_id', 'runId': 'some_run_id'},
+                'previousStartedEventId': self.previous_started_event_id,
+                'events': events[position:position + self._page_size]
+            }
+
+
+def _summarize(work_history):
+    return {
+        'lambdas': {x.operation_id: (x.is_complete, len(x.executions)) for x in work_history.lambda_history},
+        'lambda_failures': work_history.lambda_history.get_operation_failed_count('lambda_0'),
+        'event_count': len(work_history.events),
+        'task_token': work_history.task_token
+    }
+
+
+def _generate_general(poller, history_cache, fresh_start=True):
+    with patch('toll_booth.alg_obj.aws.gentlemen.command.boto3') as mock_boto:
+        mock_boto.client.return_value.get_paginator.return_value = poller
+        general = General('some_domain', 'some_list', incremental_history=True, history_cache=history_cache,
+                          run_config={'fresh_start': fresh_start}, client=MagicMock())
+    return general
+
+
+def _parse_full(writer):
+    return WorkflowHistory.parse_from_poll('some_domain', {
+        'taskToken': f'token_{len(writer.events)}',
+        'workflowType': {'name': 'some_flow'},
+        'workflowExecution': {'workflowId': 'some_flow_id', 'runId': 'some_run_id'},
+        'events': list(writer.events)
+    })
+
+
+def _generate_table():
+    table = MagicMock()
+    items = {}
+
+    def _put_item(Item):
+        items[Item['run_id']] = {x: Binary(y) if isinstance(y, bytes) else y for x, y in Item.items()}
+
+    def _get_item(Key):
+        item = items.get(Key['run_id'])
+        if item is None:
+            return {}
+        return {'Item': item}
+
+    table.put_item.side_effect = _put_item
+    table.get_item.side_effect = _get_item
+    table.items = items
+    return table
+
+
+@pytest.mark.history_cache
+class TestHistoryCache:
+    def setup_method(self):
+        HistoryCache.clear()
+
+    def teardown_method(self):
+        HistoryCache.clear()
+
+    def test_incremental_poll_reads_only_new_pages(self):
+        writer = _EventWriter()
+        writer.add('WorkflowExecutionStarted', input=json.dumps({}), lambdaRole='some_role')
+        writer.add_decision()
+        poller = _DecisionPoller(writer)
+        general = _generate_general(poller, HistoryCache())
+        for position in range(20):
+            writer.add('DecisionTaskCompleted')
+            writer.add_lambda(f'lambda_{position}', fail=position == 0)
+            poller.previous_started_event_id = writer.add_decision()
+            pages_before = poller.pages_read
+            work_history = general._poll_for_decision()
+            assert poller.pages_read - pages_before <= 2
+            assert _summarize(work_history) == _summarize(_parse_full(writer))
+        writer.add_lambda('lambda_0')
+        writer.add_decision()
+        work_history = general._poll_for_decision()
+        assert work_history.lambda_history['lambda_0'].is_complete
+        assert work_history.lambda_history.get_operation_failed_count('lambda_0') == 1
+
+    def test_decisions_get_untouched_task_args(self):
+        writer = _EventWriter()
+        writer.add('WorkflowExecutionStarted', input=json.dumps({'identifier_stem': 'a'}), lambdaRole='some_role')
+        writer.add_decision()
+        general = _generate_general(_DecisionPoller(writer), HistoryCache())
+        for position in range(2):
+            work_history = general._poll_for_decision()
+            assert work_history.task_args.for_task == _parse_full(writer).task_args.for_task
+            work_history.task_args.add_argument_value('some_flow', {'identifier_stem': 'a'})
+            writer.add_lambda(f'lambda_{position}')
+            writer.add_decision()
+        work_history = general._poll_for_decision()
+        assert work_history.task_args.for_task == _parse_full(writer).task_args.for_task
+
+    def test_past_runs_merged_once_per_run(self):
+        writer = _EventWriter()
+        writer.add('WorkflowExecutionStarted', input=json.dumps({}), lambdaRole='some_role')
+        writer.add_decision()
+        general = _generate_general(_DecisionPoller(writer), HistoryCache(), fresh_start=False)
+        general._get_past_runs = MagicMock(return_value=[])
+        general._poll_for_decision()
+        writer.add_lambda('lambda_0')
+        writer.add_decision()
+        general._poll_for_decision()
+        assert general._get_past_runs.call_count == 1
+
+    def test_stored_snapshot_restores_history(self):
+        table = _generate_table()
+        writer = _EventWriter()
+        writer.add('WorkflowExecutionStarted', input=json.dumps({}), lambdaRole='some_role')
+        writer.add_decision()
+        writer.add_lambda('lambda_0')
+        writer.add_decision()
+        poller = _DecisionPoller(writer)
+        _generate_general(poller, HistoryCache(table=table))._poll_for_decision()
+        assert table.items['some_run_id']['last_event_id'] == len(writer.events)
+        HistoryCache.clear()
+        writer.add_lambda('lambda_1')
+        writer.add_decision()
+        pages_before = poller.pages_read
+        work_history = _generate_general(poller, HistoryCache(table=table))._poll_for_decision()
+        assert poller.pages_read - pages_before == 1
+        assert _summarize(work_history) == _summarize(_parse_full(writer))
+
+    def test_oversized_snapshot_kept_local(self):
+        table = _generate_table()
+        history_cache = HistoryCache(table=table, max_snapshot_bytes=10)
+        history_cache.put(HistorySnapshot('some_run_id', 1, None, [{'eventId': 1}]))
+        assert not table.items
+        assert history_cache.get('some_run_id').last_event_id == 1
+
+    def test_least_recent_snapshot_evicted(self):
+        history_cache = HistoryCache(history_cache_size=2)
+        for run_id in ('run_0', 'run_1'):
+            history_cache.put(HistorySnapshot(run_id, 1, None, []))
+        history_cache.get('run_0')
+        history_cache.put(HistorySnapshot('run_2', 1, None, []))
+        assert history_cache.get('run_1') is None
+        assert history_cache.get('run_0') is not None
@@ -0,0 +1,141 @@
+import io
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+from botocore.exceptions import ClientError
+
+import pytest
+
+from toll_booth.alg_obj.aws.couriers.courier import LambdaCourier, LambdaInvocationException, reported, \
+    FunctionThrottle
+from toll_booth.alg_obj.serializers import AlgEncoder
+
+
+def _generate_response(payload, status_code=200, function_error=None):
+    response = {'StatusCode': status_code, 'Payload': io.BytesIO(payload.encode())}
+    if function_error:
+        response['FunctionError'] = function_error
+    return response
+
+
+@pytest.mark.lambda_courier
+class TestLambdaCourier:
+    def test_decode_payload_unwraps_once(self):
+        inner = json.dumps({'source': [{'id_value': 1001}]}, cls=AlgEncoder)
+        assert LambdaCourier.decode_payload(json.dumps(inner)) == {'source': [{'id_value': 1001}]}
+        assert LambdaCourier.decode_payload(json.dumps({'id_value': 1001})) == {'id_value': 1001}
+        assert LambdaCourier.decode_payload(json.dumps('plain words')) == 'plain words'
+        assert LambdaCourier.decode_payload(b'') is None
+
+    def test_invoke_all_limits_in_flight(self):
+        in_flight = []
+        peak = []
+        flight_lock = threading.Lock()
+
+        def _invoke(**kwargs):
+            with flight_lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.02)
+            with flight_lock:
+                in_flight.pop()
+            payload = json.loads(kwargs['Payload'])
+            return _generate_response(json.dumps(json.dumps({'position': payload['position']})))
+
+        client = MagicMock()
+        client.invoke.side_effect = _invoke
+        courier = LambdaCourier(client=client, max_in_flight=3)
+        results = courier.invoke_all('some_function', [{'position': x} for x in range(12)])
+        assert results == [{'position': x} for x in range(12)]
+        assert max(peak) <= 3
+        assert client.invoke.call_count == 12
+
+    def test_invoke_raises_function_errors(self):
+        client = MagicMock()
+        client.invoke.return_value = _generate_response('{"errorMessage": "boom"}', function_error='Unhandled')
+        courier = LambdaCourier(client=client, max_in_flight=1)
+        with pytest.raises(LambdaInvocationException) as e:
+            courier.invoke('some_function', {})
+        assert e.value.function_error == 'Unhandled'
+
+    def test_dispatch_registers_callback(self):
+        client = MagicMock()
+        client.invoke.return_value = {'StatusCode': 202}
+        callback_store = MagicMock()
+        callback_store.table_name = 'LambdaCallbacks'
+        courier = LambdaCourier(client=client, max_in_flight=1, callback_store=callback_store)
+        callback_id = courier.dispatch('some_function', {'step_name': 'extraction'})
+        callback_store.register.assert_called_once_with(callback_id, 'some_function')
+        invoke_kwargs = client.invoke.call_args[1]
+        assert invoke_kwargs['InvocationType'] == 'Event'
+        assert json.loads(invoke_kwargs['Payload'])['callback_id'] == callback_id
+
+    def test_reported_handler(self, monkeypatch):
+        reports = []
+        monkeypatch.setattr(LambdaCourier, 'report_callback',
+                            classmethod(lambda cls, event, results=None, error=None: reports.append((results, error))))
+
+        @reported
+        def _handler(event, context):
+            if event.get('fail'):
+                raise RuntimeError('boom')
+            return 'finished'
+
+        assert _handler({'callback_id': 'abc'}, None) == 'finished'
+        with pytest.raises(RuntimeError):
+            _handler({'callback_id': 'abc', 'fail': True}, None)
+        assert reports[0] == ('finished', None)
+        assert 'boom' in reports[1][1]
+
+    def test_invoke_backs_off_when_throttled(self):
+        throttled = ClientError({'Error': {'Code': 'TooManyRequestsException', 'Message': 'Rate Exceeded'}}, 'Invoke')
+        client = MagicMock()
+        client.invoke.side_effect = [throttled, throttled, _generate_response(json.dumps(json.dumps('done')))]
+        courier = LambdaCourier(client=client, max_in_flight=4, backoff_base=0.001)
+        assert courier.invoke('some_function', {}) == 'done'
+        assert courier.get_throttle('some_function').limit == 2
+        assert courier.stats['some_function']['throttles'] == 2
+        assert courier.stats['some_function']['invocations'] == 1
+
+    def test_invoke_gives_up_after_throttle_attempts(self):
+        throttled = ClientError({'Error': {'Code': 'TooManyRequestsException', 'Message': 'Rate Exceeded'}}, 'Invoke')
+        client = MagicMock()
+        client.invoke.side_effect = throttled
+        courier = LambdaCourier(client=client, max_in_flight=2, throttle_attempts=3, backoff_base=0.001)
+        with pytest.raises(ClientError):
+            courier.invoke('some_function', {})
+        assert client.invoke.call_count == 3
+        assert courier.stats['some_function']['errors'] == 1
+
+    def test_function_throttle_recovers(self):
+        throttle = FunctionThrottle(4)
+        throttle.acquire()
+        throttle.release(throttled=True)
+        assert throttle.limit == 2
+        for _ in range(2):
+            throttle.acquire()
+            throttle.release()
+        assert throttle.limit == 3
+        assert throttle.in_flight == 0
+
+    def test_function_concurrency_is_capped(self):
+        in_flight = []
+        peak = []
+        flight_lock = threading.Lock()
+
+        def _invoke(**kwargs):
+            with flight_lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.02)
+            with flight_lock:
+                in_flight.pop()
+            return _generate_response(json.dumps(json.dumps('done')))
+
+        client = MagicMock()
+        client.invoke.side_effect = _invoke
+        courier = LambdaCourier(client=client, max_in_flight=8, function_concurrency=2)
+        assert courier.invoke_all('some_function', [{} for _ in range(8)]) == ['done'] * 8
+        assert max(peak) <= 2
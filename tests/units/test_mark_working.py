@@ -0,0 +1,77 @@
+from unittest.mock import patch, MagicMock
+
+import pytest
+from botocore.exceptions import ClientError
+
+from toll_booth.alg_obj.aws.sapper.leech_driver import LeechDriver, LeechRecord
+
+identifier_stem = '#vertex#ExternalId#{"id_source": "MBI", "id_type": "Employees", "id_name": "emp_id"}#'
+
+
+def _generate_cancellation(reasons):
+    error_response = {
+        'Error': {'Code': 'TransactionCanceledException', 'Message': 'Transaction cancelled'},
+        'CancellationReasons': reasons
+    }
+    return ClientError(error_response, 'TransactWriteItems')
+
+
+def _generate_condition_failure():
+    error_response = {'Error': {'Code': 'ConditionalCheckFailedException', 'Message': 'condition failed'}}
+    return ClientError(error_response, 'UpdateItem')
+
+
+@pytest.mark.mark_working
+class TestMarkIdsAsWorking:
+    @patch('toll_booth.alg_obj.aws.sapper.property_index.boto3')
+    @patch('toll_booth.alg_obj.aws.sapper.leech_driver.boto3')
+    def test_mark_ids_chunks_transactions(self, mock_boto, mock_index_boto):
+        driver = LeechDriver(table_name='Leech')
+        id_values = list(range(60))
+        already_working, not_working = driver.mark_ids_as_working(
+            id_values, leech_record=LeechRecord(identifier_stem, None))
+        mock_client = driver._table.meta.client
+        assert mock_client.transact_write_items.call_count == 3
+        first_transaction = mock_client.transact_write_items.call_args_list[0][1]['TransactItems']
+        assert len(first_transaction) == 25
+        update = first_transaction[0]['Update']
+        assert update['TableName'] == 'Leech'
+        assert update['ConditionExpression'] == 'attribute_not_exists(#n0.#n1)'
+        assert update['Key']['identifier_stem'] == {'S': '0'}
+        assert already_working == []
+        assert not_working == id_values
+
+    @patch('toll_booth.alg_obj.aws.sapper.property_index.boto3')
+    @patch('toll_booth.alg_obj.aws.sapper.leech_driver.boto3')
+    def test_mark_ids_falls_back_when_cancelled(self, mock_boto, mock_index_boto):
+        driver = LeechDriver(table_name='Leech')
+        mock_client = driver._table.meta.client
+        mock_client.transact_write_items.side_effect = _generate_cancellation([
+            {'Code': 'None'}, {'Code': 'ConditionalCheckFailed'}, {'Code': 'None'}, {'Code': 'TransactionConflict'}
+        ])
+        update_results = {1: None, 3: _generate_condition_failure(), 4: None}
+
+        def _update_item(**kwargs):
+            result = update_results[int(kwargs['Key']['identifier_stem'])]
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        driver._table.update_item = MagicMock(side_effect=_update_item)
+        already_working, not_working = driver.mark_ids_as_working(
+            [1, 2, 3, 4], leech_record=LeechRecord(identifier_stem, None))
+        assert already_working == [2, 3]
+        assert not_working == [1, 4]
+        assert driver._table.update_item.call_count == 3
+
+    @patch('toll_booth.alg_obj.aws.sapper.property_index.boto3')
+    @patch('toll_booth.alg_obj.aws.sapper.leech_driver.boto3')
+    def test_mark_ids_dedupes_transactions(self, mock_boto, mock_index_boto):
+        driver = LeechDriver(table_name='Leech')
+        id_values = [3, 1, 3, 2, 1, 3]
+        already_working, not_working = driver.mark_ids_as_working(
+            id_values, leech_record=LeechRecord(identifier_stem, None))
+        transact_items = driver._table.meta.client.transact_write_items.call_args[1]['TransactItems']
+        assert [x['Update']['Key']['identifier_stem'] for x in transact_items] == [{'S': '3'}, {'S': '1'}, {'S': '2'}]
+        assert not_working == [3, 1, 2]
+        assert sorted(already_working) == [1, 3, 3]
@@ -0,0 +1,90 @@
+import json
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from toll_booth.alg_obj.aws.gentlemen.events.marker_index import MarkerIndex
+
+
+def _generate_marker_event(event_id, marker_name, details):
+    return {
+        'eventId': event_id,
+        'eventType': 'MarkerRecorded',
+        'eventTimestamp': datetime.utcnow(),
+        'markerRecordedEventAttributes': {'markerName': marker_name, 'details': json.dumps(details)}
+    }
+
+
+def _generate_plain_event(event_id):
+    return {
+        'eventId': event_id,
+        'eventType': 'DecisionTaskCompleted',
+        'eventTimestamp': datetime.utcnow(),
+        'decisionTaskCompletedEventAttributes': {}
+    }
+
+
+def _generate_client(histories):
+    client = MagicMock()
+    history_calls = []
+
+    def _get_paginator(operation_name):
+        paginator = MagicMock()
+        if operation_name == 'list_closed_workflow_executions':
+            paginator.paginate.return_value = [
+                {'executionInfos': [{'execution': {'runId': x}} for x in histories]}
+            ]
+            return paginator
+
+        def _paginate(**kwargs):
+            history_calls.append(kwargs)
+            return histories[kwargs['execution']['runId']]
+
+        paginator.paginate.side_effect = _paginate
+        return paginator
+
+    client.get_paginator.side_effect = _get_paginator
+    return client, history_calls
+
+
+@pytest.mark.marker_index
+class TestMarkerIndex:
+    def setup_method(self):
+        MarkerIndex.clear_cache()
+
+    def test_past_runs_read_backwards_and_cache(self):
+        histories = {
+            'run_1': [
+                {'events': [_generate_marker_event(5, 'checkpoint', {'step': 'second'}), _generate_plain_event(4)]},
+                {'events': [_generate_marker_event(3, 'checkpoint', {'step': 'first'}), _generate_plain_event(1)]}
+            ],
+            'run_2': [
+                {'events': [_generate_plain_event(2), _generate_plain_event(1)]}
+            ]
+        }
+        client, history_calls = _generate_client(histories)
+        marker_index = MarkerIndex('Leech', client=client, max_workers=2)
+        past_runs = marker_index.get_past_runs('flow_1')
+        assert len(past_runs) == 2
+        assert past_runs[0].checkpoints == {'step': 'second'}
+        assert [x.marker_details['step'] for x in past_runs[0]] == ['first', 'second']
+        assert not past_runs[1].markers
+        assert all(x['reverseOrder'] is True for x in history_calls)
+        assert len(history_calls) == 2
+        marker_index.get_past_runs('flow_1')
+        assert len(history_calls) == 2
+
+    def test_first_marker_only_stops_early(self):
+        histories = {
+            'run_1': iter([
+                {'events': [_generate_marker_event(5, 'config', {'version': 2}), _generate_plain_event(4)]},
+                {'events': [_generate_marker_event(3, 'config', {'version': 1})]}
+            ])
+        }
+        client, history_calls = _generate_client(histories)
+        marker_index = MarkerIndex('Leech', client=client, first_marker_only=True)
+        marker_history = marker_index.get_run_markers('flow_1', 'run_1')
+        assert marker_history.config_marker.marker_details == {'version': 2}
+        assert len(marker_history.markers) == 1
+        assert next(histories['run_1'])['events'][0]['eventId'] == 3
@@ -0,0 +1,59 @@
+import io
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from toll_booth.alg_obj.aws.couriers.courier import LambdaCourier
+from toll_booth.alg_obj.aws.matryoshkas.matryoshka import Matryoshka
+
+
+def _generate_client(in_flight, peak):
+    flight_lock = threading.Lock()
+
+    def _invoke(**kwargs):
+        payload = json.loads(kwargs['Payload'])
+        with flight_lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.02)
+        with flight_lock:
+            in_flight.pop()
+        task_args = payload['task_args']
+        if task_args.get('fail'):
+            error = json.dumps({'errorType': 'RuntimeError', 'errorMessage': 'boom', 'stackTrace': []})
+            return {'StatusCode': 200, 'FunctionError': 'Unhandled', 'Payload': io.BytesIO(error.encode())}
+        return {'StatusCode': 200, 'Payload': io.BytesIO(json.dumps(json.dumps(task_args)).encode())}
+
+    client = MagicMock()
+    client.invoke.side_effect = _invoke
+    return client
+
+
+@pytest.mark.matryoshka
+class TestMatryoshka:
+    def test_spin_invokes_children_concurrently(self):
+        in_flight, peak = [], []
+        courier = LambdaCourier(client=_generate_client(in_flight, peak), max_in_flight=4)
+        task_args = [{'task_number': x} for x in range(12)] + [{'fail': True}]
+        with patch.object(LambdaCourier, 'get_courier', return_value=courier):
+            matryoshka = Matryoshka(task_args, 4, 'some_task', 'some_arn', {'constant': 1}, {})
+        results = matryoshka.completed_results
+        assert results[:12] == [{'task_number': x, 'constant': 1} for x in range(12)]
+        assert results[12].startswith('RuntimeError  boom')
+        assert 1 < max(peak) <= 4
+        assert len(matryoshka.child_stats) == 13
+        assert [x['error'] for x in matryoshka.child_stats].count('Unhandled') == 1
+        assert courier.stats['some_arn']['invocations'] == 13
+
+    def test_unpack_keys_results_by_plan(self):
+        in_flight, peak = [], []
+        courier = LambdaCourier(client=_generate_client(in_flight, peak), max_in_flight=4)
+        m_plan = {x: [{'task_number': x}] for x in range(6)}
+        with patch.object(LambdaCourier, 'get_courier', return_value=courier):
+            matryoshka = Matryoshka(m_plan, 4, 'some_task', 'some_arn', {}, {})
+        assert set(matryoshka.completed_results) == set(range(6))
+        assert matryoshka.completed_results[2]['m_plan'] == [{'task_number': 2}]
+        assert max(peak) <= 4
@@ -0,0 +1,57 @@
+import json
+import time
+
+import pytest
+
+from toll_booth.alg_obj.aws.matryoshkas.matryoshka import MatryoshkaCluster
+
+
+def _plan(desired_concurrency, task_count, max_m_concurrency=20):
+    task_args = [{'task_number': x} for x in range(task_count)]
+    cluster = MatryoshkaCluster.calculate_for_concurrency(
+        desired_concurrency, 'test_task', 'test_arn', task_args=task_args, max_m_concurrency=max_m_concurrency)
+    return cluster.seed_args[0]
+
+
+def _collect_workers(m_plan):
+    workers = []
+    pending = [m_plan]
+    while pending:
+        branch = pending.pop()
+        if isinstance(branch, list):
+            workers.append(branch)
+            continue
+        pending.extend(branch.values())
+    return workers
+
+
+@pytest.mark.matryoshka
+class TestMatryoshkaPlanner:
+    @pytest.mark.parametrize('desired_concurrency, task_count, max_m_concurrency', [
+        (10, 30, 20), (100, 10, 25), (100, 1000, 25), (400, 99, 5), (400, 2001, 20)
+    ])
+    def test_plan_is_balanced(self, desired_concurrency, task_count, max_m_concurrency):
+        m_plan = _plan(desired_concurrency, task_count, max_m_concurrency)
+        workers = _collect_workers(m_plan)
+        loads = [len(x) for x in workers]
+        assigned = sorted(y['task_number'] for x in workers for y in x)
+        assert assigned == list(range(task_count))
+        assert min(loads) > 0
+        assert len(workers) <= desired_concurrency
+        assert max(loads) - min(loads) <= 1
+
+    def test_plan_shape(self):
+        m_plan = _plan(10, 30)
+        assert m_plan[0] == [{'task_number': 0}, {'task_number': 10}, {'task_number': 20}]
+        m_plan = json.loads(json.dumps(_plan(100, 10, 25)))
+        assert m_plan == {str(x): {'0': [{'task_number': x}]} for x in range(10)}
+
+    def test_plan_scales_linearly(self):
+        start = time.perf_counter()
+        _plan(100, 10000, 25)
+        small = time.perf_counter() - start
+        start = time.perf_counter()
+        m_plan = _plan(100, 100000, 25)
+        large = time.perf_counter() - start
+        assert sum(len(x) for x in _collect_workers(m_plan)) == 100000
+        assert large < small * 30
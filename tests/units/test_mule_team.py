@@ -0,0 +1,134 @@
+import threading
+import time
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from toll_booth.alg_obj.forge.extractors.credible_fe.cache import CachedEmployeeIds
+from toll_booth.alg_obj.forge.extractors.credible_fe.mule_team import CredibleMuleTeam
+
+driver_patch = 'toll_booth.alg_obj.forge.extractors.credible_fe.mule_team.CredibleFrontEndDriver'
+empty_page = '<table border="0" cellpadding="0" cellspacing="0" width="100%"><tr><td>none</td></tr></table>'
+detail_page = (
+    '<table><tr></tr><tr></tr><tr></tr><tr></tr>'
+    '<tr><td>x</td><td>First_Name</td><td>x</td><td>Bob</td><td>x</td><td>Robert</td></tr></table>'
+)
+enrichment_args = {
+    'driving_id_type': 'Clients',
+    'driving_id_name': 'client_id',
+    'driving_id_value': 1001,
+    'local_max_value': None,
+    'get_by_emp_ids': False,
+    'get_details': False,
+    'get_entity_ids': False
+}
+
+
+def _generate_driver(**kwargs):
+    mock_driver = MagicMock()
+    for method_name, method_effect in kwargs.items():
+        setattr(mock_driver, method_name, MagicMock(side_effect=method_effect))
+    mock_context = MagicMock()
+    mock_context.__enter__.return_value = mock_driver
+    return mock_context
+
+
+@pytest.mark.mule_team
+class TestMuleTeam:
+    def test_enrich_data_finishes_on_completion(self):
+        with patch(driver_patch) as mock_driver:
+            mock_driver.return_value = _generate_driver(retrieve_changelog_page=lambda *args, **kwargs: empty_page)
+            mule_team = CredibleMuleTeam('MBI')
+            start = time.time()
+            results = mule_team.enrich_data(**enrichment_args.copy())
+            assert time.time() - start < 2
+            assert results == {}
+
+    def test_enrich_data_propagates_errors(self):
+        def _fail(*args, **kwargs):
+            raise RuntimeError('credible is down')
+
+        with patch(driver_patch) as mock_driver:
+            mock_driver.return_value = _generate_driver(retrieve_changelog_page=_fail)
+            mule_team = CredibleMuleTeam('MBI', timeout=5)
+            with pytest.raises(RuntimeError, match='credible is down'):
+                mule_team.enrich_data(**enrichment_args.copy())
+
+    def test_change_details_merge(self):
+        with patch(driver_patch) as mock_driver:
+            mock_driver.return_value = _generate_driver(retrieve_change_detail_page=lambda *args: detail_page)
+            mule_team = CredibleMuleTeam('MBI', timeout=5)
+            mule_team._assign_mule('_get_change_details', {'changelog_id': '12'})
+            mule_team._assign_mule('_get_change_details', {'changelog_id': '13'})
+            mule_team._start_threads()
+            assert mule_team._finished.wait(5)
+            mule_team._stop_threads()
+        expected = [{'id_name': 'first_name', 'old_value': 'Bob', 'new_value': 'Robert'}]
+        assert mule_team._results == {'change_details': {'12': expected, '13': expected}}
+
+    def test_enrich_data_abandons_wedged_workers(self):
+        release = threading.Event()
+
+        def _wedge(*args, **kwargs):
+            release.wait(10)
+            return empty_page
+
+        with patch(driver_patch) as mock_driver:
+            mock_driver.return_value = _generate_driver(retrieve_changelog_page=_wedge)
+            mule_team = CredibleMuleTeam('MBI', timeout=0.5, join_timeout=0.5)
+            for _ in range(50):
+                mule_team._assign_mule('_extract_changelog_page', enrichment_args.copy())
+            start = time.time()
+            with pytest.raises(TimeoutError):
+                mule_team.enrich_data(**enrichment_args.copy())
+            assert time.time() - start < 3
+        release.set()
+        assert mule_team._work.qsize() <= mule_team._mule_count
+
+    def test_mules_do_not_scale_after_stopping(self):
+        mule_team = CredibleMuleTeam('MBI', thread_count=3, backlog_per_mule=1)
+        mule_team._mule_count = 1
+        mule_team._stopped.set()
+        with patch.object(CredibleMuleTeam, '_add_mule') as mock_add:
+            for _ in range(10):
+                mule_team._assign_mule('_extract_changelog_page', {})
+        mock_add.assert_not_called()
+
+    def test_mules_scale_with_backlog(self):
+        mule_team = CredibleMuleTeam('MBI', thread_count=3, backlog_per_mule=1)
+        mule_team._mule_count = 1
+        with patch.object(CredibleMuleTeam, '_add_mule') as mock_add:
+            mock_add.side_effect = lambda: setattr(mule_team, '_mule_count', mule_team._mule_count + 1)
+            for _ in range(10):
+                mule_team._assign_mule('_extract_changelog_page', {})
+        assert mule_team._mule_count == 3
+
+    def test_entity_caches_split_by_entity_type(self):
+        CachedEmployeeIds.clear()
+        mule_team = CredibleMuleTeam('MBI')
+        with patch.object(CredibleMuleTeam, '_add_result'):
+            mule_team._parse_client_id_search(
+                results='Id,Name\r\n1234,"Smith, John"\r\n', last_name='Smith', first_initial='J',
+                change_date_utc=1, entity_type='Clients')
+        assert CredibleMuleTeam('MBI')._get_entity_cache('Clients').get_emp_id('Smith', 'J') == 1234
+        assert CredibleMuleTeam('MBI')._get_entity_cache('Employees').get_emp_id('Smith', 'J') is None
+        assert CredibleMuleTeam('MBI')._cached_emp_ids.get_emp_id('Smith', 'J') is None
+        CachedEmployeeIds.clear()
+
+    def test_failed_search_releases_working_name(self):
+        CachedEmployeeIds.clear()
+        mule_team = CredibleMuleTeam('MBI')
+        entity_cache = mule_team._get_entity_cache('Clients')
+        entity_cache.mark_emp_id_working('Smith', 'J', 1)
+        search_kwargs = {'last_name': 'Smith', 'first_initial': 'J', 'change_date_utc': 1,
+                         'entity_type': 'Clients', 'result_location': 'entity_ids'}
+        with patch.object(CredibleMuleTeam, '_parse_client_id_search', side_effect=KeyError('Id')):
+            mule_team._perform('_parse_client_id_search', search_kwargs)
+        assert mule_team._errors
+        assert entity_cache.get_emp_id('Smith', 'J', 2) is None
+        mule_team._cached_emp_ids.mark_emp_id_working('Doe', 'J', 3)
+        mule_team._assign_driver('_get_emp_id_search', {
+            'last_name': 'Doe', 'first_initial': 'J', 'change_date_utc': 3, 'result_location': 'by_emp_ids'})
+        mule_team._stop_threads(abandon=True)
+        assert mule_team._cached_emp_ids.get_emp_id('Doe', 'J', 4) is None
+        CachedEmployeeIds.clear()
@@ -1,8 +1,9 @@
 import re
+from unittest.mock import MagicMock
 
 import pytest
 
-from toll_booth.alg_obj.graph.ogm.generator import CommandGenerator
+from toll_booth.alg_obj.graph.ogm.generator import CommandGenerator, EdgeCommandGenerator
 from toll_booth.alg_obj.graph.ogm.ogm import Ogm
 from toll_booth.alg_tasks.metl_tasks.load import load
 
@@ -31,3 +32,96 @@ class TestCommandGenerator:
         generator = CommandGenerator.get_for_obj_type(potential_vertex.object_type)
         test_command = generator.create_command(potential_vertex)
         assert self._verify_command(test_command) is True
+
+
+class _FlakyDriver:
+    def __init__(self, failing_command=None):
+        self._failing_command = failing_command
+        self.queries = []
+
+    def execute(self, query, read_only=False):
+        self.queries.append(query)
+        if self._failing_command and self._failing_command in query:
+            raise RuntimeError('error passing command to remote database')
+        return list(range(query.count('.constant(')))
+
+
+@pytest.mark.batch_upsert
+class TestBatchUpsertEngine:
+    @classmethod
+    def _generate_commands(cls, count):
+        return [(f'object_{x}', f"g.V('{x:032x}').fold().coalesce(unfold(), addV('Test'))") for x in range(count)]
+
+    def test_batching(self):
+        from toll_booth.alg_obj.graph.ogm.batches import BatchUpsertEngine
+
+        driver = _FlakyDriver()
+        engine = BatchUpsertEngine(driver, batch_size=10)
+        results = engine.upsert(self._generate_commands(25))
+        assert len(driver.queries) == 3
+        assert all(x.startswith('g.inject(0).union(__.V(') for x in driver.queries)
+        assert results.is_complete
+        assert [x.graph_object for x in results] == [f'object_{x}' for x in range(25)]
+
+    def test_batch_byte_limit(self):
+        from toll_booth.alg_obj.graph.ogm.batches import BatchUpsertEngine
+
+        driver = _FlakyDriver()
+        engine = BatchUpsertEngine(driver, batch_size=100, max_request_bytes=500)
+        results = engine.upsert(self._generate_commands(20))
+        assert results.is_complete
+        assert len(driver.queries) > 1
+        assert all(len(x) <= 500 for x in driver.queries)
+
+    def test_failure_isolation(self):
+        from toll_booth.alg_obj.graph.ogm.batches import BatchUpsertEngine
+
+        commands = self._generate_commands(16)
+        driver = _FlakyDriver(failing_command=f"'{7:032x}'")
+        engine = BatchUpsertEngine(driver, batch_size=16)
+        results = engine.upsert(commands)
+        assert results.failed_objects == ['object_7']
+        assert len(results.succeeded) == 15
+
+    @classmethod
+    def _generate_edge_commands(cls, count, internal_id=True):
+        schema_entry = MagicMock()
+        schema_entry.entry_properties['change_date'].property_data_type = 'DateTime'
+        generator = EdgeCommandGenerator(schema_entry)
+        commands = []
+        for position in range(count):
+            potential_edge = MagicMock()
+            potential_edge.internal_id = f'{position:032x}' if internal_id else None
+            potential_edge.from_object = f'{position + 100:032x}'
+            potential_edge.to_object = f'{position + 200:032x}'
+            potential_edge.graphed_object_type = '_changed_'
+            potential_edge.object_type = '_changed_'
+            potential_edge.object_properties = {'change_date': '2019-01-01'}
+            commands.append((f'edge_{position}', generator.create_command(potential_edge)))
+        return commands
+
+    def test_edge_batches_are_rooted_on_vertexes(self):
+        from toll_booth.alg_obj.graph.ogm.batches import BatchUpsertEngine
+
+        driver = _FlakyDriver()
+        engine = BatchUpsertEngine(driver, batch_size=10)
+        commands = self._generate_edge_commands(3) + self._generate_edge_commands(2, internal_id=False)
+        assert all(x[1].strip().startswith("g.E(") for x in commands)
+        results = engine.upsert(commands)
+        assert results.is_complete
+        assert len(driver.queries) == 1
+        query = driver.queries[0]
+        assert '__.E(' not in query
+        assert f"__.V('{100:032x}').outE().hasId('{0:032x}').fold().coalesce(unfold(), addE('_changed_')" in query
+        assert f"__.V('{101:032x}').outE().hasLabel('_changed_')" in query
+
+    def test_unrooted_edges_sent_alone(self):
+        from toll_booth.alg_obj.graph.ogm.batches import BatchUpsertEngine
+
+        driver = _FlakyDriver()
+        engine = BatchUpsertEngine(driver, batch_size=10)
+        commands = self._generate_commands(2) + [('edge_x', "g.E('1').drop()")]
+        results = engine.upsert(commands)
+        assert results.is_complete
+        assert driver.queries[-1] == "g.E('1').drop()"
+        assert len(driver.queries) == 2
@@ -0,0 +1,74 @@
+from unittest.mock import patch
+
+import pytest
+
+from toll_booth.alg_obj.aws.sapper.property_index import PropertyIndex, EmptyPropertyLookupException
+from toll_booth.alg_obj.graph.ogm.regulators import MissingObjectProperty
+
+boto_patch = 'toll_booth.alg_obj.aws.sapper.property_index.boto3'
+
+
+@pytest.mark.property_index
+class TestPropertyIndex:
+    def test_index_keys_cover_lookups(self):
+        with patch(boto_patch):
+            property_index = PropertyIndex('VdGraphObjects', max_indexed_properties=6)
+        stored_properties = {'emp_id': 1001, 'id_source': 'MBI', 'first_name': None}
+        index_keys = property_index.generate_index_keys('Employee', stored_properties)
+        assert len(index_keys) == 3
+        lookup_properties = {'emp_id': 1001, 'id_source': MissingObjectProperty()}
+        lookup_key = PropertyIndex.generate_property_key(
+            'Employee', PropertyIndex.normalize_properties(lookup_properties))
+        assert lookup_key in index_keys
+        other_key = PropertyIndex.generate_property_key(
+            'Client', PropertyIndex.normalize_properties(lookup_properties))
+        assert other_key not in index_keys
+
+    def test_index_keys_respect_property_limit(self):
+        with patch(boto_patch):
+            property_index = PropertyIndex('VdGraphObjects', max_indexed_properties=2)
+        stored_properties = {'emp_id': 1001, 'id_source': 'MBI', 'first_name': 'Ernest'}
+        index_keys = property_index.generate_index_keys('Employee', stored_properties)
+        assert index_keys == [
+            PropertyIndex.generate_property_key('Employee', PropertyIndex.normalize_properties(stored_properties)),
+            PropertyIndex.generate_overflow_key('Employee')
+        ]
+
+    def test_subset_lookup_over_property_limit_falls_back(self):
+        with patch(boto_patch):
+            property_index = PropertyIndex('VdGraphObjects', max_indexed_properties=2)
+        stored_properties = {'emp_id': 1001, 'id_source': 'MBI', 'first_name': 'Ernest'}
+        index_items = property_index.generate_index_items('Employee', stored_properties, {'sid_value': '1001'})
+        overflow_items = [x for x in index_items if x['property_key'] == PropertyIndex.generate_overflow_key('Employee')]
+        assert len(overflow_items) == 1
+        property_index._table.query.return_value = {'Items': [{'property_key': overflow_items[0]['property_key']}]}
+        with pytest.raises(EmptyPropertyLookupException):
+            property_index.find_objects('Employee', {'emp_id': 1001, 'id_source': 'MBI'})
+        property_index._resource.batch_get_item.assert_not_called()
+
+    def test_find_objects_filters_stale_entries(self):
+        with patch(boto_patch):
+            property_index = PropertyIndex('VdGraphObjects')
+        key = {'sid_value': '1001', 'identifier_stem': '#vertex#Employee#{}#'}
+        stale_key = {'sid_value': '1002', 'identifier_stem': '#vertex#Employee#{}#'}
+        property_index._table.query.side_effect = [
+            {'Items': []},
+            {'Items': [{'source_key': key}, {'source_key': stale_key}]}
+        ]
+        property_index._resource.batch_get_item.return_value = {'Responses': {'VdGraphObjects': [
+            {'object_properties': {'emp_id': 1001, 'id_source': 'MBI'}},
+            {'object_properties': {'emp_id': 1002, 'id_source': 'MBI'}}
+        ]}}
+        found = property_index.find_objects('Employee', {'emp_id': 1001})
+        assert found == [{'object_properties': {'emp_id': 1001, 'id_source': 'MBI'}}]
+        with pytest.raises(EmptyPropertyLookupException):
+            property_index.find_objects('Employee', {'emp_id': MissingObjectProperty()})
+
+    def test_index_object_marks_overflowed_types(self):
+        with patch(boto_patch):
+            property_index = PropertyIndex('VdGraphObjects', max_indexed_properties=2)
+        property_index.index_object(
+            'Employee', {'emp_id': 1001, 'id_source': 'MBI', 'first_name': 'Ernest'}, {'sid_value': '1001'})
+        with pytest.raises(EmptyPropertyLookupException):
+            property_index.find_objects('Employee', {'emp_id': 1001})
+        property_index._table.query.assert_not_called()
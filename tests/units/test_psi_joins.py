@@ -0,0 +1,227 @@
+from datetime import datetime
+
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from toll_booth.alg_obj.posts.accountant.filters import filter_psi_caseload_report, RecordMatchFailedException
+from toll_booth.alg_obj.posts.accountant.joins import EncounterIndex, PatientIndex, ProviderIndex
+
+
+def _reference_filter(**kwargs):
+    reports = {
+        'missing': {'clients': [], 'providers': []},
+        'duplicates': {'clients': [], 'providers': []}
+    }
+    caseload_reports = {}
+    query_data = {x['query_name']: x['query_results'] for x in kwargs['query_data']}
+    caseloads, service_assessments = query_data['caseloads'], query_data['service_based_assessments']
+    clients, employees, encounters = query_data['clients'], query_data['employees'], query_data['encounters']
+    providers = {}
+    caseloads = {x: y for x, y in caseloads.items() if y['Clinic Supervisor Name'] and y['CSW Name'] and y['Client Name']}
+    for medicaid_number, caseload_entry in caseloads.items():
+        patient_name = caseload_entry['Client Name']
+        provider_name = caseload_entry['CSW Name']
+        supervisor_name = caseload_entry['Clinic Supervisor Name']
+        try:
+            patient_id = _reference_search_for_patient(medicaid_number, patient_name, clients)
+            provider_id = _reference_find_provider(provider_name, employees, providers)
+            supervisor_id = _reference_find_supervisor(supervisor_name, employees, providers)
+        except RecordMatchFailedException as e:
+            if e.failure_type == 'duplicates':
+                reports['duplicates'][e.matched_type].append({'provided': caseload_entry, 'found': e.duplicate_records})
+                continue
+            reports['missing'][e.matched_type].append(caseload_entry)
+            continue
+        providers[provider_name] = provider_id
+        providers[supervisor_name] = supervisor_id
+        if supervisor_id not in caseload_reports:
+            caseload_reports[supervisor_id] = {}
+        if provider_id not in caseload_reports[supervisor_id]:
+            caseload_reports[supervisor_id][provider_id] = []
+        if provider_id not in caseload_reports:
+            caseload_reports[provider_id] = []
+        patient_assessments = _reference_filter_encounter_records(patient_id, service_assessments)
+        patient_encounters = _reference_filter_encounter_records(patient_id, encounters)
+        patient_report = {
+            'patient_id': patient_id,
+            'patient_name': patient_name,
+            'encounters': patient_encounters,
+            'assessments': patient_assessments
+        }
+        supervisor_report = {'caseload': patient_report, 'provider_id': provider_id, 'provider_name': provider_name}
+        caseload_reports[provider_id].append(patient_report)
+        caseload_reports[supervisor_id][provider_id].append(supervisor_report)
+    reports['caseloads'] = caseload_reports
+    return reports
+
+
+def _reference_filter_encounter_records(patient_id, encounter_records):
+    filtered_records = {}
+    for record in encounter_records:
+        record_patient_id = record['Consumer ID']
+        if patient_id == record_patient_id:
+            filtered_records[record['Service ID']] = record
+    return filtered_records
+
+
+def _reference_search_for_patient(medicaid_number, patient_name, patient_records):
+    try:
+        last_name, first_name = patient_name.split(', ')
+    except ValueError:
+        first_name, last_name = patient_name.split(' ')
+    matches = []
+    for record in patient_records:
+        record_last_name = record['Last Name']
+        record_first_name = record['First Name']
+        record_medicaid_number = record['Medicaid ID']
+        if record_last_name is None or record_first_name is None:
+            continue
+        if record_medicaid_number is None:
+            if record_last_name.lower() == last_name.lower() and record_first_name.lower() == first_name.lower():
+                matches.append(record)
+            continue
+        if medicaid_number in record_medicaid_number:
+            if record_last_name.lower() == last_name.lower() or record_first_name.lower() == first_name.lower():
+                matches.append(record)
+            continue
+    if len(matches) != 1:
+        match_criteria = (first_name, last_name, medicaid_number)
+        if len(matches) > 1:
+            raise RecordMatchFailedException('clients', match_criteria, 'duplicates', matches)
+        raise RecordMatchFailedException('clients', match_criteria, 'not found')
+    for match in matches:
+        return match[' Id']
+
+
+def _reference_find_provider(provider_name, employees, found_providers):
+    provider_id = found_providers.get(provider_name, None)
+    if provider_id is None:
+        try:
+            last_name, first_name = provider_name.split(', ')
+        except ValueError:
+            first_name, last_name = provider_name.split(' ')
+        provider_id = _reference_search_for_provider(last_name, first_name, employees)
+    return provider_id
+
+
+def _reference_find_supervisor(supervisor_name, employees, found_providers):
+    supervisor_id = found_providers.get(supervisor_name, None)
+    if supervisor_id is None:
+        first_name, last_name = supervisor_name.split(' ')
+        supervisor_id = _reference_search_for_provider(last_name, first_name, employees)
+    return supervisor_id
+
+
+def _reference_search_for_provider(last_name, first_name, provider_records):
+    matches = set()
+    for record in provider_records:
+        record_first_name = record['First Name']
+        record_last_name = record['Last Name']
+        if record_first_name is None or record_last_name is None:
+            continue
+        if record_first_name.lower() == first_name.lower() and record_last_name.lower() == last_name.lower():
+            matches.add(record['Employee ID'])
+    if len(matches) != 1:
+        match_criteria = (first_name, last_name)
+        if len(matches) > 1:
+            raise RecordMatchFailedException('providers', match_criteria, 'duplicates')
+        raise RecordMatchFailedException('providers', match_criteria, 'not found')
+    for match in matches:
+        return match
+
+
+_names = st.sampled_from(['Ann', 'ann', 'ANN', 'Bo', 'bo', 'Cy'])
+_record_names = st.one_of(st.none(), _names)
+_medicaid_numbers = st.text(alphabet='A12', max_size=4)
+_person_names = st.one_of(
+    st.builds(lambda x, y: f'{x}, {y}', _names, _names),
+    st.builds(lambda x, y: f'{x} {y}', _names, _names),
+    st.sampled_from(['Ann Bo Cy', 'Bo,Cy', 'Cy'])
+)
+_clients = st.lists(st.fixed_dictionaries({
+    ' Id': st.integers(0, 6),
+    'Last Name': _record_names,
+    'First Name': _record_names,
+    'Medicaid ID': st.one_of(st.none(), _medicaid_numbers)
+}), max_size=12)
+_employees = st.lists(st.fixed_dictionaries({
+    'Employee ID': st.integers(0, 4),
+    'Last Name': _record_names,
+    'First Name': _record_names
+}), max_size=8)
+_encounters = st.lists(st.fixed_dictionaries({
+    'Consumer ID': st.integers(0, 6),
+    'Service ID': st.integers(0, 5),
+    'Service Date': st.sampled_from([datetime(2019, 1, 1, 9), datetime(2019, 1, 1, 15), datetime(2019, 1, 2)])
+}), max_size=15)
+_caseloads = st.dictionaries(_medicaid_numbers, st.fixed_dictionaries({
+    'Client Name': st.one_of(st.just(''), _person_names),
+    'CSW Name': _person_names,
+    'Clinic Supervisor Name': _person_names
+}), max_size=6)
+
+
+def _run_filter(filter_fn, query_data):
+    try:
+        return filter_fn(query_data=query_data)
+    except (ValueError, AttributeError) as e:
+        return type(e)
+
+
+@pytest.mark.psi_joins
+class TestPsiJoins:
+    @settings(max_examples=200, deadline=None)
+    @given(_caseloads, _clients, _employees, _encounters, _encounters)
+    def test_indexed_filter_matches_scan(self, caseloads, clients, employees, encounters, assessments):
+        query_data = [
+            {'query_name': 'caseloads', 'query_results': caseloads},
+            {'query_name': 'service_based_assessments', 'query_results': assessments},
+            {'query_name': 'clients', 'query_results': clients},
+            {'query_name': 'employees', 'query_results': employees},
+            {'query_name': 'encounters', 'query_results': encounters}
+        ]
+        assert _run_filter(filter_psi_caseload_report, query_data) == _run_filter(_reference_filter, query_data)
+
+    @settings(max_examples=200, deadline=None)
+    @given(_clients, _medicaid_numbers, _person_names)
+    def test_patient_index_matches_scan(self, clients, medicaid_number, patient_name):
+        patient_index = PatientIndex(clients)
+        assert self._search(patient_index.search, medicaid_number, patient_name) == self._search(
+            _reference_search_for_patient, medicaid_number, patient_name, clients)
+
+    def test_self_supervised_provider_fails_like_scan(self):
+        query_data = [
+            {'query_name': 'caseloads', 'query_results': {
+                'A1': {'Client Name': 'Cy, Ann', 'CSW Name': 'Bo, Ann', 'Clinic Supervisor Name': 'Ann Bo'}}},
+            {'query_name': 'service_based_assessments', 'query_results': []},
+            {'query_name': 'clients', 'query_results': [
+                {' Id': 1, 'Last Name': 'Cy', 'First Name': 'Ann', 'Medicaid ID': 'A1'}]},
+            {'query_name': 'employees', 'query_results': [
+                {'Employee ID': 2, 'Last Name': 'Bo', 'First Name': 'Ann'}]},
+            {'query_name': 'encounters', 'query_results': []}
+        ]
+        assert _run_filter(filter_psi_caseload_report, query_data) is AttributeError
+        assert _run_filter(_reference_filter, query_data) is AttributeError
+
+    @settings(max_examples=100, deadline=None)
+    @given(_employees, _names, _names)
+    def test_provider_index_matches_scan(self, employees, last_name, first_name):
+        provider_index = ProviderIndex(employees)
+        assert self._search(provider_index.search, last_name, first_name) == self._search(
+            _reference_search_for_provider, last_name, first_name, employees)
+
+    @settings(max_examples=100, deadline=None)
+    @given(_encounters, st.integers(0, 6))
+    def test_encounter_index_matches_scan(self, encounters, patient_id):
+        encounter_index = EncounterIndex(encounters)
+        expected = _reference_filter_encounter_records(patient_id, encounters)
+        assert encounter_index.for_patient(patient_id) == expected
+
+    @classmethod
+    def _search(cls, search_fn, *args):
+        try:
+            return search_fn(*args)
+        except RecordMatchFailedException as e:
+            return e.matched_type, e.failure_type, e._matching_criteria, e.duplicate_records
+        except ValueError as e:
+            return type(e)
@@ -0,0 +1,107 @@
+import io
+from unittest.mock import MagicMock
+
+import pytest
+from openpyxl import load_workbook
+
+from toll_booth.alg_obj.aws.snakes.multipart import S3MultipartWriter
+from toll_booth.alg_obj.posts.accountant.writer import StreamingReportWriter
+
+
+class _UnseekableSink:
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    @property
+    def body(self):
+        return b''.join(self.parts)
+
+
+def _generate_rows(row_count, row_length=4):
+    for row_number in range(row_count):
+        yield [f'cell_{row_number}_{x}' for x in range(row_length)]
+
+
+def _generate_s3_client():
+    client = MagicMock()
+    client.create_multipart_upload.return_value = {'UploadId': 'some_upload'}
+    client.upload_part.side_effect = lambda **kwargs: {'ETag': f'etag_{kwargs["PartNumber"]}'}
+    return client
+
+
+@pytest.mark.report_writer
+class TestReportWriter:
+    def test_rows_stream_into_titled_sheets(self):
+        report_writer = StreamingReportWriter()
+        report_writer.write_sheet('caseloads', _generate_rows(50, 30), title='caseloads')
+        report_writer.write_sheet('payroll', iter([]), title='payroll')
+        sink = _UnseekableSink()
+        report_writer.save(sink)
+        report_book = load_workbook(io.BytesIO(sink.body))
+        assert report_book.sheetnames == ['caseloads', 'payroll']
+        sheet = report_book['caseloads']
+        assert sheet['A1'].value == 'caseloads'
+        assert sheet['A1'].font.b is True
+        assert sheet['A1'].font.sz == 18
+        assert [str(x) for x in sheet.merged_cells.ranges] == ['A1:AD1']
+        assert sheet['A3'].value == 'cell_0_0'
+        assert sheet.max_row == 52
+        assert report_writer.row_count == 50
+
+    def test_sheet_budget_continues_on_new_sheet(self):
+        report_writer = StreamingReportWriter(max_sheet_bytes=2000)
+        report_writer.write_sheet('a_very_long_productivity_sheet_name', _generate_rows(40), header=['a', 'b', 'c', 'd'])
+        sink = _UnseekableSink()
+        report_writer.save(sink)
+        report_book = load_workbook(io.BytesIO(sink.body))
+        assert len(report_book.sheetnames) > 1
+        assert report_book.sheetnames == report_writer.sheet_names
+        assert all(len(x) <= 31 for x in report_book.sheetnames)
+        values = []
+        for sheet in report_book:
+            rows = list(sheet.values)
+            assert list(rows[0]) == ['a', 'b', 'c', 'd']
+            assert sheet['A1'].font.b is True
+            values.extend(rows[1:])
+        assert [list(x) for x in values] == list(_generate_rows(40))
+
+    def test_small_report_uploads_in_one_put(self):
+        client = _generate_s3_client()
+        report_writer = StreamingReportWriter()
+        report_writer.write_sheet('caseloads', _generate_rows(10))
+        bytes_written = report_writer.save_to_s3('some_bucket', 'some_key.xlsx', client=client)
+        client.put_object.assert_called_once()
+        client.create_multipart_upload.assert_not_called()
+        body = client.put_object.call_args[1]['Body']
+        assert len(body) == bytes_written
+        assert load_workbook(io.BytesIO(body)).sheetnames == ['caseloads']
+
+    def test_large_body_uploads_in_parts(self):
+        client = _generate_s3_client()
+        part_bytes = 5 * 1024 * 1024
+        with S3MultipartWriter('some_bucket', 'some_key', part_bytes=part_bytes, client=client) as s3_writer:
+            for _ in range(11):
+                s3_writer.write(b'x' * (1024 * 1024))
+        assert client.upload_part.call_count == 3
+        uploaded = [len(x[1]['Body']) for x in client.upload_part.call_args_list]
+        assert uploaded == [part_bytes, part_bytes, 1024 * 1024]
+        parts = client.complete_multipart_upload.call_args[1]['MultipartUpload']['Parts']
+        assert parts == [{'PartNumber': x, 'ETag': f'etag_{x}'} for x in (1, 2, 3)]
+        client.put_object.assert_not_called()
+
+    def test_failed_write_aborts_upload(self):
+        client = _generate_s3_client()
+        with pytest.raises(RuntimeError):
+            with S3MultipartWriter('some_bucket', 'some_key', part_bytes=0, client=client) as s3_writer:
+                s3_writer.write(b'x' * (6 * 1024 * 1024))
+                raise RuntimeError('report generation failed')
+        client.abort_multipart_upload.assert_called_once_with(
+            Bucket='some_bucket', Key='some_key', UploadId='some_upload')
+        client.complete_multipart_upload.assert_not_called()
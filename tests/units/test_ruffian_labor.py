@@ -0,0 +1,95 @@
+import threading
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from toll_booth.alg_obj.aws.ruffians.ruffian import Ruffian
+
+
+class _CountdownContext:
+    def __init__(self, polls_before_timeout):
+        self._polls_before_timeout = polls_before_timeout
+        self._lock = threading.Lock()
+
+    def get_remaining_time_in_millis(self):
+        with self._lock:
+            self._polls_before_timeout -= 1
+            if self._polls_before_timeout > 0:
+                return 300000
+            return 1000
+
+
+def _generate_ruffian(context, number_threads=2):
+    ruffian_config = {'list_name': 'credible', 'number_threads': number_threads}
+    return Ruffian.build(context, 'TheLeech', 'fungus', 'credible', {}, ruffian_config=ruffian_config)
+
+
+@pytest.mark.ruffian_runtime
+class TestRuffianLabor:
+    @patch('toll_booth.alg_obj.aws.ruffians.ruffian.boto3')
+    def test_labor_shares_client_and_drains(self, mock_boto):
+        poll_responses = [{'taskToken': f'token_{x}'} for x in range(5)]
+        poll_lock = threading.Lock()
+
+        def _poll(**kwargs):
+            with poll_lock:
+                if poll_responses:
+                    return poll_responses.pop(0)
+            return {}
+
+        mock_client = MagicMock()
+        mock_client.poll_for_activity_task.side_effect = _poll
+        mock_client.record_activity_task_heartbeat.return_value = {'cancelRequested': False}
+        mock_boto.client.return_value = mock_client
+        ruffian = _generate_ruffian(_CountdownContext(3))
+        with patch.object(Ruffian, '_fire_task', return_value='stored_results'):
+            results = ruffian.labor()
+        assert results == {'keep_working': True}
+        assert mock_boto.client.call_count == 1
+        assert mock_client.respond_activity_task_completed.call_count == 5
+        completed_tokens = {x[1]['taskToken'] for x in mock_client.respond_activity_task_completed.call_args_list}
+        assert completed_tokens == {f'token_{x}' for x in range(5)}
+
+    @patch('toll_booth.alg_obj.aws.ruffians.ruffian.boto3')
+    def test_labor_does_not_wait_on_slowest_task(self, mock_boto):
+        slow_started = threading.Event()
+        release_slow = threading.Event()
+        poll_responses = [{'taskToken': 'slow'}] + [{'taskToken': f'fast_{x}'} for x in range(4)]
+        poll_lock = threading.Lock()
+
+        def _poll(**kwargs):
+            with poll_lock:
+                if poll_responses:
+                    return poll_responses.pop(0)
+            release_slow.set()
+            return {}
+
+        def _fire_task(**kwargs):
+            if kwargs['poll_response']['taskToken'] == 'slow':
+                slow_started.set()
+                release_slow.wait(5)
+            return 'stored_results'
+
+        mock_client = MagicMock()
+        mock_client.poll_for_activity_task.side_effect = _poll
+        mock_client.record_activity_task_heartbeat.return_value = {'cancelRequested': False}
+        mock_boto.client.return_value = mock_client
+        ruffian = _generate_ruffian(_CountdownContext(3))
+        with patch.object(Ruffian, '_fire_task', side_effect=_fire_task):
+            ruffian.labor()
+        completed_tokens = [x[1]['taskToken'] for x in mock_client.respond_activity_task_completed.call_args_list]
+        assert slow_started.is_set()
+        assert completed_tokens[-1] == 'slow'
+        assert len(completed_tokens) == 5
+
+    @patch('toll_booth.alg_obj.aws.ruffians.ruffian.random.uniform', side_effect=lambda low, high: high)
+    def test_failed_polls_back_off(self, mock_uniform):
+        ruffian_config = {'number_threads': 1, 'poll_backoff': 1, 'max_poll_backoff': 5}
+        ruffian = Ruffian.build(MagicMock(), 'TheLeech', 'fungus', 'credible', {}, ruffian_config=ruffian_config)
+        poll_error = RuntimeError('swf is down')
+        poll_responses = [poll_error] * 4 + [{}, poll_error]
+        ruffian._draining = MagicMock()
+        ruffian._draining.is_set.side_effect = [False] * len(poll_responses) + [True]
+        with patch.object(Ruffian, '_poll_for_tasks', side_effect=poll_responses):
+            ruffian._poll_and_dispatch(MagicMock(), threading.Semaphore(1))
+        assert [x[0][0] for x in ruffian._draining.wait.call_args_list] == [1, 2, 4, 5, 1]
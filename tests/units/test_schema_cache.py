@@ -0,0 +1,50 @@
+from unittest.mock import patch
+
+import pytest
+
+from toll_booth.alg_obj.graph.schemata.schema import Schema
+from toll_booth.alg_obj.graph.schemata.schema_cache import SchemaCache
+
+snek_patch = 'toll_booth.alg_obj.aws.snakes.schema_snek.SchemaSnek.get_schema_if_modified'
+parser_patch = 'toll_booth.alg_obj.graph.schemata.schema_cache.SchemaParer.parse'
+
+
+@pytest.mark.schema_cache
+class TestSchemaCache:
+    def test_schema_cache_parses_once(self):
+        schema_cache = SchemaCache(revalidate_interval=300)
+        with patch(snek_patch) as mock_get, patch(parser_patch) as mock_parse:
+            mock_get.return_value = ({'vertex': [], 'edge': []}, '"first_tag"')
+            mock_parse.return_value = ({'ExternalId': 'vertex_entry'}, {'_changed_': 'edge_entry'})
+            first_schema = schema_cache.get_schema()
+            second_schema = schema_cache.get_schema()
+            assert isinstance(first_schema, Schema)
+            assert first_schema is second_schema
+            assert schema_cache.get_entry('ExternalId') == 'vertex_entry'
+            assert schema_cache.get_entry('_changed_') == 'edge_entry'
+            assert mock_get.call_count == 1
+            assert mock_parse.call_count == 1
+
+    def test_schema_cache_revalidates_with_etag(self):
+        schema_cache = SchemaCache(revalidate_interval=0)
+        with patch(snek_patch) as mock_get, patch(parser_patch) as mock_parse:
+            mock_get.return_value = ({'vertex': [], 'edge': []}, '"first_tag"')
+            mock_parse.return_value = ({'ExternalId': 'vertex_entry'}, {})
+            first_schema = schema_cache.get_schema()
+            mock_get.return_value = (None, '"first_tag"')
+            second_schema = schema_cache.get_schema()
+            assert first_schema is second_schema
+            assert mock_get.call_args[0][1] == '"first_tag"'
+            assert mock_parse.call_count == 1
+            mock_get.return_value = ({'vertex': [], 'edge': []}, '"second_tag"')
+            third_schema = schema_cache.get_schema()
+            assert third_schema is not first_schema
+            assert mock_parse.call_count == 2
+
+    def test_schema_cache_missing_entry(self):
+        schema_cache = SchemaCache(revalidate_interval=300)
+        with patch(snek_patch) as mock_get, patch(parser_patch) as mock_parse:
+            mock_get.return_value = ({'vertex': [], 'edge': []}, '"first_tag"')
+            mock_parse.return_value = ({}, {})
+            with pytest.raises(KeyError):
+                schema_cache.get_entry('ExternalId')
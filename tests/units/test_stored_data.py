@@ -0,0 +1,148 @@
+import gzip
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+from botocore.exceptions import ClientError
+
+from toll_booth.alg_obj.aws.gentlemen.tasks import TaskArguments
+from toll_booth.alg_obj.aws.snakes.snakes import StoredData, StoredDataCache
+from toll_booth.alg_obj.serializers import AlgEncoder, AlgDecoder
+
+
+class _FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.client = MagicMock()
+        self.client.put_object.side_effect = self._put_object
+        self.client.get_object.side_effect = self._get_object
+
+    def _put_object(self, Bucket, Key, Body, IfNoneMatch=None):
+        if IfNoneMatch == '*' and (Bucket, Key) in self.objects:
+            raise ClientError({'Error': {'Code': 'PreconditionFailed', 'Message': ''}}, 'PutObject')
+        self.objects[(Bucket, Key)] = Body
+
+    def _get_object(self, Bucket, Key):
+        body = MagicMock()
+        body.read.return_value = self.objects[(Bucket, Key)]
+        return {'Body': body}
+
+
+@pytest.fixture
+def fake_s3(monkeypatch):
+    fake = _FakeS3()
+    monkeypatch.setattr(StoredData, '_client', fake.client)
+    monkeypatch.setattr(StoredData, '_stored_keys', set())
+    monkeypatch.setattr(StoredData, '_cache', StoredDataCache(1024 * 1024))
+    return fake
+
+
+def _large_results(marker='a'):
+    return {'rows': [{'row_number': x, 'value': marker * 20} for x in range(200)]}
+
+
+@pytest.mark.stored_data
+class TestStoredData:
+    def test_small_payloads_are_inlined(self, fake_s3):
+        stored_data = StoredData.from_object('some_task', {'id_value': 1001}, full_unpack=False)
+        encoded = json.dumps(stored_data, cls=AlgEncoder)
+        assert 'inline' in encoded
+        decoded = json.loads(encoded, cls=AlgDecoder)
+        assert isinstance(decoded, StoredData)
+        assert decoded.data_string == {'id_value': 1001}
+        assert fake_s3.objects == {}
+        full_unpack = StoredData.from_object('some_task', {'id_value': 1001}, full_unpack=True)
+        assert json.loads(json.dumps(full_unpack, cls=AlgEncoder), cls=AlgDecoder) == {'id_value': 1001}
+
+    def test_large_payloads_are_stored_once(self, fake_s3):
+        first = StoredData.from_object('first_task', _large_results())
+        second = StoredData.from_object('second_task', _large_results())
+        first_encoded = json.dumps(first, cls=AlgEncoder)
+        second_encoded = json.dumps(second, cls=AlgEncoder)
+        assert first.pointer == second.pointer
+        assert '/v2/' in first.pointer
+        assert fake_s3.client.put_object.call_count == 1
+        assert fake_s3.client.head_object.call_count == 0
+        stored_body = list(fake_s3.objects.values())[0]
+        assert stored_body.startswith(b'SD2:gzip\n')
+        decoded = json.loads(first_encoded, cls=AlgDecoder)
+        assert decoded.data_string == _large_results()
+        assert json.loads(second_encoded, cls=AlgDecoder).data_string == _large_results()
+
+    def test_existing_objects_are_not_rewritten(self, fake_s3):
+        StoredData.from_object('some_task', _large_results()).store()
+        StoredData._stored_keys.clear()
+        pointer = StoredData.from_object('other_task', _large_results()).store()
+        assert fake_s3.client.put_object.call_count == 2
+        assert len(fake_s3.objects) == 1
+        assert StoredData.retrieve(pointer).data_string == _large_results()
+
+    def test_legacy_objects_are_readable(self, fake_s3):
+        legacy_body = json.dumps({'data_string': {'id_value': 1001}, 'full_unpack': False}).encode()
+        fake_s3.objects[('the-leech', 'cache/some_task!1546300800.0.json')] = legacy_body
+        stored_data = StoredData.retrieve('the-leech#cache/some_task!1546300800.0.json')
+        assert stored_data.data_string == {'id_value': 1001}
+        assert stored_data.pointer == 'the-leech#cache/some_task!1546300800.0.json'
+        assert json.loads(json.dumps(stored_data, cls=AlgEncoder))['value'] == {'pointer': stored_data.pointer}
+
+    def test_compression_headers(self):
+        stored_data = StoredData('some_task', {'id_value': 1001})
+        packed = stored_data._pack_body('x' * 4096)
+        assert packed.startswith(b'SD2:gzip\n')
+        assert gzip.decompress(packed.partition(b'\n')[2]) == b'x' * 4096
+        assert stored_data._pack_body('{}').startswith(b'SD2:none\n')
+        assert StoredData._decode_body(stored_data._pack_body('{"full_unpack": true}')) == {'full_unpack': True}
+
+    def test_unknown_compression_rejected(self):
+        with patch.dict(os.environ, {'STORED_DATA_COMPRESSION': 'brotli'}):
+            with pytest.raises(ValueError):
+                StoredData('some_task', {'id_value': 1001})
+        with pytest.raises(ValueError):
+            StoredData._unpack_body(b'SD2:brotli\n{}')
+
+    def test_merge_restores_new_content(self, fake_s3):
+        stored_data = StoredData.from_object('some_task', _large_results('a'))
+        original_pointer = stored_data.store()
+        stored_data.merge(StoredData('other_task', {'extra': 'value'}))
+        json.dumps(stored_data, cls=AlgEncoder)
+        assert stored_data.pointer != original_pointer
+        assert StoredData.retrieve(stored_data.pointer).data_string['extra'] == 'value'
+
+    def test_retrieve_uses_the_local_cache(self, fake_s3):
+        pointer = StoredData.from_object('some_task', _large_results()).store()
+        StoredData.get_cache().clear()
+        first = StoredData.retrieve(pointer)
+        second = StoredData.retrieve(pointer)
+        assert fake_s3.client.get_object.call_count == 1
+        assert first.data_string == second.data_string
+        assert first.data_string is not second.data_string
+
+    def test_cache_respects_byte_budget(self):
+        cache = StoredDataCache(100)
+        cache.put('first', b'x' * 60)
+        cache.put('second', b'x' * 30)
+        assert cache.get('first') is not None
+        cache.put('third', b'x' * 30)
+        assert 'second' not in cache
+        assert 'first' in cache and 'third' in cache
+        cache.put('huge', b'x' * 101)
+        assert 'huge' not in cache
+        assert cache.current_bytes == 90
+
+    def test_prefetch_task_arguments(self, fake_s3):
+        inner_pointer = StoredData.from_object('inner', _large_results('b')).store()
+        task_args = TaskArguments({
+            'first': StoredData.from_object('first', _large_results('c')),
+            'second': StoredData.from_object('second', {'nested': StoredData.retrieve(inner_pointer)}),
+            'third': StoredData.from_object('third', _large_results('d'))
+        })
+        encoded = json.dumps({'task_args': task_args}, cls=AlgEncoder)
+        StoredData.get_cache().clear()
+        fetched = StoredData.prefetch(encoded)
+        assert fetched == 3
+        calls = fake_s3.client.get_object.call_count
+        decoded = json.loads(encoded, cls=AlgDecoder)['task_args']
+        assert fake_s3.client.get_object.call_count == calls
+        assert decoded.for_task['nested'].data_string == _large_results('b')
+        assert StoredData.prefetch('{"task_args": {}}') == 0
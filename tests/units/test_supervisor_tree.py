@@ -1,6 +1,7 @@
 import pytest
 
-from toll_booth.alg_obj.posts.accountant.supervisory_tree import SupervisorTree, SupervisionBranch
+from toll_booth.alg_obj.posts.accountant.supervisory_tree import SupervisorTree, SupervisionBranch, \
+    SupervisionCycleException
 
 
 @pytest.mark.supervisor_tree
@@ -50,3 +51,65 @@ class TestSupervisorTree:
             expected_parents.extend(branch.supervisor_ids)
             parents = tree.get_parents(supervised_id)
             assert parents == expected_parents
+
+    def test_closure_matches_recursion(self):
+        import random
+
+        random_generator = random.Random(1001)
+        branch_links = {}
+        for branch_id in range(300):
+            supervisor_count = random_generator.randint(0, min(3, branch_id))
+            branch_links[branch_id] = random_generator.sample(range(branch_id), supervisor_count)
+        bulk_tree = SupervisorTree.from_branches(
+            [SupervisionBranch(x, list(y)) for x, y in branch_links.items()])
+        incremental_tree = SupervisorTree()
+        for branch_id in random_generator.sample(list(branch_links), len(branch_links)):
+            incremental_tree.add_branch(SupervisionBranch(branch_id, list(branch_links[branch_id])))
+
+        def _recurse_parents(branch_id):
+            parents = []
+            for supervisor_id in branch_links[branch_id]:
+                parents.append(supervisor_id)
+                parents.extend(_recurse_parents(supervisor_id))
+            return parents
+
+        for branch_id in branch_links:
+            expected = list(dict.fromkeys(_recurse_parents(branch_id)))
+            assert bulk_tree.get_parents(branch_id) == expected
+            assert set(incremental_tree.get_parents(branch_id)) == set(expected)
+            for parent_id in expected:
+                assert branch_id in bulk_tree.get_children(parent_id)
+                assert branch_id in incremental_tree.get_children(parent_id)
+                assert incremental_tree.is_supervised_by(branch_id, parent_id)
+
+    def test_deep_hierarchy(self):
+        tree = SupervisorTree.from_branches([SupervisionBranch(x, [x - 1] if x else []) for x in range(5000)])
+        assert len(tree.get_parents(4999)) == 4999
+        assert len(tree.get_children(0)) == 4999
+        tree.add_branch(SupervisionBranch(5000, [4999]))
+        assert tree.is_supervised_by(5000, 0)
+
+    def test_cycles_reported(self):
+        branches = [SupervisionBranch(1, [3]), SupervisionBranch(2, [1]), SupervisionBranch(3, [2])]
+        with pytest.raises(SupervisionCycleException) as exc_info:
+            SupervisorTree.from_branches(branches)
+        assert set(exc_info.value.cycle) == {1, 2, 3}
+        tree = SupervisorTree()
+        tree.add_branch(SupervisionBranch(1, [], [2]))
+        tree.add_branch(SupervisionBranch(2, [], [3]))
+        with pytest.raises(SupervisionCycleException) as exc_info:
+            tree.add_branch(SupervisionBranch(3, [], [1]))
+        assert exc_info.value.cycle == [1, 2, 3, 1]
+        assert tree[3].supervised_ids == []
+        assert tree.get_children(3) == []
+        with pytest.raises(SupervisionCycleException):
+            tree.add_branch(SupervisionBranch(4, [4]))
+        assert 4 not in tree
+
+    def test_late_branch_keeps_links(self):
+        tree = SupervisorTree()
+        tree.add_branch(SupervisionBranch(3, [2]))
+        tree.add_branch(SupervisionBranch(2, [1]))
+        assert tree[2].supervised_ids == [3]
+        assert tree.get_parents(3) == [2, 1]
+        assert tree.get_children(1) == [2, 3]
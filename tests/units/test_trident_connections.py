@@ -0,0 +1,124 @@
+import datetime
+import json
+import os
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from toll_booth.alg_obj.aws.trident.connections import TridentTransport, TridentCredentials, TridentDecoder
+from toll_booth.alg_obj.aws.trident.trident_obj import TridentVertex, TridentEdge
+
+
+def _generate_transport(credential_source):
+    session = MagicMock()
+    session.post.return_value.status_code = 200
+    return TridentTransport('neptune.test', session, credential_source=credential_source), session
+
+
+@pytest.mark.trident_transport
+class TestTridentTransport:
+    def test_signing_key_cached(self):
+        credential_source = MagicMock(return_value=TridentCredentials('access', 'secret'))
+        transport, session = _generate_transport(credential_source)
+        for _ in range(3):
+            transport.post("g.V().limit(1)")
+        assert credential_source.call_count == 1
+        assert session.post.call_count == 3
+        signing_key = transport._signing_key
+        transport.post("g.V().limit(1)")
+        assert transport._signing_key is signing_key
+
+    def test_expiring_credentials_refreshed(self):
+        expires_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=30)
+        credential_source = MagicMock(return_value=TridentCredentials('access', 'secret', 'token', expires_at))
+        transport, session = _generate_transport(credential_source)
+        transport.post("g.V().limit(1)")
+        transport.post("g.V().limit(1)")
+        assert credential_source.call_count == 2
+        headers = session.post.call_args[1]['headers']
+        assert headers['x-amz-security-token'] == 'token'
+        assert 'Credential=access/' in headers['Authorization']
+
+    def test_credentials_read_session_expiration(self):
+        environment = {
+            'AWS_ACCESS_KEY_ID': 'access',
+            'AWS_SECRET_ACCESS_KEY': 'secret',
+            'AWS_SESSION_TOKEN': 'token',
+            'AWS_SESSION_EXPIRATION': '2019-01-01T12:00:00+02:00'
+        }
+        with patch.dict('os.environ', environment):
+            credentials = TridentCredentials.retrieve()
+        assert credentials.expires_at == datetime.datetime(2019, 1, 1, 10)
+        assert credentials.is_expiring(datetime.timedelta(seconds=300))
+
+    def test_credentials_read_refreshable_expiry(self):
+        environment = {'AWS_ACCESS_KEY_ID': 'access', 'AWS_SECRET_ACCESS_KEY': 'secret', 'AWS_SESSION_TOKEN': 'token'}
+        expiry_time = datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(hours=1)
+        boto_credentials = MagicMock(access_key='access', _expiry_time=expiry_time)
+        with patch.dict('os.environ', environment), \
+                patch('toll_booth.alg_obj.aws.trident.connections.boto3') as mock_boto:
+            for variable_name in TridentCredentials._expiration_variables:
+                os.environ.pop(variable_name, None)
+            mock_boto.Session.return_value.get_credentials.return_value = boto_credentials
+            credentials = TridentCredentials.retrieve()
+            assert credentials.expires_at == expiry_time.replace(tzinfo=None)
+            assert not credentials.is_expiring(datetime.timedelta(seconds=300))
+            boto_credentials.access_key = 'other'
+            assert TridentCredentials.retrieve().expires_at is None
+
+    def test_forbidden_response_refreshes_credentials(self):
+        credential_source = MagicMock(return_value=TridentCredentials('access', 'secret'))
+        transport, session = _generate_transport(credential_source)
+        session.post.return_value.status_code = 403
+        transport.post("g.V().limit(1)")
+        assert credential_source.call_count == 2
+        assert session.post.call_count == 2
+
+    def test_shared_transport(self):
+        first = TridentTransport.get_for_endpoint('shared.neptune.test')
+        second = TridentTransport.get_for_endpoint('shared.neptune.test')
+        assert first is second
+
+
+def _generate_response(results):
+    return json.dumps({
+        'requestId': '9c5d3f1e',
+        'status': {'message': '', 'code': 200, 'attributes': {'@type': 'g:Map', '@value': []}},
+        'result': {'data': {'@type': 'g:List', '@value': results}, 'meta': {'@type': 'g:Map', '@value': []}}
+    }).encode('utf-8')
+
+
+graphson_results = [
+    {'@type': 'g:Map', '@value': [
+        {'@type': 'g:T', '@value': 'id'}, 'a1b2', 'client_id', {'@type': 'g:Int64', '@value': 1001}]},
+    {'@type': 'g:Vertex', '@value': {'id': 'a1b2', 'label': 'Client'}},
+    {'@type': 'g:Edge', '@value': {
+        'id': 'c3d4', 'label': '_received_', 'inV': 'a1b2', 'inVLabel': 'Client',
+        'outV': 'e5f6', 'outVLabel': 'ClientVisit'}},
+    {'@type': 'g:Set', '@value': ['Client', 'Employee']},
+    {'@type': 'g:Double', '@value': 1.5}
+]
+
+
+@pytest.mark.trident_decoder
+class TestTridentDecoder:
+    def test_decode_results(self):
+        results = TridentDecoder.decode_results(_generate_response(graphson_results))
+        assert results[0] == {'internal_id': 'a1b2', 'client_id': 1001}
+        assert isinstance(results[1], TridentVertex)
+        assert isinstance(results[2], TridentEdge)
+        assert results[3] == {'Client', 'Employee'}
+        assert results[4] == 1.5
+
+    def test_stream_matches_decode(self):
+        response = _generate_response(graphson_results)
+        streamed = TridentDecoder.stream_results(response)
+        assert not isinstance(streamed, list)
+        streamed = list(streamed)
+        decoded = TridentDecoder.decode_results(response)
+        assert [type(x) for x in streamed] == [type(x) for x in decoded]
+        assert streamed[0] == decoded[0]
+        assert streamed[3:] == decoded[3:]
+
+    def test_stream_empty_results(self):
+        assert list(TridentDecoder.stream_results(_generate_response([]))) == []
@@ -0,0 +1,58 @@
+import re
+import uuid
+
+import pytest
+
+from toll_booth.alg_obj.aws.trident.graph_driver import TridentScanner
+from toll_booth.alg_obj.aws.trident.trident_obj import TridentVertex
+
+
+class _GraphNotary:
+    def __init__(self, vertex_ids):
+        self._vertex_ids = sorted(vertex_ids)
+        self.queries = []
+
+    def stream(self, query):
+        self.queries.append(query)
+        ids = self._vertex_ids
+        for comparison, bound in re.findall(r"\.has\(id, (gt|gte|lt)\('(\w+)'\)\)", query):
+            if comparison == 'gt':
+                ids = [x for x in ids if x > bound]
+            if comparison == 'gte':
+                ids = [x for x in ids if x >= bound]
+            if comparison == 'lt':
+                ids = [x for x in ids if x < bound]
+        limit = int(re.search(r'\.limit\((\d+)\)', query).group(1))
+        return (TridentVertex(x, 'Client') for x in ids[:limit])
+
+
+@pytest.mark.trident_scanner
+class TestTridentScanner:
+    vertex_ids = [uuid.uuid4().hex for _ in range(537)]
+
+    def test_keyset_stream(self):
+        notary = _GraphNotary(self.vertex_ids)
+        scanner = TridentScanner('Client', trident_notary=notary, segment_size=50, target_latency=-1)
+        streamed = [x.vertex_id for x in scanner.stream()]
+        assert streamed == sorted(self.vertex_ids)
+        assert all('.range(' not in x for x in notary.queries)
+        assert all(".has(id, gt('" in x for x in notary.queries[1:])
+
+    def test_adaptive_segment_size(self):
+        notary = _GraphNotary(self.vertex_ids)
+        scanner = TridentScanner('Client', trident_notary=notary, segment_size=10, target_latency=60)
+        streamed = [x.vertex_id for x in scanner.stream()]
+        assert streamed == sorted(self.vertex_ids)
+        limits = [int(re.search(r'\.limit\((\d+)\)', x).group(1)) for x in notary.queries]
+        assert limits[:4] == [10, 20, 40, 80]
+
+    def test_parallel_stream(self):
+        notary = _GraphNotary(self.vertex_ids)
+        scanner = TridentScanner('Client', trident_notary=notary, segment_size=25, worker_count=4)
+        streamed = [x.vertex_id for x in scanner.parallel_stream()]
+        assert sorted(streamed) == sorted(self.vertex_ids)
+
+    def test_id_partitions(self):
+        partitions = TridentScanner.generate_id_partitions(4)
+        assert partitions == [(None, '4'), ('4', '8'), ('8', 'c'), ('c', None)]
+        assert TridentScanner.generate_id_partitions(1) == [(None, None)]
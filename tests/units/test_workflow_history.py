@@ -0,0 +1,117 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from toll_booth.alg_obj.aws.gentlemen.events.history import WorkflowHistory
+
+_start_time = datetime(2019, 1, 1)
+
+
+class _EventWriter:
+    def __init__(self):
+        self.events = []
+
+    def add(self, event_type, **attributes):
+        event_id = len(self.events) + 1
+        attribute_name = event_type[0].lower() + event_type[1:] + 'EventAttributes'
+        self.events.append({
+            'eventId': event_id,
+            'eventType': event_type,
+            'eventTimestamp': _start_time + timedelta(seconds=event_id),
+            attribute_name: attributes
+        })
+        return event_id
+
+
+def _generate_poll_response(lambda_count=3, fail_first=True):
+    writer = _EventWriter()
+    writer.add('WorkflowExecutionStarted', input=json.dumps({}), lambdaRole='some_role')
+    for position in range(lambda_count):
+        lambda_id = f'lambda_{position}'
+        attempts = 2 if fail_first and position == 0 else 1
+        for attempt in range(attempts):
+            scheduled_id = writer.add('LambdaFunctionScheduled', id=lambda_id, name='some_fn', input=json.dumps({}))
+            started_id = writer.add('LambdaFunctionStarted', scheduledEventId=scheduled_id)
+            if attempt < attempts - 1:
+                writer.add('LambdaFunctionFailed', scheduledEventId=scheduled_id, startedEventId=started_id)
+                continue
+            writer.add('LambdaFunctionCompleted', scheduledEventId=scheduled_id, startedEventId=started_id,
+                       result=json.dumps({'position': position}))
+    scheduled_id = writer.add('ActivityTaskScheduled', activityId='activity_0',
+                              activityType={'name': 'some_activity', 'version': '1'}, input=json.dumps({}))
+    started_id = writer.add('ActivityTaskStarted', scheduledEventId=scheduled_id)
+    writer.add('ActivityTaskCompleted', scheduledEventId=scheduled_id, startedEventId=started_id, result='"done"')
+    initiated_id = writer.add('StartChildWorkflowExecutionInitiated', workflowId='child_flow', input=json.dumps({}),
+                              workflowType={'name': 'child', 'version': '1'}, lambdaRole='some_role',
+                              taskList={'name': 'some_list'})
+    child_execution = {'workflowId': 'child_flow', 'runId': 'child_run'}
+    writer.add('ChildWorkflowExecutionStarted', workflowExecution=child_execution, initiatedEventId=initiated_id)
+    writer.add('ChildWorkflowExecutionCompleted', workflowExecution=child_execution, initiatedEventId=initiated_id,
+               result='"child_done"')
+    writer.add('MarkerRecorded', markerName='checkpoint', details=json.dumps({'some_step': 'some_value'}))
+    writer.add('TimerStarted', timerId='error_back_off!1', control=json.dumps({'fn_identifier': 'some_fn'}),
+               startToFireTimeout='30')
+    writer.add('TimerFired', timerId='error_back_off!1')
+    writer.add('WorkflowExecutionSignaled', signalName='start_ruffian', input=json.dumps({}))
+    return {
+        'taskToken': 'some_token',
+        'workflowType': {'name': 'some_flow'},
+        'workflowExecution': {'workflowId': 'some_flow_id', 'runId': 'some_run_id'},
+        'events': writer.events
+    }
+
+
+def _summarize(work_history):
+    return {
+        'lambdas': {x.operation_id: (x.is_complete, len(x.executions), x.run_ids)
+                    for x in work_history.lambda_history},
+        'lambda_failures': work_history.lambda_history.get_operation_failed_count('lambda_0'),
+        'activities': {x.operation_id: (x.is_complete, x.results) for x in work_history.activity_history},
+        'subtasks': {x.operation_id: (x.is_complete, x.results) for x in work_history.subtask_history},
+        'checkpoints': work_history.marker_history.checkpoints,
+        'timers': [(x.timer_id, x.is_fired) for x in work_history.timer_history],
+        'signals': [x.signal_name for x in work_history.signal_history],
+        'event_count': len(work_history.events)
+    }
+
+
+@pytest.mark.workflow_history
+class TestWorkflowHistory:
+    def test_parse_from_poll(self):
+        work_history = WorkflowHistory.parse_from_poll('some_domain', _generate_poll_response())
+        summary = _summarize(work_history)
+        assert summary['lambdas']['lambda_0'] == (True, 2, [2, 5])
+        assert summary['lambda_failures'] == 1
+        assert work_history.lambda_history['lambda_0'].lambda_executions[0].is_failed
+        assert summary['activities'] == {'activity_0': (True, '"done"')}
+        assert summary['subtasks'] == {'child_flow': (True, '"child_done"')}
+        assert summary['checkpoints'] == {'some_step': 'some_value'}
+        assert summary['timers'] == [('error_back_off!1', True)]
+        assert summary['signals'] == ['start_ruffian']
+        assert work_history.last_event_id == len(work_history.events)
+
+    def test_pages_merge_incrementally(self):
+        poll_response = _generate_poll_response()
+        expected = _summarize(WorkflowHistory.parse_from_poll('some_domain', poll_response))
+        all_events = poll_response['events']
+        for page_size in (1, 4, 7):
+            first_page = dict(poll_response, events=all_events[:page_size])
+            work_history = WorkflowHistory.parse_from_poll('some_domain', first_page)
+            for start in range(page_size, len(all_events), page_size):
+                work_history.merge_page(all_events[start:start + page_size])
+            work_history.merge_page(all_events[:3])
+            assert _summarize(work_history) == expected
+
+    def test_parsing_scales_linearly(self):
+        small = _generate_poll_response(lambda_count=500)
+        large = _generate_poll_response(lambda_count=5000)
+        start = time.perf_counter()
+        WorkflowHistory.parse_from_poll('some_domain', small)
+        small_time = time.perf_counter() - start
+        start = time.perf_counter()
+        work_history = WorkflowHistory.parse_from_poll('some_domain', large)
+        large_time = time.perf_counter() - start
+        assert len(work_history.lambda_history.operations) == 5000
+        assert large_time < small_time * 30
@@ -0,0 +1,382 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from json import JSONDecodeError
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+from toll_booth.alg_obj.serializers import AlgEncoder, AlgDecoder
+
+
+def reported(production_fn):
+    def wrapper(event, context):
+        try:
+            results = production_fn(event, context)
+        except Exception:
+            import traceback
+
+            LambdaCourier.report_callback(event, error=traceback.format_exc())
+            raise
+        LambdaCourier.report_callback(event, results)
+        return results
+    return wrapper
+
+
+class LambdaInvocationException(Exception):
+    def __init__(self, function_name, status_code, function_error, details):
+        message = f'invocation of lambda function: {function_name} failed, status_code: {status_code}, ' \
+                  f'function_error: {function_error}, details: {details}'
+        super().__init__(message)
+        self._function_name = function_name
+        self._status_code = status_code
+        self._function_error = function_error
+        self._details = details
+
+    @property
+    def function_name(self):
+        return self._function_name
+
+    @property
+    def status_code(self):
+        return self._status_code
+
+    @property
+    def function_error(self):
+        return self._function_error
+
+    @property
+    def details(self):
+        return self._details
+
+
+class FunctionThrottle:
+    def __init__(self, max_concurrency, min_concurrency=1):
+        self._max_concurrency = max_concurrency
+        self._min_concurrency = min(min_concurrency, max_concurrency)
+        self._limit = max_concurrency
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self):
+        return self._limit
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def acquire(self):
+        with self._condition:
+            while self._in_flight >= self._limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, throttled=False):
+        with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                self._limit = max(self._min_concurrency, self._limit // 2)
+                self._successes = 0
+            elif self._limit < self._max_concurrency:
+                self._successes += 1
+                if self._successes >= self._limit:
+                    self._limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+
+class InvocationStats:
+    def __init__(self, function_name):
+        self._function_name = function_name
+        self._invocations = 0
+        self._errors = 0
+        self._throttles = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def function_name(self):
+        return self._function_name
+
+    @property
+    def invocations(self):
+        return self._invocations
+
+    @property
+    def errors(self):
+        return self._errors
+
+    @property
+    def throttles(self):
+        return self._throttles
+
+    @property
+    def mean_latency(self):
+        if not self._invocations:
+            return 0.0
+        return self._total_latency / self._invocations
+
+    @property
+    def max_latency(self):
+        return self._max_latency
+
+    @property
+    def summary(self):
+        return {
+            'function_name': self._function_name,
+            'invocations': self._invocations,
+            'errors': self._errors,
+            'throttles': self._throttles,
+            'mean_latency': self.mean_latency,
+            'max_latency': self._max_latency
+        }
+
+    def record(self, latency, error=False):
+        with self._lock:
+            self._invocations += 1
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+            if error:
+                self._errors += 1
+
+    def record_throttle(self):
+        with self._lock:
+            self._throttles += 1
+
+
+class LambdaCallbackStore:
+    def __init__(self, **kwargs):
+        table_name = kwargs.get('callback_table_name', os.getenv('LAMBDA_CALLBACK_TABLE', 'LambdaCallbacks'))
+        callback_ttl = kwargs.get('callback_ttl', int(os.getenv('LAMBDA_CALLBACK_TTL', 86400)))
+        self._table_name = table_name
+        self._callback_ttl = callback_ttl
+        self._table = boto3.resource('dynamodb').Table(self._table_name)
+
+    @property
+    def table_name(self):
+        return self._table_name
+
+    def register(self, callback_id, function_name):
+        now = datetime.utcnow().timestamp()
+        self._table.put_item(Item={
+            'callback_id': callback_id,
+            'function_name': function_name,
+            'status': 'pending',
+            'registered_at': str(now),
+            'expires_at': int(now + self._callback_ttl)
+        })
+
+    def report(self, callback_id, results=None, error=None):
+        status = 'failed' if error else 'succeeded'
+        self._table.update_item(
+            Key={'callback_id': callback_id},
+            UpdateExpression='SET #s=:s, #r=:r, #e=:e, #c=:c',
+            ExpressionAttributeNames={'#s': 'status', '#r': 'results', '#e': 'error', '#c': 'completed_at'},
+            ExpressionAttributeValues={
+                ':s': status,
+                ':r': json.dumps(results, cls=AlgEncoder),
+                ':e': error,
+                ':c': str(datetime.utcnow().timestamp())
+            }
+        )
+
+    def check(self, callback_id):
+        item = self._get_callback(callback_id)
+        if item is None or item['status'] == 'pending':
+            return None
+        return self._unpack_callback(item)
+
+    def wait(self, callback_id, timeout=300, poll_interval=1):
+        deadline = time.monotonic() + timeout
+        while True:
+            item = self._get_callback(callback_id)
+            if item is not None and item['status'] != 'pending':
+                return self._unpack_callback(item)
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f'callback {callback_id} did not report back within {timeout} seconds')
+            time.sleep(poll_interval)
+
+    def _get_callback(self, callback_id):
+        response = self._table.get_item(Key={'callback_id': callback_id}, ConsistentRead=True)
+        return response.get('Item')
+
+    @classmethod
+    def _unpack_callback(cls, item):
+        if item['status'] == 'failed':
+            raise LambdaInvocationException(item['function_name'], None, 'Unhandled', item.get('error'))
+        return LambdaCourier.decode_payload(item['results'])
+
+
+class LambdaCourier:
+    _couriers = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, **kwargs):
+        max_in_flight = kwargs.get('max_in_flight', int(os.getenv('LAMBDA_MAX_IN_FLIGHT', 25)))
+        read_timeout = kwargs.get('read_timeout', int(os.getenv('LAMBDA_READ_TIMEOUT', 600)))
+        function_concurrency = kwargs.get(
+            'function_concurrency', int(os.getenv('LAMBDA_FUNCTION_CONCURRENCY', max_in_flight)))
+        throttle_attempts = kwargs.get('throttle_attempts', int(os.getenv('LAMBDA_THROTTLE_ATTEMPTS', 8)))
+        client = kwargs.get('client')
+        if client is None:
+            client = boto3.client('lambda', config=Config(
+                connect_timeout=read_timeout, read_timeout=read_timeout,
+                max_pool_connections=max_in_flight, retries={'max_attempts': 2}))
+        self._max_in_flight = max_in_flight
+        self._client = client
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight)
+        self._callback_store = kwargs.get('callback_store')
+        self._function_concurrency = function_concurrency
+        self._throttle_attempts = throttle_attempts
+        self._backoff_base = kwargs.get('backoff_base', 0.25)
+        self._backoff_cap = kwargs.get('backoff_cap', 20)
+        self._throttles = {}
+        self._stats = {}
+        self._function_lock = threading.Lock()
+
+    @classmethod
+    def get_courier(cls, **kwargs):
+        courier_key = (kwargs.get('max_in_flight'), kwargs.get('read_timeout'))
+        with cls._registry_lock:
+            if courier_key not in cls._couriers:
+                cls._couriers[courier_key] = cls(**kwargs)
+            return cls._couriers[courier_key]
+
+    @property
+    def client(self):
+        return self._client
+
+    @property
+    def max_in_flight(self):
+        return self._max_in_flight
+
+    @property
+    def callback_store(self):
+        if self._callback_store is None:
+            self._callback_store = LambdaCallbackStore()
+        return self._callback_store
+
+    @property
+    def stats(self):
+        return {x: y.summary for x, y in self._stats.items()}
+
+    def get_throttle(self, function_name):
+        with self._function_lock:
+            if function_name not in self._throttles:
+                self._throttles[function_name] = FunctionThrottle(self._function_concurrency)
+                self._stats[function_name] = InvocationStats(function_name)
+            return self._throttles[function_name]
+
+    def get_stats(self, function_name):
+        self.get_throttle(function_name)
+        return self._stats[function_name]
+
+    def invoke(self, function_name, payload):
+        encoded_payload = payload
+        if not isinstance(payload, (str, bytes)):
+            encoded_payload = json.dumps(payload, cls=AlgEncoder)
+        start = time.monotonic()
+        try:
+            response = self._send(function_name, 'RequestResponse', encoded_payload)
+        except Exception:
+            self.get_stats(function_name).record(time.monotonic() - start, error=True)
+            raise
+        raw_payload = response['Payload'].read()
+        failed = response['StatusCode'] != 200 or 'FunctionError' in response
+        self.get_stats(function_name).record(time.monotonic() - start, error=failed)
+        if failed:
+            raise LambdaInvocationException(
+                function_name, response['StatusCode'], response.get('FunctionError'), raw_payload)
+        return self.decode_payload(raw_payload)
+
+    def submit(self, function_name, payload):
+        return self._executor.submit(self.invoke, function_name, payload)
+
+    def submit_timed(self, function_name, payload):
+        return self._executor.submit(self._timed_invoke, function_name, payload)
+
+    def invoke_all(self, function_name, payloads):
+        pending = [self.submit(function_name, x) for x in payloads]
+        return [x.result() for x in pending]
+
+    def dispatch(self, function_name, payload):
+        callback_id = uuid.uuid4().hex
+        self.callback_store.register(callback_id, function_name)
+        payload = payload.copy()
+        payload['callback_id'] = callback_id
+        payload['callback_table_name'] = self.callback_store.table_name
+        response = self._send(function_name, 'Event', json.dumps(payload, cls=AlgEncoder))
+        if response['StatusCode'] != 202:
+            raise LambdaInvocationException(function_name, response['StatusCode'], response.get('FunctionError'), None)
+        logging.info(f'dispatched an event invocation of {function_name}, callback_id: {callback_id}')
+        return callback_id
+
+    def _timed_invoke(self, function_name, payload):
+        start = time.monotonic()
+        try:
+            results = self.invoke(function_name, payload)
+        except LambdaInvocationException as e:
+            return None, time.monotonic() - start, e
+        return results, time.monotonic() - start, None
+
+    def _send(self, function_name, invocation_type, encoded_payload):
+        throttle = self.get_throttle(function_name)
+        attempt = 0
+        while True:
+            attempt += 1
+            throttled = False
+            throttle.acquire()
+            try:
+                with self._slots:
+                    return self._client.invoke(
+                        FunctionName=function_name,
+                        InvocationType=invocation_type,
+                        Payload=encoded_payload
+                    )
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'TooManyRequestsException':
+                    raise
+                throttled = True
+                self.get_stats(function_name).record_throttle()
+                if attempt >= self._throttle_attempts:
+                    raise
+                logging.warning(f'invocation of {function_name} was throttled, attempt {attempt} of '
+                                f'{self._throttle_attempts}, backing off and lowering its concurrency')
+            finally:
+                throttle.release(throttled)
+            ceiling = min(self._backoff_cap, self._backoff_base * (2 ** (attempt - 1)))
+            time.sleep(random.uniform(0, ceiling))
+
+    @classmethod
+    def decode_payload(cls, raw_payload):
+        if not raw_payload:
+            return None
+        results = json.loads(raw_payload, cls=AlgDecoder)
+        if not isinstance(results, str):
+            return results
+        try:
+            return json.loads(results, cls=AlgDecoder)
+        except JSONDecodeError:
+            return results
+
+    @classmethod
+    def report_callback(cls, event, results=None, error=None):
+        callback_id = event.get('callback_id')
+        if not callback_id:
+            return
+        store_kwargs = {}
+        if event.get('callback_table_name'):
+            store_kwargs['callback_table_name'] = event['callback_table_name']
+        callback_store = LambdaCallbackStore(**store_kwargs)
+        callback_store.report(callback_id, results, error)
@@ -1,14 +1,15 @@
 import json
 import logging
+import os
 
 import boto3
 from botocore.client import Config
 from botocore.exceptions import ConnectionClosedError, ClientError
 from retrying import retry
 
-from toll_booth.alg_obj.aws.gentlemen.events.events import Event
 from toll_booth.alg_obj.aws.gentlemen.events.history import WorkflowHistory
-from toll_booth.alg_obj.aws.gentlemen.events.markers import MarkerHistory
+from toll_booth.alg_obj.aws.gentlemen.events.history_cache import HistoryCache, HistorySnapshot
+from toll_booth.alg_obj.aws.gentlemen.events.marker_index import MarkerIndex
 from toll_booth.alg_tasks.rivers.flows import fungus
 from toll_booth.alg_tasks.rivers.flows.automation import command_credible
 from toll_booth.alg_tasks.rivers.flows.fungi import work_remote_id_change_action, command_fungi, work_remote_id, \
@@ -30,6 +31,8 @@ class WorkHistoryRetrievalException(Exception):
 class General:
     def __init__(self, domain_name, task_list, context=None, identity=None, **kwargs):
         run_config = kwargs.get('run_config', {})
+        incremental_history = kwargs.get(
+            'incremental_history', os.getenv('DECIDER_INCREMENTAL_HISTORY', 'false').lower() == 'true')
         self._domain_name = domain_name
         self._task_list = task_list
         self._context = context
@@ -37,6 +40,11 @@ class General:
         self._run_config = run_config
         self._client = boto3.client('swf', config=Config(
             connect_timeout=70, read_timeout=70, retries={'max_attempts': 2}))
+        self._marker_index = MarkerIndex(domain_name, **kwargs)
+        self._incremental_history = incremental_history
+        self._history_cache = None
+        if incremental_history:
+            self._history_cache = kwargs.get('history_cache', HistoryCache(**kwargs))
 
     def command(self):
         try:
@@ -59,66 +67,17 @@ class General:
             trace = traceback.format_exc()
             self._fail_task(work_history, e, trace)
 
-    @retry(wait_exponential_multiplier=1000, wait_exponential_max=10000, stop_max_delay=10000)
-    def _get_markers(self, flow_id, run_id):
-        marker_histories = []
-        history = None
-        client = boto3.client('swf', config=Config(retries={'max_attempts': 5}))
-        paginator = client.get_paginator('get_workflow_execution_history')
-        response_iterator = paginator.paginate(
-            domain=self._domain_name,
-            execution={
-                'workflowId': flow_id,
-                'runId': run_id
-            }
-        )
-        for page in response_iterator:
-            events = [Event.parse_from_decision_poll_event(x) for x in page['events']]
-            marker_history = MarkerHistory.generate_from_events(run_id, events)
-            marker_histories.append(marker_history)
-        for marker_history in marker_histories:
-            if history is None:
-                history = marker_history
-                continue
-            history.merge_history(marker_history)
-        return history
-
     @retry(wait_exponential_multiplier=1000, wait_exponential_max=10000, stop_max_delay=10000)
     def _get_past_runs(self, flow_id):
-        from datetime import datetime, timedelta
-        one_day_ago = datetime.utcnow() - timedelta(days=2)
-        workflow_histories = []
-        client = boto3.client('swf', config=Config(retries={'max_attempts': 5}))
-        paginator = client.get_paginator('list_closed_workflow_executions')
-        response_iterator = paginator.paginate(
-            domain=self._domain_name,
-            executionFilter={
-                'workflowId': flow_id
-            },
-            closeTimeFilter={
-                'oldestDate': one_day_ago,
-            }
-        )
-        for page in response_iterator:
-            for entry in page['executionInfos']:
-                run_id = entry['execution']['runId']
-                flow_history = self._get_markers(flow_id, run_id)
-                workflow_histories.append(flow_history)
-        return workflow_histories
+        return self._marker_index.get_past_runs(flow_id)
 
     def _poll_for_decision(self):
+        if self._incremental_history:
+            return self._poll_for_new_events()
         events = []
         history = None
         paginator = self._client.get_paginator('poll_for_decision_task')
-        poll_args = {
-            'domain': self._domain_name,
-            'taskList': {'name': self._task_list}
-        }
-        if self._identity:
-            poll_args['identity'] = self._identity
-        response_iterator = paginator.paginate(**poll_args)
-        fresh_start = self._run_config.get('fresh_start')
-
+        response_iterator = paginator.paginate(**self._generate_poll_args())
         for page in response_iterator:
             if 'taskToken' not in page:
                 return None
@@ -127,8 +86,62 @@ class General:
             history = page
         history['events'] = events
         workflow_history = WorkflowHistory.parse_from_poll(self._domain_name, history)
-        if fresh_start:
-            return workflow_history
+        self._merge_past_runs(workflow_history)
+        return workflow_history
+
+    def _poll_for_new_events(self):
+        new_events = []
+        history = None
+        snapshot = None
+        paginator = self._client.get_paginator('poll_for_decision_task')
+        poll_args = self._generate_poll_args()
+        poll_args['reverseOrder'] = True
+        response_iterator = paginator.paginate(**poll_args)
+        for page in response_iterator:
+            if 'taskToken' not in page:
+                return None
+            if history is None:
+                history = page
+                snapshot = self._history_cache.get(page['workflowExecution']['runId'])
+            last_event_id = snapshot.last_event_id if snapshot else 0
+            page_events = [x for x in page['events'] if x['eventId'] > last_event_id]
+            new_events.extend(page_events)
+            if len(page_events) < len(page['events']):
+                break
+            if last_event_id and page_events and page_events[-1]['eventId'] == last_event_id + 1:
+                break
+        new_events.reverse()
+        run_id = history['workflowExecution']['runId']
+        logging.info(f'received {len(new_events)} new events for run_id: {run_id}, '
+                     f'previous_started_event_id: {history.get("previousStartedEventId")}, '
+                     f'cached through: {snapshot.last_event_id if snapshot else None}')
+        if snapshot is not None and snapshot.work_history is not None:
+            workflow_history = snapshot.work_history
+            workflow_history.apply_poll(history['taskToken'], new_events)
+            raw_events = snapshot.raw_events
+            raw_events.extend(new_events)
+        else:
+            raw_events = new_events
+            if snapshot is not None:
+                raw_events = snapshot.raw_events + new_events
+            history['events'] = raw_events
+            workflow_history = WorkflowHistory.parse_from_poll(self._domain_name, history)
+            self._merge_past_runs(workflow_history)
+        self._history_cache.put(HistorySnapshot(run_id, raw_events[-1]['eventId'], workflow_history, raw_events))
+        return workflow_history
+
+    def _generate_poll_args(self):
+        poll_args = {
+            'domain': self._domain_name,
+            'taskList': {'name': self._task_list}
+        }
+        if self._identity:
+            poll_args['identity'] = self._identity
+        return poll_args
+
+    def _merge_past_runs(self, workflow_history):
+        if self._run_config.get('fresh_start'):
+            return
         try:
             markers = self._get_past_runs(workflow_history.flow_id)
         except ClientError as e:
@@ -137,7 +150,6 @@ class General:
             raise WorkHistoryRetrievalException(workflow_history)
         for marker_history in markers:
             workflow_history.marker_history.merge_history(marker_history)
-        return workflow_history
 
     def _make_decisions(self, work_history: WorkflowHistory):
         flow_modules = [
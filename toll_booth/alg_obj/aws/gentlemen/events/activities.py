@@ -94,51 +94,41 @@ class ActivityHistory(History):
 
     def _add_operation_event(self, event: Event):
         new_operation_id = event.event_attributes['activityId']
-        if new_operation_id in self.operation_ids:
-            existing_operation = self.get(new_operation_id)
+        existing_operation = self.get(new_operation_id)
+        if existing_operation is not None:
             existing_operation.add_run_id(event.event_id)
+            self._index_run_ids(existing_operation, [event.event_id])
             return
         operation = ActivityOperation.generate_from_schedule_event(event)
-        self._operations.append(operation)
+        self._index_operation(operation)
         return
 
     def _add_execution_event(self, event: Event):
         run_id = event.event_attributes['scheduledEventId']
         execution = ActivityExecution.generate_from_start_event(event)
-        for operation in self._operations:
-            if run_id in operation.run_ids:
-                if event.event_id in operation.event_ids:
-                    return
-                operation.add_execution(execution)
-                return
-        raise RuntimeError('could not find appropriate activity operation for activity execution: %s' % execution)
+        operation = self.get_by_run_id(run_id)
+        if operation is None:
+            raise RuntimeError('could not find appropriate activity operation for activity execution: %s' % execution)
+        operation.add_execution(execution)
 
     def _add_failure_event(self, event: Event):
-        operation_id = event.event_attributes['activityId']
-        for operation in self._operations:
-            if operation.operation_id == operation_id:
-                operation.set_operation_failure(event)
-                return
-        raise RuntimeError('attempted to add a failure event to a non-existent activity operation')
+        operation = self.get(event.event_attributes['activityId'])
+        if operation is None:
+            raise RuntimeError('attempted to add a failure event to a non-existent activity operation')
+        operation.set_operation_failure(event)
 
     def _add_request_cancel_event(self, event: Event):
-        activity_id = event.event_attributes['activityId']
-        for operation in self._operations:
-            if activity_id == operation.operation_id:
-                operation.add_cancel_request(event)
-                return
+        operation = self.get(event.event_attributes['activityId'])
+        if operation is not None:
+            operation.add_cancel_request(event)
 
     def _add_general_event(self, event: Event):
         if event.event_type == 'ActivityTaskCancelRequested':
             return self._add_request_cancel_event(event)
-        operation_run_id = event.event_attributes['scheduledEventId']
-        execution_run_id = event.event_attributes['startedEventId']
-        for operation in self._operations:
-            if operation_run_id in operation.run_ids:
-                for execution in operation.executions:
-                    if execution_run_id == execution.run_id:
-                        if event.event_id in execution.event_ids:
-                            return
-                    execution.add_event(event)
-                return
-        raise RuntimeError('could not find appropriate activity execution for event: %s' % event)
+        operation = self.get_by_run_id(event.event_attributes['scheduledEventId'])
+        if operation is None:
+            raise RuntimeError('could not find appropriate activity execution for event: %s' % event)
+        if not operation.executions:
+            return
+        execution = operation.get_execution(event.event_attributes.get('startedEventId'), operation.executions[0])
+        execution.add_event(event)
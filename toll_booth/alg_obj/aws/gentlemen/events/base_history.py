@@ -10,30 +10,24 @@ class History:
     def __init__(self, steps, operations=None):
         if not operations:
             operations = []
-        self._operations = operations
+        self._operations = []
+        self._operations_by_id = {}
+        self._operations_by_run_id = {}
+        self._event_ids = set()
         self._steps = steps
+        for operation in operations:
+            self._index_operation(operation)
 
     @classmethod
     def generate_from_events(cls, events, steps):
         history = cls(steps)
-        events = [x for x in events if x.event_type in steps['all']]
-        operation_events = [x for x in events if x.event_type == steps['operation_first']]
-        execution_events = [x for x in events if x.event_type == steps['execution_first']]
-        failure_events = [x for x in events if x.event_type == steps['failure']]
-        special_event_ids = []
-        for special_events in [operation_events, execution_events, failure_events]:
-            special_event_ids.extend([x.event_id for x in special_events])
-        generic_events = [x for x in events if x.event_id not in special_event_ids]
-        for operation_event in operation_events:
-            history.add_event(operation_event)
-        for execution_event in execution_events:
-            history.add_event(execution_event)
-        for failure_event in failure_events:
-            history.add_event(failure_event)
-        for generic_event in generic_events:
-            history.add_event(generic_event)
+        history.add_events(events)
         return history
 
+    @classmethod
+    def generate_from_index(cls, event_index, steps):
+        return cls.generate_from_events(event_index.select(steps['all']), steps)
+
     @property
     def operation_ids(self):
         return [x.operation_id for x in self._operations]
@@ -50,7 +44,28 @@ class History:
     def open_operations(self):
         return [x for x in self._operations if not x.is_complete]
 
+    def add_events(self, events):
+        operation_events, execution_events, failure_events, generic_events = [], [], [], []
+        for event in events:
+            event_type = event.event_type
+            if event_type not in self._steps['all'] or event.event_id in self._event_ids:
+                continue
+            if event_type == self._steps['operation_first']:
+                operation_events.append(event)
+            elif event_type == self._steps['execution_first']:
+                execution_events.append(event)
+            elif event_type == self._steps['failure']:
+                failure_events.append(event)
+            else:
+                generic_events.append(event)
+        for grouped_events in [operation_events, execution_events, failure_events, generic_events]:
+            for event in grouped_events:
+                self.add_event(event)
+
     def add_event(self, event):
+        if event.event_id in self._event_ids:
+            return
+        self._event_ids.add(event.event_id)
         event_type = event.event_type
         add_operation_event = getattr(self, '_add_operation_event')
         add_execution_event = getattr(self, '_add_execution_event')
@@ -66,24 +81,37 @@ class History:
 
     def merge_history(self, subtask_history):
         for new_operation in subtask_history.operations:
-            if new_operation.operation_id not in self.operation_ids:
-                self.operations.append(new_operation)
+            operation = self._operations_by_id.get(new_operation.operation_id)
+            if operation is None:
+                self._index_operation(new_operation)
                 continue
-            for operation in self._operations:
-                if new_operation.operation_id == operation.operation_id:
-                    operation.add_run_ids(new_operation.run_ids)
-                    for new_execution in new_operation.executions:
-                        if new_execution.execution_id not in operation.execution_ids:
-                            operation.add_execution(new_execution)
-                            continue
-                        continue
+            operation.add_run_ids(new_operation.run_ids)
+            self._index_run_ids(operation, new_operation.run_ids)
+            for new_execution in new_operation.executions:
+                if not operation.has_execution(new_execution.execution_id):
+                    operation.add_execution(new_execution)
 
     def get_by_id(self, operation_id):
-        return [x for x in self.operations if x.operation_id == operation_id]
+        operation = self._operations_by_id.get(operation_id)
+        if operation is None:
+            return []
+        return [operation]
+
+    def get_by_run_id(self, run_id):
+        return self._operations_by_run_id.get(run_id)
 
     def get_by_name(self, operation_name):
         return [x for x in self.operations if x.operation_name == operation_name]
 
+    def _index_operation(self, operation):
+        self._operations.append(operation)
+        self._operations_by_id.setdefault(operation.operation_id, operation)
+        self._index_run_ids(operation, operation.run_ids)
+
+    def _index_run_ids(self, operation, run_ids):
+        for run_id in run_ids:
+            self._operations_by_run_id.setdefault(run_id, operation)
+
     def get_operation_failed_count(self, operation_id, fail_reason=None):
         failed_count = 0
         operations = self.get_by_id(operation_id)
@@ -111,10 +139,10 @@ class History:
         return item in self._operations
 
     def __getitem__(self, item):
-        for operation in self._operations:
-            if operation.operation_id == item:
-                return operation
-        raise AttributeError('operation named: %s is not present in this history' % item)
+        operation = self._operations_by_id.get(item)
+        if operation is None:
+            raise AttributeError('operation named: %s is not present in this history' % item)
+        return operation
 
     def __iter__(self):
         return iter(self._operations)
@@ -135,6 +163,8 @@ class Operation:
         self._task_args = task_args
         self._events = events
         self._executions = []
+        self._executions_by_id = {}
+        self._executions_by_run_id = {}
         self._steps = steps
         self._operation_failure = None
 
@@ -214,16 +244,26 @@ class Operation:
             event_ids.extend(execution.event_ids)
         return event_ids
 
+    def has_execution(self, execution_id):
+        return execution_id in self._executions_by_id
+
+    def get_execution(self, run_id, default=None):
+        return self._executions_by_run_id.get(run_id, default)
+
     def add_execution(self, execution):
         self._executions.append(execution)
+        self._executions_by_id.setdefault(execution.execution_id, execution)
+        self._executions_by_run_id.setdefault(getattr(execution, 'run_id', None), execution)
 
     def add_run_id(self, run_id):
         self._run_ids.append(run_id)
 
     def add_run_ids(self, run_ids):
+        known_run_ids = set(self._run_ids)
         for run_id in run_ids:
-            if run_id not in self._run_ids:
+            if run_id not in known_run_ids:
                 self._run_ids.append(run_id)
+                known_run_ids.add(run_id)
 
     def set_operation_failure(self, event):
         self._operation_failure = event
@@ -236,6 +276,7 @@ class Execution:
     def __init__(self, execution_id: str, events: [Event], steps):
         self._execution_id = execution_id
         self._events = events
+        self._event_ids = set(x.event_id for x in events)
         self._steps = steps
 
     @property
@@ -244,8 +285,13 @@ class Execution:
 
     @property
     def status(self):
-        time_sorted = sorted(self._events, key=lambda x: x.event_timestamp, reverse=True)
-        return str(time_sorted[0])
+        return str(self.latest_event)
+
+    @property
+    def latest_event(self):
+        if not self._events:
+            return None
+        return max(self._events, key=lambda x: x.event_timestamp)
 
     @property
     def event_ids(self):
@@ -257,13 +303,10 @@ class Execution:
 
     @property
     def results(self):
-        time_sorted = sorted(self._events, key=lambda x: x.event_timestamp, reverse=True)
-        if time_sorted:
-            try:
-                return time_sorted[0].event_attributes['result']
-            except KeyError:
-                return None
-        return None
+        latest_event = self.latest_event
+        if latest_event is None:
+            return None
+        return latest_event.event_attributes.get('result')
 
     @property
     def is_live(self):
@@ -279,7 +322,13 @@ class Execution:
             return self.status
         return None
 
+    def has_event(self, event_id):
+        return event_id in self._event_ids
+
     def add_event(self, event):
+        if event.event_id in self._event_ids:
+            return
+        self._event_ids.add(event.event_id)
         self._events.append(event)
 
     def __str__(self):
@@ -1,3 +1,6 @@
+import heapq
+
+
 class Event:
     def __init__(self, event_id, event_type, event_timestamp, event_attributes):
         self._event_id = event_id
@@ -39,3 +42,50 @@ class Event:
     @property
     def event_attributes(self):
         return self._event_attributes
+
+
+class EventIndex:
+    def __init__(self, events: [Event] = None):
+        self._events = []
+        self._by_id = {}
+        self._by_type = {}
+        if events:
+            self.add_events(events)
+
+    @property
+    def events(self):
+        return self._events
+
+    @property
+    def last_event_id(self):
+        if not self._events:
+            return None
+        return self._events[-1].event_id
+
+    def __contains__(self, event_id):
+        return event_id in self._by_id
+
+    def __len__(self):
+        return len(self._events)
+
+    def get(self, event_id, default=None):
+        return self._by_id.get(event_id, default)
+
+    def add_events(self, events: [Event]):
+        new_events = []
+        for event in events:
+            if event.event_id in self._by_id:
+                continue
+            self._by_id[event.event_id] = event
+            self._by_type.setdefault(event.event_type, []).append(event)
+            self._events.append(event)
+            new_events.append(event)
+        return new_events
+
+    def select(self, event_types):
+        if isinstance(event_types, str):
+            return list(self._by_type.get(event_types, []))
+        selected = [self._by_type[x] for x in set(event_types) if x in self._by_type]
+        if len(selected) == 1:
+            return list(selected[0])
+        return list(heapq.merge(*selected, key=lambda x: x.event_id))
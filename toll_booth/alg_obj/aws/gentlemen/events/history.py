@@ -3,13 +3,14 @@ import os
 
 from toll_booth.alg_obj.aws.gentlemen.events import lambdas, subtasks, activities
 from toll_booth.alg_obj.aws.gentlemen.events.activities import ActivityHistory
-from toll_booth.alg_obj.aws.gentlemen.events.events import Event
+from toll_booth.alg_obj.aws.gentlemen.events.events import Event, EventIndex
 from toll_booth.alg_obj.aws.gentlemen.events.lambdas import LambdaHistory
 from toll_booth.alg_obj.aws.gentlemen.events.markers import MarkerHistory
 from toll_booth.alg_obj.aws.gentlemen.events.signals import WorkflowSignalHistory
 from toll_booth.alg_obj.aws.gentlemen.events.subtasks import SubtaskHistory
 from toll_booth.alg_obj.aws.gentlemen.events.timers import TimerHistory
 from toll_booth.alg_obj.aws.gentlemen.tasks import TaskArguments, Versions, LeechConfig
+from toll_booth.alg_obj.aws.snakes.snakes import StoredData
 from toll_booth.alg_obj.serializers import AlgDecoder
 
 _starting_step = 'WorkflowExecutionStarted'
@@ -21,9 +22,11 @@ class WorkflowHistory:
                  versions: Versions, config: LeechConfig,
                  task_args: TaskArguments, events: [Event], subtask_history: SubtaskHistory, lambda_history: LambdaHistory,
                  activity_history: ActivityHistory, marker_history: MarkerHistory, timer_history: TimerHistory,
-                 signal_history: WorkflowSignalHistory, cancel_signals: [Event] = None):
+                 signal_history: WorkflowSignalHistory, cancel_signals: [Event] = None, event_index: EventIndex = None):
         if not cancel_signals:
             cancel_signals = []
+        if event_index is None:
+            event_index = EventIndex(events)
         self._domain_name = domain_name
         self._flow_type = flow_type
         self._flow_id = flow_id
@@ -43,6 +46,7 @@ class WorkflowHistory:
         self._timer_history = timer_history
         self._signal_history = signal_history
         self._cancel_signals = cancel_signals
+        self._event_index = event_index
 
     @classmethod
     def parse_from_poll(cls, domain_name, poll_response, flow_type=None, task_token=None, flow_id=None, run_id=None):
@@ -58,15 +62,18 @@ class WorkflowHistory:
         raw_events = poll_response['events']
         if not raw_events:
             raise RuntimeError(f'no events were returned from a poll for work history')
-        events = [Event.parse_from_decision_poll_event(x) for x in raw_events]
-        cancel_events = [x for x in events if x.event_type == _request_cancel_step]
-        lambda_history = LambdaHistory.generate_from_events(events, lambdas.steps)
-        subtask_history = SubtaskHistory.generate_from_events(events, subtasks.steps)
-        activity_history = ActivityHistory.generate_from_events(events, activities.steps)
-        marker_history = MarkerHistory.generate_from_events(run_id, events)
-        timer_history = TimerHistory.generate_from_events(events)
-        workflow_signal_history = WorkflowSignalHistory.generate_from_events(run_id, events)
-        task_args, lambda_role, parent_flow_id, parent_run_id, versions, config = cls._generate_workflow_starter_data(flow_type, events)
+        event_index = EventIndex([Event.parse_from_decision_poll_event(x) for x in raw_events])
+        events = event_index.events
+        cancel_events = event_index.select(_request_cancel_step)
+        lambda_history = LambdaHistory.generate_from_index(event_index, lambdas.steps)
+        subtask_history = SubtaskHistory.generate_from_index(event_index, subtasks.steps)
+        activity_history = ActivityHistory.generate_from_index(event_index, activities.steps)
+        marker_history = MarkerHistory.generate_from_events(run_id, event_index.select('MarkerRecorded'))
+        timer_history = TimerHistory.generate_from_events(event_index.select(['TimerStarted', 'TimerFired']))
+        workflow_signal_history = WorkflowSignalHistory.generate_from_events(
+            run_id, event_index.select('WorkflowExecutionSignaled'))
+        task_args, lambda_role, parent_flow_id, parent_run_id, versions, config = cls._generate_workflow_starter_data(
+            flow_type, event_index.select(_starting_step))
         cls_args = {
             'domain_name': domain_name, 'flow_type': flow_type, 'task_token': task_token, 'flow_id': flow_id,
             'versions': versions, 'config': config,
@@ -74,7 +81,7 @@ class WorkflowHistory:
             'lambda_role': lambda_role, 'events': events, 'subtask_history': subtask_history,
             'lambda_history': lambda_history, 'activity_history': activity_history,
             'marker_history': marker_history, 'timer_history': timer_history, 'signal_history': workflow_signal_history,
-            'cancel_signals': cancel_events
+            'cancel_signals': cancel_events, 'event_index': event_index
         }
         return cls(**cls_args)
 
@@ -83,6 +90,7 @@ class WorkflowHistory:
         for event in events:
             if event.event_type == _starting_step:
                 input_string = event.event_attributes.get('input', '{}')
+                StoredData.prefetch(input_string)
                 input_data = json.loads(input_string, cls=AlgDecoder)
                 try:
                     versions = input_data.get('versions', None)
@@ -111,6 +119,14 @@ class WorkflowHistory:
     def events(self):
         return self._events
 
+    @property
+    def event_index(self):
+        return self._event_index
+
+    @property
+    def last_event_id(self):
+        return self._event_index.last_event_id
+
     @property
     def flow_type(self):
         return self._flow_type
@@ -197,8 +213,37 @@ class WorkflowHistory:
             return True
         return False
 
+    def apply_poll(self, task_token, raw_events):
+        self._task_token = task_token
+        self._reset_task_args()
+        return self.merge_page(raw_events)
+
+    def _reset_task_args(self):
+        starter_data = self._generate_workflow_starter_data(self._flow_type, self._event_index.select(_starting_step))
+        if starter_data is not None:
+            self._task_args = starter_data[0]
+
+    def merge_page(self, raw_events):
+        events = [Event.parse_from_decision_poll_event(x) for x in raw_events]
+        return self.add_events(events)
+
+    def add_events(self, events: [Event]):
+        new_events = self._event_index.add_events(events)
+        if self._event_index.events is not self._events:
+            self._events.extend(new_events)
+        self._subtask_history.add_events(new_events)
+        self._lambda_history.add_events(new_events)
+        self._activity_history.add_events(new_events)
+        self._marker_history.add_events(self._run_id, new_events)
+        self._timer_history.add_events(new_events)
+        self._signal_history.add_events(self._run_id, new_events)
+        self._cancel_signals.extend(x for x in new_events if x.event_type == _request_cancel_step)
+        return new_events
+
     def merge_history(self, work_history):
-        self._events.extend(work_history.events)
+        new_events = self._event_index.add_events(work_history.events)
+        if self._event_index.events is not self._events:
+            self._events.extend(new_events)
         self._subtask_history.merge_history(work_history.subtask_history)
         self._lambda_history.merge_history(work_history.lambda_history)
         self._activity_history.merge_history(work_history.activity_history)
@@ -0,0 +1,107 @@
+import gzip
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import boto3
+from botocore.exceptions import ClientError
+
+from toll_booth.alg_obj.serializers import AlgEncoder, AlgDecoder
+
+
+class HistorySnapshot:
+    def __init__(self, run_id, last_event_id, work_history, raw_events):
+        self._run_id = run_id
+        self._last_event_id = last_event_id
+        self._work_history = work_history
+        self._raw_events = raw_events
+
+    @property
+    def run_id(self):
+        return self._run_id
+
+    @property
+    def last_event_id(self):
+        return self._last_event_id
+
+    @property
+    def work_history(self):
+        return self._work_history
+
+    @property
+    def raw_events(self):
+        return self._raw_events
+
+
+class HistoryCache:
+    _snapshots = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, **kwargs):
+        cache_size = kwargs.get('history_cache_size', int(os.getenv('HISTORY_CACHE_SIZE', 64)))
+        table_name = kwargs.get('history_cache_table', os.getenv('HISTORY_CACHE_TABLE'))
+        snapshot_ttl = kwargs.get('history_cache_ttl', int(os.getenv('HISTORY_CACHE_TTL', 86400)))
+        max_snapshot_bytes = kwargs.get(
+            'max_snapshot_bytes', int(os.getenv('HISTORY_CACHE_MAX_SNAPSHOT_BYTES', 350000)))
+        self._cache_size = cache_size
+        self._table_name = table_name
+        self._snapshot_ttl = snapshot_ttl
+        self._max_snapshot_bytes = max_snapshot_bytes
+        self._table = kwargs.get('table')
+        if self._table is None and table_name:
+            self._table = boto3.resource('dynamodb').Table(table_name)
+
+    @classmethod
+    def clear(cls):
+        with cls._cache_lock:
+            cls._snapshots.clear()
+
+    def get(self, run_id):
+        with self._cache_lock:
+            snapshot = self._snapshots.get(run_id)
+            if snapshot is not None:
+                self._snapshots.move_to_end(run_id)
+                return snapshot
+        return self._get_stored_snapshot(run_id)
+
+    def put(self, snapshot: HistorySnapshot):
+        with self._cache_lock:
+            self._snapshots[snapshot.run_id] = snapshot
+            self._snapshots.move_to_end(snapshot.run_id)
+            while len(self._snapshots) > self._cache_size:
+                self._snapshots.popitem(last=False)
+        self._store_snapshot(snapshot)
+
+    def _get_stored_snapshot(self, run_id):
+        if self._table is None:
+            return None
+        try:
+            item = self._table.get_item(Key={'run_id': run_id}).get('Item')
+        except ClientError as e:
+            logging.warning(f'could not retrieve the history snapshot for run_id: {run_id}, {e}')
+            return None
+        if item is None:
+            return None
+        raw_events = json.loads(gzip.decompress(item['raw_events'].value), cls=AlgDecoder)
+        return HistorySnapshot(run_id, int(item['last_event_id']), None, raw_events)
+
+    def _store_snapshot(self, snapshot: HistorySnapshot):
+        if self._table is None:
+            return
+        compressed = gzip.compress(json.dumps(snapshot.raw_events, cls=AlgEncoder).encode('utf-8'))
+        if len(compressed) > self._max_snapshot_bytes:
+            logging.info(f'history snapshot for run_id: {snapshot.run_id} is {len(compressed)} bytes, '
+                         f'too large to store, keeping it in the local cache only')
+            return
+        try:
+            self._table.put_item(Item={
+                'run_id': snapshot.run_id,
+                'last_event_id': snapshot.last_event_id,
+                'raw_events': compressed,
+                'expires_at': int(datetime.utcnow().timestamp() + self._snapshot_ttl)
+            })
+        except ClientError as e:
+            logging.warning(f'could not store the history snapshot for run_id: {snapshot.run_id}, {e}')
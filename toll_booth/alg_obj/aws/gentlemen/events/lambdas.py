@@ -82,42 +82,33 @@ class LambdaHistory(History):
 
     def _add_operation_event(self, event: Event):
         new_operation_id = event.event_attributes['id']
-        if new_operation_id in self.operation_ids:
-            existing_operation = self.get(new_operation_id)
+        existing_operation = self.get(new_operation_id)
+        if existing_operation is not None:
             existing_operation.add_run_id(event.event_id)
+            self._index_run_ids(existing_operation, [event.event_id])
             return
         lambda_operation = LambdaOperation.generate_from_schedule_event(event)
-        self._operations.append(lambda_operation)
+        self._index_operation(lambda_operation)
         return
 
     def _add_execution_event(self, event: Event):
         run_id = event.event_attributes['scheduledEventId']
         lambda_execution = LambdaExecution.generate_from_start_event(event)
-        for operation in self._operations:
-            if run_id in operation.run_ids:
-                if event.event_id in operation.event_ids:
-                    return
-                operation.add_execution(lambda_execution)
-                return
-        raise RuntimeError('could not find appropriate lambda operation for lambda execution: %s' % lambda_execution)
+        operation = self.get_by_run_id(run_id)
+        if operation is None:
+            raise RuntimeError('could not find appropriate lambda operation for lambda execution: %s' % lambda_execution)
+        operation.add_execution(lambda_execution)
 
     def _add_failure_event(self, event: Event):
-        operation_id = event.event_attributes['id']
-        for operation in self._operations:
-            if operation.operation_id == operation_id:
-                operation.set_operation_failure(event)
-                return
-        raise RuntimeError('attempted to add a failure event to a non-existent lambda operation')
+        operation = self.get(event.event_attributes['id'])
+        if operation is None:
+            raise RuntimeError('attempted to add a failure event to a non-existent lambda operation')
+        operation.set_operation_failure(event)
 
     def _add_general_event(self, event: Event):
         operation_run_id = event.event_attributes['scheduledEventId']
-        execution_run_id = event.event_attributes['startedEventId']
-        for operation in self._operations:
-            if operation_run_id in operation.run_ids:
-                for execution in operation.executions:
-                    if execution_run_id == execution.run_id:
-                        if event.event_id in execution.event_ids:
-                            return
-                    execution.add_event(event)
-                    return
-        raise RuntimeError('could not find appropriate lambda execution for event: %s' % event)
+        operation = self.get_by_run_id(operation_run_id)
+        if operation is None or not operation.executions:
+            raise RuntimeError('could not find appropriate lambda execution for event: %s' % event)
+        execution = operation.get_execution(operation_run_id, operation.executions[0])
+        execution.add_event(event)
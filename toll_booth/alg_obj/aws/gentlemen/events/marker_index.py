@@ -0,0 +1,100 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import boto3
+from botocore.client import Config
+from retrying import retry
+
+from toll_booth.alg_obj.aws.gentlemen.events.events import Event
+from toll_booth.alg_obj.aws.gentlemen.events.markers import MarkerHistory
+
+
+class MarkerIndex:
+    _closed_runs = OrderedDict()
+    _cache_lock = threading.Lock()
+
+    def __init__(self, domain_name, **kwargs):
+        max_workers = kwargs.get('max_workers', int(os.getenv('MARKER_INDEX_WORKERS', 8)))
+        cache_size = kwargs.get('cache_size', int(os.getenv('MARKER_INDEX_CACHE_SIZE', 1024)))
+        first_marker_only = kwargs.get(
+            'first_marker_only', os.getenv('MARKER_INDEX_FIRST_MARKER_ONLY', 'false').lower() == 'true')
+        client = kwargs.get('client')
+        if client is None:
+            client = boto3.client('swf', config=Config(retries={'max_attempts': 5}))
+        self._domain_name = domain_name
+        self._max_workers = max_workers
+        self._cache_size = cache_size
+        self._first_marker_only = first_marker_only
+        self._client = client
+
+    @classmethod
+    def clear_cache(cls):
+        with cls._cache_lock:
+            cls._closed_runs.clear()
+
+    def get_past_runs(self, flow_id, lookback_days=2):
+        oldest_date = datetime.utcnow() - timedelta(days=lookback_days)
+        run_ids = self._list_closed_runs(flow_id, oldest_date)
+        if not run_ids:
+            return []
+        worker_count = min(self._max_workers, len(run_ids))
+        with ThreadPoolExecutor(max_workers=worker_count) as executor:
+            return list(executor.map(lambda x: self.get_run_markers(flow_id, x), run_ids))
+
+    def get_run_markers(self, flow_id, run_id):
+        cache_key = (self._domain_name, flow_id, run_id)
+        with self._cache_lock:
+            cached = self._closed_runs.get(cache_key)
+            if cached is not None:
+                self._closed_runs.move_to_end(cache_key)
+                return cached
+        marker_history = self._read_markers(flow_id, run_id)
+        with self._cache_lock:
+            self._closed_runs[cache_key] = marker_history
+            while len(self._closed_runs) > self._cache_size:
+                self._closed_runs.popitem(last=False)
+        return marker_history
+
+    def _list_closed_runs(self, flow_id, oldest_date):
+        run_ids = []
+        paginator = self._client.get_paginator('list_closed_workflow_executions')
+        response_iterator = paginator.paginate(
+            domain=self._domain_name,
+            executionFilter={
+                'workflowId': flow_id
+            },
+            closeTimeFilter={
+                'oldestDate': oldest_date,
+            }
+        )
+        for page in response_iterator:
+            for entry in page['executionInfos']:
+                run_ids.append(entry['execution']['runId'])
+        return run_ids
+
+    @retry(wait_exponential_multiplier=1000, wait_exponential_max=10000, stop_max_delay=10000)
+    def _read_markers(self, flow_id, run_id):
+        marker_events = []
+        paginator = self._client.get_paginator('get_workflow_execution_history')
+        response_iterator = paginator.paginate(
+            domain=self._domain_name,
+            execution={
+                'workflowId': flow_id,
+                'runId': run_id
+            },
+            reverseOrder=True
+        )
+        for page in response_iterator:
+            page_markers = [x for x in page['events'] if x['eventType'] == 'MarkerRecorded']
+            marker_events.extend(page_markers)
+            if marker_events and self._first_marker_only:
+                logging.debug(f'found the most recent marker for run {run_id}, stopping the history read early')
+                marker_events = marker_events[:1]
+                break
+        marker_events.reverse()
+        events = [Event.parse_from_decision_poll_event(x) for x in marker_events]
+        return MarkerHistory.generate_from_events(run_id, events)
@@ -38,17 +38,23 @@ class MarkerHistory:
     def __init__(self, markers: [Marker] = None):
         if not markers:
             markers = []
-        self._markers = markers
+        self._markers = []
+        self._markers_by_type = {}
+        self._marker_ids = set()
+        for marker in markers:
+            self.add_marker(marker)
 
     @classmethod
     def generate_from_events(cls, run_id, events):
         history = MarkerHistory()
-        events = [x for x in events if x.event_type == 'MarkerRecorded']
-        for event in events:
-            marker = Marker.parse_from_event(run_id, event)
-            history.add_marker(marker)
+        history.add_events(run_id, events)
         return history
 
+    def add_events(self, run_id, events):
+        for event in events:
+            if event.event_type == 'MarkerRecorded':
+                self.add_marker(Marker.parse_from_event(run_id, event))
+
     @property
     def markers(self):
         return self._markers
@@ -109,20 +115,21 @@ class MarkerHistory:
         return idlers
 
     def add_marker(self, marker: Marker):
+        if id(marker) in self._marker_ids:
+            return
+        self._marker_ids.add(id(marker))
         self._markers.append(marker)
+        self._markers_by_type.setdefault(marker.marker_type, []).append(marker)
 
     def get_markers_by_type(self, marker_type):
-        return [x for x in self._markers if x.marker_type == marker_type]
+        return list(self._markers_by_type.get(marker_type, []))
 
     def merge_history(self, marker_history):
         for new_marker in marker_history.markers:
-            if new_marker not in self._markers:
-                self._markers.append(new_marker)
+            self.add_marker(new_marker)
 
     def __contains__(self, item):
-        if self.get_markers_by_type(item):
-            return True
-        return False
+        return bool(self._markers_by_type.get(item))
 
     def __iter__(self):
         return iter(self._markers)
@@ -59,12 +59,14 @@ class WorkflowSignalHistory:
     @classmethod
     def generate_from_events(cls, run_id, events):
         history = WorkflowSignalHistory()
-        signal_events = [x for x in events if x.event_type == 'WorkflowExecutionSignaled']
-        for event in signal_events:
-            workflow_signal = WorkflowSignal.parse_from_event(run_id, event)
-            history.add_workflow_signal(workflow_signal)
+        history.add_events(run_id, events)
         return history
 
+    def add_events(self, run_id, events):
+        for event in events:
+            if event.event_type == 'WorkflowExecutionSignaled':
+                self.add_workflow_signal(WorkflowSignal.parse_from_event(run_id, event))
+
     @property
     def signals(self):
         return self._signals
@@ -105,41 +105,32 @@ class SubtaskHistory(History):
         super().__init__(provided_steps, operations)
 
     def _add_operation_event(self, event: Event):
-        if event.event_attributes['workflowId'] in self.operation_ids:
+        if self.get(event.event_attributes['workflowId']) is not None:
             return
         subtask_operation = SubtaskOperation.generate_from_schedule_event(event)
-        self._operations.append(subtask_operation)
+        self._index_operation(subtask_operation)
         return
 
     def _add_execution_event(self, event: Event):
         subtask_execution = SubtaskExecution.generate_from_start_event(event)
-        operation_flow_id = subtask_execution.execution_id
-        for operation in self._operations:
-            if operation_flow_id == operation.operation_id:
-                if event.event_id in operation.event_ids:
-                    return
-                operation.add_execution(subtask_execution)
-                return
-        raise RuntimeError('could not find appropriate subtask operation for subtask execution: %s' % subtask_execution)
+        operation = self.get(subtask_execution.execution_id)
+        if operation is None:
+            raise RuntimeError(
+                'could not find appropriate subtask operation for subtask execution: %s' % subtask_execution)
+        operation.add_execution(subtask_execution)
 
     def _add_failure_event(self, event: Event):
-        operation_id = event.event_attributes['workflowId']
-        for operation in self._operations:
-            if operation.operation_id == operation_id:
-                operation.set_operation_failure(event)
-                return
-        raise RuntimeError('attempted to add a failure event to a non-existent subtask operation')
+        operation = self.get(event.event_attributes['workflowId'])
+        if operation is None:
+            raise RuntimeError('attempted to add a failure event to a non-existent subtask operation')
+        operation.set_operation_failure(event)
 
     def _add_general_event(self, event: Event):
         execution_details = event.event_attributes['workflowExecution']
-        event_flow_id = execution_details['workflowId']
-        operation_run_id = event.event_attributes['initiatedEventId']
-        for operation in self._operations:
-            if event_flow_id == operation.operation_id:
-                for execution in operation.executions:
-                    if operation_run_id == execution.run_id:
-                        if event.event_id in execution.event_ids:
-                            return
-                    execution.add_event(event)
-                return
-        raise RuntimeError('could not find appropriate subtask execution for event: %s' % event)
+        operation = self.get(execution_details['workflowId'])
+        if operation is None:
+            raise RuntimeError('could not find appropriate subtask execution for event: %s' % event)
+        if not operation.executions:
+            return
+        execution = operation.get_execution(execution_details.get('runId'), operation.executions[0])
+        execution.add_event(event)
@@ -50,7 +50,10 @@ class TimerHistory:
     def __init__(self, timers: [Timer] = None):
         if not timers:
             timers = []
-        self._timers = timers
+        self._timers = []
+        self._timers_by_id = {}
+        for timer in timers:
+            self.add_timer(timer)
 
     @property
     def timers(self):
@@ -71,34 +74,37 @@ class TimerHistory:
     @classmethod
     def generate_from_events(cls, events: [Event]):
         history = TimerHistory()
-        start_events = [x for x in events if x.event_type == 'TimerStarted']
-        fire_events = [x for x in events if x.event_type == 'TimerFired']
-        for event in start_events:
-            timer = Timer.parse_from_events(event)
-            history.add_timer(timer)
+        history.add_events(events)
+        return history
+
+    def add_events(self, events: [Event]):
+        fire_events = []
+        for event in events:
+            if event.event_type == 'TimerStarted':
+                self.add_timer(Timer.parse_from_events(event))
+            elif event.event_type == 'TimerFired':
+                fire_events.append(event)
         for event in fire_events:
             timer_id = event.event_attributes['timerId']
-            history[timer_id].set_timer_fired(event)
-        return history
+            self[timer_id].set_timer_fired(event)
 
     def __getitem__(self, item):
-        for timer in self._timers:
-            if timer.timer_id == item:
-                return timer
-        raise KeyError(item)
+        return self._timers_by_id[item]
 
     def __contains__(self, item):
-        return item in self.timer_ids
+        return item in self._timers_by_id
 
     def __iter__(self):
         return iter(self._timers)
 
     def merge_history(self, new_history):
         for timer in new_history.timers:
-            self.add_timer(timer)
+            if timer.timer_id not in self._timers_by_id:
+                self.add_timer(timer)
 
     def add_timer(self, timer: Timer):
         self._timers.append(timer)
+        self._timers_by_id.setdefault(timer.timer_id, timer)
 
     def fn_back_off_status(self, fn_identifier):
         backed_off = self.backed_off
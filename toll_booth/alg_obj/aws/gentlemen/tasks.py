@@ -193,6 +193,7 @@ class TaskArguments(AlgObject):
 
     @classmethod
     def from_schedule_event(cls, event: Event):
+        StoredData.prefetch(event.event_attributes['input'])
         event_input = json.loads(event.event_attributes['input'], cls=AlgDecoder)
         return cls(event_input)
 
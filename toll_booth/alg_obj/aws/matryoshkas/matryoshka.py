@@ -1,14 +1,10 @@
+import heapq
 import json
 import logging
-import threading
-from collections import deque
 from queue import Queue
 
-import boto3
-from botocore.config import Config
-
-from toll_booth.alg_obj.serializers import AlgEncoder, AlgDecoder
 from toll_booth.alg_obj import AlgObject
+from toll_booth.alg_obj.aws.couriers.courier import LambdaCourier
 
 
 class Matryoshka(AlgObject):
@@ -20,8 +16,8 @@ class Matryoshka(AlgObject):
         self._task_name = task_name
         self._lambda_arn = lambda_arn
         self._work = Queue()
-        self._results = deque()
         self._task_args = {}
+        self._child_stats = []
 
         try:
             for plan_id, plan_entry in self._m_plan.items():
@@ -60,35 +56,14 @@ class Matryoshka(AlgObject):
         return cls(*matryoshka_cluster.seed_args)
 
     def _unpack(self):
-        thread_count = self._m_concurrency
-        threads = []
-        for worker in range(thread_count):
-            t = threading.Thread(target=self.__unpack)
-            t.start()
-            threads.append(t)
-        self._work.join()
-        for _ in range(thread_count):
-            self._work.put(None)
-        for t in threads:
-            t.join()
-        return {x['child_position']: x['result'] for x in self._results}
-
-    def __unpack(self):
-        session = boto3.session.Session()
-        client = session.client('lambda', config=Config(
-            connect_timeout=315, read_timeout=315, max_pool_connections=25, retries={'max_attempts': 2}))
-        function_arn = self._lambda_arn
-        while True:
+        pending = []
+        while not self._work.empty():
             plan = self._work.get()
-            if plan is None:
-                return
-            plan_id = plan['plan_id']
-            m_plan = plan['m_plan']
             payload = {
                 'single': 1,
                 'task_name': 'unpack_matryoshka',
                 'task_args': {
-                    'm_plan': m_plan,
+                    'm_plan': plan['m_plan'],
                     'm_concurrency': self._m_concurrency,
                     'task_name': self._task_name,
                     'lambda_arn': self._lambda_arn
@@ -97,55 +72,49 @@ class Matryoshka(AlgObject):
                 'worker_args': self._worker_args
             }
             logging.info('firing lambda request while unpacking')
-            response = client.invoke(
-                FunctionName=function_arn,
-                InvocationType='RequestResponse',
-                Payload=json.dumps(payload, cls=AlgEncoder)
-            )
-            raw_results = json.loads(response['Payload'].read())
-            if 'errorMessage' in raw_results:
-                if 'stackTrace' in raw_results:
-                    stack_trace = raw_results['stackTrace']
-                    logging.warning(stack_trace)
-                    result = (raw_results['errorType'] + '  ' + raw_results['errorMessage'] + ' ' + '%s' % payload)
-                else:
-                    result = raw_results['errorMessage']
-            else:
-                result = json.loads(raw_results, cls=AlgDecoder)
-            self._results.append({'child_position': plan_id, 'result': result})
-            self._work.task_done()
+            pending.append((plan['plan_id'], payload, self._courier.submit_timed(self._lambda_arn, payload)))
+        return {x: self._collect_child(x, y, z) for x, y, z in pending}
 
     def _spin(self):
-        task_args = self._task_args
-        results = []
-        for task_arg in task_args:
-            task_name = self._task_name
-            task_constants = self._task_constants
-            worker_args = self._worker_args
-            function_arn = self._lambda_arn
-            task_arg.update(task_constants)
-            session = boto3.session.Session()
-            client = session.client('lambda', config=Config(
-                connect_timeout=315, read_timeout=315, max_pool_connections=25, retries={'max_attempts': 2}))
+        pending = []
+        for child_position, task_arg in enumerate(self._task_args):
+            task_arg.update(self._task_constants)
             event = {
                 'single': 1,
-                'task_name': task_name,
+                'task_name': self._task_name,
                 'task_args': task_arg,
-                'worker_args': worker_args}
-            response = client.invoke(
-                FunctionName=function_arn,
-                InvocationType='RequestResponse',
-                Payload=json.dumps(event, cls=AlgEncoder)
-            )
-            raw_results = json.loads(response['Payload'].read())
-            if 'errorMessage' in raw_results:
-                stack_trace = raw_results['stackTrace']
-                logging.warning(stack_trace)
-                result = (raw_results['errorType'] + '  ' + raw_results['errorMessage'] + ' ' + '%s' % event)
-            else:
-                result = json.loads(raw_results, cls=AlgDecoder)
-            results.append(result)
-        return results
+                'worker_args': self._worker_args}
+            pending.append((child_position, event, self._courier.submit_timed(self._lambda_arn, event)))
+        return [self._collect_child(x, y, z) for x, y, z in pending]
+
+    @property
+    def _courier(self):
+        return LambdaCourier.get_courier(max_in_flight=self._m_concurrency)
+
+    @property
+    def child_stats(self):
+        return self._child_stats
+
+    def _collect_child(self, child_position, payload, pending_invocation):
+        result, latency, error = pending_invocation.result()
+        self._child_stats.append({
+            'child_position': child_position,
+            'latency': latency,
+            'error': error.function_error if error else None
+        })
+        if error:
+            return self._format_child_error(error, payload)
+        return result
+
+    @classmethod
+    def _format_child_error(cls, invocation_exception, payload):
+        try:
+            raw_results = json.loads(invocation_exception.details)
+        except (TypeError, ValueError):
+            return f'{invocation_exception} {payload}'
+        if 'stackTrace' in raw_results:
+            logging.warning(raw_results['stackTrace'])
+        return f"{raw_results.get('errorType', '')}  {raw_results.get('errorMessage', '')} {payload}"
 
     @property
     def completed_results(self):
@@ -193,11 +162,9 @@ class MatryoshkaCluster:
         root = MatryoshkaBranch()
         while root.current_concurrency < desired_concurrency:
             root.add_branch(num_branch_levels, max_m_concurrency)
-        for task_arg in task_args:
-            root.distribute_work(task_arg)
+        root.distribute_all_work(task_args)
         if task_args:
-            while root.current_concurrency > len(task_args):
-                root.prune()
+            root.prune()
         return cls(root.children, task_name, lambda_arn, max_m_concurrency, task_constants, worker_args)
 
     @property
@@ -214,17 +181,21 @@ class MatryoshkaCluster:
 
 
 class MatryoshkaBranch:
-    def __init__(self, parent_branch_level=None, children=None, task_args=None):
+    def __init__(self, parent_branch_level=None, children=None, task_args=None, parent=None):
         if children and task_args:
             raise NotImplementedError('current implementation only allows terminal branches to host flowers')
         self._parent_branch_level = parent_branch_level
-        self._children = {}
+        self._parent = parent
         if not children:
             children = {}
         if not task_args:
             task_args = []
         self._children = children
         self._task_args = task_args
+        self._concurrency = 0
+        self._task_load = 0
+        self._task_heap = None
+        self._recalculate()
 
     def __len__(self):
         return self.current_concurrency
@@ -265,13 +236,13 @@ class MatryoshkaBranch:
 
     @property
     def current_concurrency(self):
-        workload = 0
-        for child_id, child in self._children.items():
-            if not child.is_working_branch:
-                workload += child.current_concurrency
-            else:
-                workload += 1
-        return workload
+        return self._concurrency
+
+    @property
+    def working_load(self):
+        if self.is_working_branch:
+            return 1
+        return self._concurrency
 
     @property
     def children(self):
@@ -284,15 +255,7 @@ class MatryoshkaBranch:
 
     @property
     def current_task_load(self):
-        workload = 0
-        for child_id, child in self._children.items():
-            if not child.is_working_branch:
-                workload += child.current_task_load
-            else:
-                workload += child.num_task_args
-        if self.is_working_branch:
-            return self.num_task_args
-        return workload
+        return self._task_load
 
     def add_branch(self, branch_levels, max_branches_per_level):
         if self.branch_level > branch_levels:
@@ -302,26 +265,66 @@ class MatryoshkaBranch:
             success = self._children[least_concurrent_child_id].add_branch(branch_levels, max_branches_per_level)
             return success
         child_id = len(self._children)
-        self._children[child_id] = MatryoshkaBranch(self.branch_level)
+        self._task_heap = None
+        was_working_branch = self.is_working_branch
+        self._children[child_id] = MatryoshkaBranch(self.branch_level, parent=self)
+        self._concurrency += 1
+        if not was_working_branch:
+            self._propagate(1, 0)
         return True
 
     def distribute_work(self, work_args):
-        task_load = {}
-        if self.is_working_branch:
-            self._task_args.append(work_args)
-            return True
-        for child_id, child in self._children.items():
-            task_load[child_id] = child.current_task_load
-        least_tasked_child_id = min(task_load, key=task_load.get)
-        success = self._children[least_tasked_child_id].distribute_work(work_args)
-        return success
+        branch = self
+        while not branch.is_working_branch:
+            branch = branch._pop_least_tasked_child()
+        branch._add_task_arg(work_args)
+        return True
+
+    def distribute_all_work(self, task_args):
+        for task_arg in task_args:
+            self.distribute_work(task_arg)
 
     def prune(self):
-        empty_branches = []
-        for child_id, child in self._children.items():
-            if child.prune():
-                empty_branches.append(child_id)
-        if self.is_working_branch and not self.num_task_args:
-            return True
-        for empty_id in empty_branches:
-            self._children.pop(empty_id, None)
+        visited = set()
+        pending = [self]
+        while pending:
+            branch = pending[-1]
+            if id(branch) not in visited and not branch.is_working_branch:
+                visited.add(id(branch))
+                pending.extend(branch._children.values())
+                continue
+            pending.pop()
+            empty_children = [x for x, y in branch._children.items() if y.is_working_branch and not y.num_task_args]
+            for empty_id in empty_children:
+                branch._children.pop(empty_id)
+            branch._recalculate()
+        return self.is_working_branch and not self.num_task_args
+
+    def _pop_least_tasked_child(self):
+        if self._task_heap is None:
+            self._task_heap = [(x.current_task_load, y, x) for y, x in enumerate(self._children.values())]
+            heapq.heapify(self._task_heap)
+        task_load, position, child = self._task_heap[0]
+        heapq.heapreplace(self._task_heap, (task_load + 1, position, child))
+        return child
+
+    def _add_task_arg(self, work_args):
+        self._task_args.append(work_args)
+        self._task_load += 1
+        self._propagate(0, 1)
+
+    def _propagate(self, concurrency_change, task_load_change):
+        parent = self._parent
+        while parent is not None:
+            parent._concurrency += concurrency_change
+            parent._task_load += task_load_change
+            parent = parent._parent
+
+    def _recalculate(self):
+        self._task_heap = None
+        if self.is_working_branch:
+            self._concurrency = 0
+            self._task_load = self.num_task_args
+            return
+        self._concurrency = sum(x.working_load for x in self._children.values())
+        self._task_load = sum(x.current_task_load for x in self._children.values())
@@ -1,10 +1,10 @@
 import json
 import logging
 import os
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from multiprocessing.pool import ThreadPool
-from queue import Queue
-from threading import Thread
 
 import boto3
 from botocore.config import Config
@@ -12,6 +12,8 @@ from botocore.exceptions import ClientError
 from retrying import retry
 
 from toll_booth.alg_obj import AlgObject
+from toll_booth.alg_obj.aws.couriers.courier import LambdaCourier, LambdaInvocationException
+from toll_booth.alg_obj.aws.snakes.snakes import StoredData
 from toll_booth.alg_obj.serializers import AlgEncoder, AlgDecoder
 
 
@@ -255,11 +257,19 @@ class Ruffian:
         self._config = config
         self._warn_level = warn_level
         self._context = context
-        self._pending_tasks = {}
         self._connections = []
         self._run_config = run_config
         self._ruffian_config = ruffian_config
         self._last_heartbeat = datetime.utcnow()
+        self._number_threads = ruffian_config.get('number_threads', 1)
+        self._number_pollers = ruffian_config.get(
+            'number_pollers', min(self._number_threads, int(os.getenv('RUFFIAN_POLLERS', 2))))
+        self._poll_backoff = ruffian_config.get('poll_backoff', float(os.getenv('RUFFIAN_POLL_BACKOFF', 1)))
+        self._max_poll_backoff = ruffian_config.get(
+            'max_poll_backoff', float(os.getenv('RUFFIAN_MAX_POLL_BACKOFF', 30)))
+        self._swf_client = None
+        self._client_lock = threading.Lock()
+        self._draining = threading.Event()
 
     @classmethod
     def build(cls, context, domain_name, flow_name, work_list, config, **kwargs):
@@ -271,6 +281,16 @@ class Ruffian:
         return cls(domain_name, flow_name, work_list, config, warn_level, context,
                    run_config=run_config, ruffian_config=ruffian_config, overseer_token=overseer_token)
 
+    @property
+    def swf_client(self):
+        if self._swf_client is None:
+            with self._client_lock:
+                if self._swf_client is None:
+                    self._swf_client = boto3.client('swf', config=Config(
+                        connect_timeout=70, read_timeout=70, retries={'max_attempts': 2},
+                        max_pool_connections=self._number_threads + self._number_pollers + 2))
+        return self._swf_client
+
     @property
     def persist_heartbeat(self):
         return (datetime.utcnow() - self._last_heartbeat).seconds > 300
@@ -281,8 +301,7 @@ class Ruffian:
         return time_remaining
 
     def _send_not_dead_yet(self):
-        client = boto3.client('swf')
-        response = client.record_activity_task_heartbeat(
+        response = self.swf_client.record_activity_task_heartbeat(
             taskToken=self._overseer_token
         )
         self._last_heartbeat = datetime.utcnow()
@@ -347,6 +366,7 @@ class Ruffian:
                         task_token = poll_response.get('taskToken')
                         if task_token is None:
                             continue
+                        StoredData.prefetch(poll_response['input'])
                         input_values = json.loads(poll_response['input'], cls=AlgDecoder)
                         logging.info(f'decoded input_values for the overseer are: {input_values}')
                         task_args = input_values['task_args']
@@ -415,72 +435,71 @@ class Ruffian:
     def labor(self):
         logging.info(
             f'starting up a ruffian as a worker for task_list: {self._work_list}, for domain_name: {self._domain_name}, with warn_level: {self._warn_level}')
-        threads = []
-        queue = Queue()
-        labor_args = {
-            'list_name': self._work_list,
-            'queue': queue
-        }
-        labor_components = [self._dispatch_tasks]
-        for component in labor_components:
-            component_thread = Thread(target=component, kwargs=labor_args)
-            component_thread.start()
-            threads.append(component_thread)
-        time_remaining = self._check_watch()
-        keep_working = True
-        while time_remaining >= self._warn_level and keep_working:
-            if len(self._pending_tasks) <= self._ruffian_config['number_threads']:
-                poll_results = self._poll_for_tasks()
-                if 'taskToken' in poll_results:
-                    queue.put({'task_type': 'new_task', 'poll_response': poll_results})
-            time_remaining = self._check_watch()
-            # keep_working = self._send_ndy()
-        logging.info(f'time is up, preparing to quit')
-        queue.put(None)
-        for thread in threads:
-            thread.join()
+        self._draining.clear()
+        open_slots = threading.BoundedSemaphore(self._number_threads)
+        with ThreadPoolExecutor(max_workers=self._number_threads) as executor:
+            pollers = []
+            for poller_number in range(self._number_pollers):
+                poller = threading.Thread(target=self._poll_and_dispatch, args=(executor, open_slots))
+                poller.start()
+                pollers.append(poller)
+            while not self._draining.wait(1):
+                if self._check_watch() < self._warn_level:
+                    logging.info(f'time is up, draining the ruffian for task_list: {self._work_list}')
+                    self._draining.set()
+            for poller in pollers:
+                poller.join()
+        logging.info(f'all tasks drained, preparing to quit')
         self._send_ndy()
-        return {'keep_working': keep_working}
+        return {'keep_working': True}
+
+    def _poll_and_dispatch(self, executor, open_slots):
+        failed_polls = 0
+        while not self._draining.is_set():
+            if not open_slots.acquire(timeout=1):
+                continue
+            try:
+                poll_response = self._poll_for_tasks()
+            except Exception as e:
+                open_slots.release()
+                failed_polls += 1
+                backoff = self._generate_poll_backoff(failed_polls)
+                logging.error(f'error polling for tasks on list {self._work_list}: {e}, '
+                              f'waiting {backoff:.2f} seconds before polling again')
+                self._draining.wait(backoff)
+                continue
+            failed_polls = 0
+            if 'taskToken' not in poll_response:
+                open_slots.release()
+                continue
+            logging.info(f'received orders to dispatch a task: {poll_response["taskToken"]}')
+            pending = executor.submit(self._run_task, poll_response=poll_response)
+            pending.add_done_callback(lambda x: self._close_task(x, open_slots))
+
+    def _generate_poll_backoff(self, failed_polls):
+        ceiling = min(self._max_poll_backoff, self._poll_backoff * 2 ** min(failed_polls - 1, 16))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _close_task(self, pending, open_slots):
+        open_slots.release()
+        task_exception = pending.exception()
+        if task_exception:
+            logging.error(f'task thread for list {self._work_list} failed: {task_exception}')
 
     def _poll_for_tasks(self, list_name=None):
-        from toll_booth.alg_obj.aws.gentlemen.labor import Laborer
         domain_name = self._domain_name
         if not list_name:
             list_name = self._work_list
-        laborer = Laborer(domain_name, list_name)
-        poll_response = laborer.poll_for_tasks()
+        poll_response = self.swf_client.poll_for_activity_task(
+            domain=domain_name,
+            taskList={'name': list_name}
+        )
         logging.info(f'received a response from polling {domain_name} for task_list: {list_name}, {poll_response}')
         return poll_response
 
-    def _dispatch_tasks(self, **kwargs):
-        queue = kwargs['queue']
-        pool = ThreadPool()
-        while True:
-            new_task = queue.get()
-            if new_task is None:
-                return
-            task_type = new_task['task_type']
-            if task_type == 'new_task':
-                logging.info(f'received orders to dispatch a task: {new_task}')
-                poll_response = new_task['poll_response']
-                task_token = poll_response['taskToken']
-                task_args = {
-                    'queue': queue,
-                    'poll_response': poll_response
-                }
-                pending = pool.apply_async(self._run_task, kwds=task_args)
-                self._pending_tasks[task_token] = pending
-                logging.info(f'started the task in a thread, total pending tasks: {len(self._pending_tasks)}')
-            if task_type == 'close_task':
-                logging.info(f'received orders to close a task thread: {new_task}')
-                task_token = new_task['task_token']
-                # self._pending_tasks[task_token].join()
-                del (self._pending_tasks[task_token])
-                logging.info(f'closed out a task thread, total pending tasks: {len(self._pending_tasks)}')
-
     def _run_task(self, **kwargs):
         logging.info(f'task thread started: {kwargs}')
-        swf_client = boto3.client('swf')
+        swf_client = self.swf_client
         task_token = kwargs['poll_response']['taskToken']
         swf_payload = {'taskToken': task_token}
         try:
@@ -499,14 +518,11 @@ class Ruffian:
                 swf_client.respond_activity_task_completed(**swf_payload)
             except ClientError as e:
                 logging.error(e.response)
-        kwargs['queue'].put({'task_type': 'close_task', 'task_token': task_token})
 
     @retry(wait_exponential_multiplier=1000, wait_exponential_max=10000, stop_max_delay=10000)
     def _fire_task(self, **kwargs):
-        from toll_booth.alg_obj.serializers import AlgDecoder
-
         logging.info(f'received the order to fire a controlled task: {kwargs}')
-        client = boto3.client('lambda', config=Config(connect_timeout=600, read_timeout=600))
+        courier = LambdaCourier.get_courier()
         task_list = self._work_list
         poll_response = kwargs['poll_response']
         task_name = poll_response['activityType']['name']
@@ -517,23 +533,15 @@ class Ruffian:
         if is_vpc:
             lambda_fn_name = os.getenv('VPC_LABOR_FUNCTION', 'leech-vpc-labor')
         logging.info(f'firing a controlled activity for {task_list}, named {task_name} with args: {task_args}')
-        response = client.invoke(
-            FunctionName=lambda_fn_name,
-            InvocationType='RequestResponse',
-            Payload=task_args
-        )
-        raw_result = response['Payload'].read().decode()
         try:
-            results = json.loads(json.loads(raw_result), cls=AlgDecoder)
-        except TypeError as e:
-            results = {
-                'fail': True
+            results = courier.invoke(lambda_fn_name, task_args)
+        except LambdaInvocationException as e:
+            if e.function_error is None:
+                raise e
+            return {
+                'fail': True,
+                'reason': 'lambda_error',
+                'details': e.details.decode() if isinstance(e.details, bytes) else e.details
             }
-            if 'errorMessage' in raw_result:
-                results['reason'] = 'lambda_error'
-                results['details'] = raw_result
-                return results
-            logging.error(e.args[0])
-            raise RuntimeError()
         logging.info(f'got the results from controlled activity {task_name} back: {results}')
         return results
@@ -8,6 +8,7 @@ import boto3
 from boto3.dynamodb.conditions import Attr, Key
 from botocore.exceptions import ClientError
 
+from toll_booth.alg_obj.aws.sapper.property_index import PropertyIndex, EmptyPropertyLookupException
 from toll_booth.alg_obj.graph.ogm.regulators import PotentialVertex, IdentifierStem, VertexRegulator, PotentialEdge
 from toll_booth.alg_obj.serializers import AlgEncoder
 
@@ -148,6 +149,16 @@ class LeechRecord:
             'sid_value').not_exists()
         return base
 
+    def for_property_index(self, potential_vertex, is_stub=False):
+        key = self._dynamo_parameters.as_key
+        if is_stub:
+            key = self._calculate_stub_parameters(potential_vertex).as_key
+        return {
+            'object_type': potential_vertex.object_type,
+            'object_properties': self._clean_object_properties(potential_vertex.object_properties),
+            'key': key
+        }
+
     def for_extraction(self, extracted_data):
         base = self._for_update('extraction')
         base['UpdateExpression'] = base['UpdateExpression'] + ', #ex=:ex'
@@ -388,6 +399,7 @@ class LeechDriver:
         table_name = kwargs.get('table_name', os.getenv('TABLE_NAME', 'GraphObjects'))
         self._table_name = table_name
         self._table = boto3.resource('dynamodb').Table(self._table_name)
+        self._property_index = PropertyIndex(self._table_name, **kwargs)
 
     @leeched
     def get_object(self, leech_record):
@@ -462,7 +474,9 @@ class LeechDriver:
         if not vertex.is_properties_complete:
             raise RuntimeError(
                 f'could not derive all properties for ruled vertex type: {vertex.object_type}')
-        return self._table.update_item(**leech_record.for_transformation(vertex, potentials))
+        results = self._table.update_item(**leech_record.for_transformation(vertex, potentials))
+        self._index_properties(leech_record.for_property_index(vertex))
+        return results
 
     @leeched
     def set_assimilation_results(self, ruled_edge_type, assimilation_results, leech_record):
@@ -471,8 +485,11 @@ class LeechDriver:
     @leeched
     def set_assimilated_vertex(self, potential_vertex, is_stub, leech_record):
         if is_stub is True:
-            return self._table.update_item(**leech_record.for_stub(potential_vertex))
-        return self._table.update_item(**leech_record.for_created_vertex(potential_vertex))
+            results = self._table.update_item(**leech_record.for_stub(potential_vertex))
+        else:
+            results = self._table.update_item(**leech_record.for_created_vertex(potential_vertex))
+        self._index_properties(leech_record.for_property_index(potential_vertex, is_stub is True))
+        return results
 
     def get_extractor_function_names(self, identifier_stem):
         identifier_stem = IdentifierStem.from_raw(identifier_stem)
@@ -504,6 +521,16 @@ class LeechDriver:
             raise EmptyIndexException
 
     def find_potential_vertexes(self, object_type, vertex_properties):
+        try:
+            potential_vertexes = self._property_index.find_objects(object_type, vertex_properties)
+        except EmptyPropertyLookupException as e:
+            logging.warning(f'could not use the property index to find potential vertexes: {e}, falling back to a scan')
+            return self.scan_potential_vertexes(object_type, vertex_properties)
+        logging.info('completed a property index lookup to find potential vertexes with properties: %s '
+                     'returned the raw values of: %s' % (vertex_properties, potential_vertexes))
+        return [PotentialVertex.from_json(x) for x in potential_vertexes]
+
+    def scan_potential_vertexes(self, object_type, vertex_properties):
         potential_vertexes, token = self._scan_vertexes(object_type, vertex_properties)
         while token:
             more_vertexes, token = self._scan_vertexes(object_type, vertex_properties, token)
@@ -512,6 +539,10 @@ class LeechDriver:
                      'returned the raw values of: %s' % (vertex_properties, potential_vertexes))
         return [PotentialVertex.from_json(x) for x in potential_vertexes]
 
+    def _index_properties(self, property_index_entry):
+        self._property_index.index_object(
+            property_index_entry['object_type'], property_index_entry['object_properties'], property_index_entry['key'])
+
     def _scan_vertexes(self, object_type, vertex_properties, token=None):
         filter_properties = [f'(begins_with(identifier_stem, :is) OR begins_with(identifier_stem, :stub))']
         expression_names = {}
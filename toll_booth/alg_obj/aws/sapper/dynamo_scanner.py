@@ -1,103 +1,217 @@
+import logging
 import os
+import random
 import threading
-from collections import deque
+import time
 from decimal import Decimal
+from queue import Queue, Empty, Full
 
 import boto3
 from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+
+class CapacityGovernor:
+    def __init__(self, read_capacity_per_second):
+        self._read_capacity_per_second = read_capacity_per_second
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def read_capacity_per_second(self):
+        return self._read_capacity_per_second
+
+    def consume(self, capacity_units):
+        if not self._read_capacity_per_second or not capacity_units:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + capacity_units / self._read_capacity_per_second
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+
+
+class ScanSegment:
+    def __init__(self, segment_number, total_segments, scan_kwargs, exclusive_start_key=None, complete=False):
+        self._segment_number = segment_number
+        self._total_segments = total_segments
+        self._scan_kwargs = scan_kwargs
+        self._exclusive_start_key = exclusive_start_key
+        self._complete = complete
+
+    @classmethod
+    def from_checkpoint(cls, segment_number, total_segments, scan_kwargs, checkpoint):
+        position = checkpoint.get(segment_number, checkpoint.get(str(segment_number), {}))
+        return cls(segment_number, total_segments, scan_kwargs,
+                   position.get('exclusive_start_key'), position.get('complete', False))
+
+    @property
+    def segment_number(self):
+        return self._segment_number
+
+    @property
+    def complete(self):
+        return self._complete
+
+    @property
+    def position(self):
+        return {'exclusive_start_key': self._exclusive_start_key, 'complete': self._complete}
+
+    def generate_request(self):
+        request = self._scan_kwargs.copy()
+        request.update({'Segment': self._segment_number, 'TotalSegments': self._total_segments})
+        if self._exclusive_start_key:
+            request['ExclusiveStartKey'] = self._exclusive_start_key
+        return request
+
+    def advance(self, last_evaluated_key):
+        self._exclusive_start_key = last_evaluated_key
+        self._complete = last_evaluated_key is None
 
 
 class DynamoScanner:
+    _throughput_errors = ('ProvisionedThroughputExceededException', 'ThrottlingException')
+
     def __init__(self, index_name=None, **kwargs):
         table_name = kwargs.get('table_name', os.getenv('TABLE_NAME', 'VdGraphObjects'))
+        queue_size = kwargs.get('queue_size', int(os.getenv('SCANNER_QUEUE_SIZE', 20)))
+        read_capacity = kwargs.get('read_capacity_per_second', float(os.getenv('SCANNER_READ_CAPACITY', 0)))
         self._table_name = table_name
-        self._table = boto3.resource('dynamodb').Table(self._table_name)
+        self._table = kwargs.get('table', None)
+        if self._table is None:
+            self._table = boto3.resource('dynamodb').Table(self._table_name)
         self._worker_count = kwargs.get('thread_count', 5)
         self._index_name = index_name
-        self._workers = []
-        self._results = deque()
+        self._queue_size = queue_size
+        self._governor = CapacityGovernor(read_capacity)
+        self._max_attempts = kwargs.get('max_attempts', 8)
+        self._backoff_base = kwargs.get('backoff_base', 0.1)
+        self._backoff_cap = kwargs.get('backoff_cap', 10)
+        self._checkpoint = {}
+        self._consumed_capacity = 0.0
+        self._capacity_lock = threading.Lock()
 
-    def scan_creep_id_values(self, propagation_id, change_category):
-        id_values = []
+    @property
+    def checkpoint(self):
+        return self._checkpoint
+
+    @property
+    def consumed_capacity(self):
+        return self._consumed_capacity
+
+    def scan_creep_id_values(self, propagation_id, change_category, checkpoint=None):
         scan_kwargs = {
-            'KeyConditionExpression': '#sid=:sid AND begins_with(#id, :id) AND ',
-            'ExpressionAttributeNames': {
-                '#sid': 'sid_value', '#id': 'identifier_stem'
-            },
-            'ExpressionAttributeValues': {
-                ':sid': {'S': str(propagation_id)},
-                ':id': {'S': '#creep#ChangeLog#{"category": "' + str(change_category)}
-            }
+            'FilterExpression': Attr('sid_value').eq(str(propagation_id)) & Attr('identifier_stem').begins_with(
+                '#creep#ChangeLog#{"category": "' + str(change_category))
         }
-        self._scan(scan_kwargs)
-        for result in self._results:
-            id_values.extend(result)
-        return id_values
+        return [x for x in self.stream(scan_kwargs, checkpoint)]
 
-    def scan_leech_stages(self):
+    def scan_leech_stages(self, checkpoint=None):
         scan_kwargs = {'ProjectionExpression': 'last_stage_seen, sid_value'}
-        self._scan(scan_kwargs, self._sort_stage_items)
         stages = {}
-        for result in self._results:
-            for stage_name, sid_values in result.items():
-                if stage_name not in stages:
-                    stages[stage_name] = []
-                stages[stage_name].extend(sid_values)
+        for entry in self.stream(scan_kwargs, checkpoint):
+            stage_name = entry['last_stage_seen']
+            if stage_name not in stages:
+                stages[stage_name] = []
+            stages[stage_name].append(entry['sid_value'])
         return stages
 
-    def scan_stalled_objects(self):
+    def scan_stalled_objects(self, checkpoint=None):
+        return [x for x in self.stream_stalled_objects(checkpoint)]
+
+    def stream_stalled_objects(self, checkpoint=None):
         scan_kwargs = {
             'FilterExpression': Attr('last_seen_time').lt(self._get_expiration_timestamp()) & Attr('last_stage_seen').ne('graphing')
         }
-        self._scan(scan_kwargs)
-        results = []
-        for result in self._results:
-            results.extend(result)
-        return results
-
-    def _scan(self, scan_kwargs, sort_function=None):
-        self._results = deque()
-        for thread in range(self._worker_count):
-            thread_kwargs = {'worker_number': thread, 'scan_kwargs': scan_kwargs, 'sorting': sort_function}
-            t = threading.Thread(target=self._paginate_scan, kwargs=thread_kwargs)
-            t.start()
-            self._workers.append(t)
-        for thread in self._workers:
-            thread.join()
-
-    def _paginate_scan(self, worker_number, scan_kwargs, sorting):
-        results, token = self._scan_table(worker_number, scan_kwargs, sorting)
-        self._results.append(results)
-        while token:
-            results, token = self._scan_table(worker_number, scan_kwargs, sorting, token)
-            self._results.append(results)
-
-    def _scan_table(self, worker_number, scan_kwargs, sort_function, token=None):
-        scan_kwargs.update({
-            'Segment': worker_number,
-            'TotalSegments': self._worker_count,
-            'TableName': self._table_name
-        })
+        return self.stream(scan_kwargs, checkpoint)
+
+    def stream(self, scan_kwargs, checkpoint=None):
+        if checkpoint is None:
+            checkpoint = {}
+        scan_kwargs = scan_kwargs.copy()
+        scan_kwargs['ReturnConsumedCapacity'] = 'TOTAL'
         if self._index_name:
             scan_kwargs['IndexName'] = self._index_name
-        if token:
-            scan_kwargs['ExclusiveStartKey'] = token
-        results = self._table.scan(**scan_kwargs)
-        items = results['Items']
-        if sort_function:
-            items = sort_function(items)
-        return items, results.get('LastEvaluatedKey', None)
+        segments = [ScanSegment.from_checkpoint(x, self._worker_count, scan_kwargs, checkpoint)
+                    for x in range(self._worker_count)]
+        self._checkpoint = {x.segment_number: x.position for x in segments}
+        self._consumed_capacity = 0.0
+        pending_segments = [x for x in segments if not x.complete]
+        if not pending_segments:
+            return
+        pages = Queue(maxsize=self._queue_size)
+        stopped = threading.Event()
+        workers = []
+        for segment in pending_segments:
+            worker = threading.Thread(target=self._paginate_segment, args=(segment, pages, stopped))
+            worker.start()
+            workers.append(worker)
+        running = len(workers)
+        try:
+            while running:
+                segment, items, last_evaluated_key, error = pages.get()
+                if error is not None:
+                    raise error
+                if segment is None:
+                    running -= 1
+                    continue
+                for item in items:
+                    yield item
+                self._checkpoint[segment.segment_number] = {
+                    'exclusive_start_key': last_evaluated_key, 'complete': last_evaluated_key is None}
+        finally:
+            stopped.set()
+            while any(x.is_alive() for x in workers):
+                try:
+                    pages.get(timeout=0.1)
+                except Empty:
+                    continue
+            for worker in workers:
+                worker.join()
+
+    def _paginate_segment(self, segment, pages, stopped):
+        try:
+            while not segment.complete and not stopped.is_set():
+                results = self._scan_page(segment)
+                last_evaluated_key = results.get('LastEvaluatedKey', None)
+                segment.advance(last_evaluated_key)
+                self._put(pages, stopped, (segment, results['Items'], last_evaluated_key, None))
+        except Exception as e:
+            logging.error(f'segment {segment.segment_number} of the scan on {self._table_name} failed: {e}')
+            self._put(pages, stopped, (segment, [], None, e))
+            return
+        self._put(pages, stopped, (None, [], None, None))
+
+    def _scan_page(self, segment):
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                results = self._table.scan(**segment.generate_request())
+            except ClientError as e:
+                if e.response['Error']['Code'] not in self._throughput_errors or attempt >= self._max_attempts:
+                    raise
+                ceiling = min(self._backoff_cap, self._backoff_base * (2 ** (attempt - 1)))
+                logging.warning(f'scan of segment {segment.segment_number} on {self._table_name} exceeded the '
+                                f'provisioned throughput, attempt {attempt} of {self._max_attempts}')
+                time.sleep(random.uniform(0, ceiling))
+                continue
+            capacity_units = results.get('ConsumedCapacity', {}).get('CapacityUnits', 0)
+            with self._capacity_lock:
+                self._consumed_capacity += capacity_units
+            self._governor.consume(capacity_units)
+            return results
 
     @classmethod
-    def _sort_stage_items(cls, items):
-        stages = {}
-        for entry in items:
-            stage_name = entry['last_stage_seen']
-            sid_value = entry['sid_value']
-            if stage_name not in stages:
-                stages[stage_name] = []
-            stages[stage_name].append(sid_value)
-        return stages
+    def _put(cls, pages, stopped, entry):
+        while not stopped.is_set():
+            try:
+                pages.put(entry, timeout=0.1)
+                return
+            except Full:
+                continue
 
     @classmethod
     def _get_expiration_timestamp(cls):
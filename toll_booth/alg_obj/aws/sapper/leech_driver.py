@@ -1,14 +1,17 @@
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from decimal import Decimal
 
 import boto3
-from boto3.dynamodb.conditions import Attr, Key
+from boto3.dynamodb.conditions import Attr, Key, ConditionExpressionBuilder
+from boto3.dynamodb.types import TypeSerializer
 from botocore.exceptions import ClientError
 
 from toll_booth.alg_obj.forge.credible_specifics.change_types import ChangeTypeCategory
+from toll_booth.alg_obj.aws.sapper.property_index import PropertyIndex, EmptyPropertyLookupException
 from toll_booth.alg_obj.graph.ogm.regulators import PotentialVertex, IdentifierStem, VertexRegulator, PotentialEdge
 from toll_booth.alg_obj.serializers import AlgEncoder, AlgDecoder
 
@@ -176,6 +179,16 @@ class LeechRecord:
             'sid_value').not_exists()
         return base
 
+    def for_property_index(self, potential_vertex, is_stub=False):
+        key = self._dynamo_parameters.as_key
+        if is_stub:
+            key = self._calculate_stub_parameters(potential_vertex).as_key
+        return {
+            'object_type': potential_vertex.object_type,
+            'object_properties': self._clean_object_properties(potential_vertex.object_properties),
+            'key': key
+        }
+
     def for_extraction(self, extracted_data):
         base = self._for_update('extraction')
         base['UpdateExpression'] = base['UpdateExpression'] + ', #ex=:ex'
@@ -455,11 +468,15 @@ class LeechDriver:
     _links_index = os.getenv('LINKS_INDEX', 'links')
     _credible_change_index = os.getenv('CREDIBLE_CHANGES', 'creep_index')
     _creep_id_value_index = os.getenv('CREEP_ID_VALUES', 'creep_index')
+    _max_transaction_items = 25
+    _max_transaction_bytes = 4000000
+    _max_single_workers = 10
 
     def __init__(self, **kwargs):
         table_name = kwargs.get('table_name', os.getenv('TABLE_NAME', 'VdGraphObjects'))
         self._table_name = table_name
         self._table = boto3.resource('dynamodb').Table(self._table_name)
+        self._property_index = PropertyIndex(self._table_name, **kwargs)
 
     @property
     def table_name(self):
@@ -522,18 +539,103 @@ class LeechDriver:
 
     @leeched
     def mark_ids_as_working(self, id_values, leech_record):
+        unique_values = list(dict.fromkeys(id_values))
+        repeated_values = self._find_repeated_values(id_values)
         already_working = []
         not_working = []
+        for id_chunk in self._chunk_transaction(leech_record, unique_values):
+            chunk_working, chunk_not_working = self._transact_seeds(leech_record, id_chunk)
+            already_working.extend(chunk_working)
+            not_working.extend(chunk_not_working)
+        already_working.extend(repeated_values)
+        return already_working, not_working
+
+    @classmethod
+    def _find_repeated_values(cls, id_values):
+        seen = set()
+        repeated_values = []
         for id_value in id_values:
-            try:
-                self._table.update_item(**leech_record.for_seed(id_value))
-                not_working.append(id_value)
-            except ClientError as e:
-                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
-                    raise e
+            if id_value in seen:
+                repeated_values.append(id_value)
+                continue
+            seen.add(id_value)
+        return repeated_values
+
+    def _chunk_transaction(self, leech_record, id_values):
+        chunk = []
+        chunk_size = 0
+        for id_value in id_values:
+            item_size = len(json.dumps(leech_record.for_seed(id_value), cls=AlgEncoder, default=str))
+            if chunk and (len(chunk) >= self._max_transaction_items or
+                          chunk_size + item_size > self._max_transaction_bytes):
+                yield chunk
+                chunk = []
+                chunk_size = 0
+            chunk.append(id_value)
+            chunk_size += item_size
+        if chunk:
+            yield chunk
+
+    def _transact_seeds(self, leech_record, id_values):
+        client = self._table.meta.client
+        transact_items = [{'Update': self._generate_transact_update(leech_record.for_seed(x))} for x in id_values]
+        try:
+            client.transact_write_items(TransactItems=transact_items)
+            return [], list(id_values)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'TransactionCanceledException':
+                raise e
+            cancellation_reasons = e.response.get('CancellationReasons', [])
+        already_working = []
+        retry_values = []
+        for position, id_value in enumerate(id_values):
+            reason = {}
+            if position < len(cancellation_reasons):
+                reason = cancellation_reasons[position]
+            if reason.get('Code') == 'ConditionalCheckFailed':
                 already_working.append(id_value)
+                continue
+            retry_values.append(id_value)
+        logging.info(f'transaction to mark ids as working was cancelled, {len(already_working)} ids are already '
+                     f'working, falling back to single updates for the remaining {len(retry_values)}')
+        retried_working, not_working = self._mark_ids_individually(leech_record, retry_values)
+        already_working.extend(retried_working)
+        return already_working, not_working
+
+    def _mark_ids_individually(self, leech_record, id_values):
+        if not id_values:
+            return [], []
+        with ThreadPoolExecutor(max_workers=min(self._max_single_workers, len(id_values))) as executor:
+            results = list(executor.map(lambda x: self._mark_id_individually(leech_record, x), id_values))
+        already_working = [x for x, y in zip(id_values, results) if y]
+        not_working = [x for x, y in zip(id_values, results) if not y]
         return already_working, not_working
 
+    def _mark_id_individually(self, leech_record, id_value):
+        try:
+            self._table.update_item(**leech_record.for_seed(id_value))
+            return False
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise e
+            return True
+
+    def _generate_transact_update(self, update_args):
+        serializer = TypeSerializer()
+        condition_expression = ConditionExpressionBuilder().build_expression(update_args['ConditionExpression'])
+        attribute_names = update_args['ExpressionAttributeNames'].copy()
+        attribute_names.update(condition_expression.attribute_name_placeholders)
+        attribute_values = update_args['ExpressionAttributeValues'].copy()
+        attribute_values.update(condition_expression.attribute_value_placeholders)
+        return {
+            'TableName': self._table_name,
+            'Key': {x: serializer.serialize(y) for x, y in update_args['Key'].items()},
+            'UpdateExpression': update_args['UpdateExpression'],
+            'ConditionExpression': condition_expression.condition_expression,
+            'ExpressionAttributeNames': attribute_names,
+            'ExpressionAttributeValues': {x: serializer.serialize(y) for x, y in attribute_values.items()}
+        }
+
     @leeched
     def mark_object_as_blank(self, leech_record):
         return self._table.update_item(**leech_record.for_blank)
@@ -559,7 +661,9 @@ class LeechDriver:
         if not vertex.is_properties_complete:
             raise RuntimeError(
                 f'could not derive all properties for ruled vertex type: {vertex.object_type}')
-        return self._table.update_item(**leech_record.for_transformation(vertex, potentials))
+        results = self._table.update_item(**leech_record.for_transformation(vertex, potentials))
+        self._index_properties(leech_record.for_property_index(vertex))
+        return results
 
     @leeched
     def set_assimilation_results(self, ruled_edge_type, assimilation_results, leech_record):
@@ -568,8 +672,11 @@ class LeechDriver:
     @leeched
     def set_assimilated_vertex(self, potential_vertex, is_stub, leech_record):
         if is_stub is True:
-            return self._table.update_item(**leech_record.for_stub(potential_vertex))
-        return self._table.update_item(**leech_record.for_created_vertex(potential_vertex))
+            results = self._table.update_item(**leech_record.for_stub(potential_vertex))
+        else:
+            results = self._table.update_item(**leech_record.for_created_vertex(potential_vertex))
+        self._index_properties(leech_record.for_property_index(potential_vertex, is_stub is True))
+        return results
 
     @leeched
     def set_link_object(self, linked_internal_id, id_source, is_unlink, leech_record):
@@ -909,6 +1016,16 @@ class LeechDriver:
         return results
 
     def find_potential_vertexes(self, object_type, vertex_properties):
+        try:
+            potential_vertexes = self._property_index.find_objects(object_type, vertex_properties)
+        except EmptyPropertyLookupException as e:
+            logging.warning(f'could not use the property index to find potential vertexes: {e}, falling back to a scan')
+            return self.scan_potential_vertexes(object_type, vertex_properties)
+        logging.info('completed a property index lookup to find potential vertexes with properties: %s '
+                     'returned the raw values of: %s' % (vertex_properties, potential_vertexes))
+        return [PotentialVertex.from_json(x) for x in potential_vertexes]
+
+    def scan_potential_vertexes(self, object_type, vertex_properties):
         potential_vertexes, token = self._scan_vertexes(object_type, vertex_properties)
         while token:
             more_vertexes, token = self._scan_vertexes(object_type, vertex_properties, token)
@@ -1001,6 +1118,10 @@ class LeechDriver:
             ExpressionAttributeValues={':id': 'worked'}
         )
 
+    def _index_properties(self, property_index_entry):
+        self._property_index.index_object(
+            property_index_entry['object_type'], property_index_entry['object_properties'], property_index_entry['key'])
+
     def _scan_vertexes(self, object_type, vertex_properties, token=None):
         filter_properties = [f'(begins_with(identifier_stem, :is) OR begins_with(identifier_stem, :stub))']
         expression_names = {}
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from itertools import combinations
+
+import boto3
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer
+
+
+class PropertyIndex:
+    _batch_get_size = 100
+
+    def __init__(self, source_table_name, **kwargs):
+        table_name = kwargs.get('property_index_table_name', os.getenv('PROPERTY_INDEX_TABLE_NAME', 'VdPropertyIndex'))
+        max_indexed_properties = kwargs.get(
+            'max_indexed_properties', int(os.getenv('PROPERTY_INDEX_MAX_PROPERTIES', 6)))
+        self._source_table_name = source_table_name
+        self._table_name = table_name
+        self._max_indexed_properties = max_indexed_properties
+        self._resource = boto3.resource('dynamodb')
+        self._table = self._resource.Table(self._table_name)
+        self._overflowed_types = set()
+
+    @property
+    def table_name(self):
+        return self._table_name
+
+    @classmethod
+    def normalize_properties(cls, object_properties):
+        normalized = {}
+        for property_name, object_property in object_properties.items():
+            if object_property is None or object_property == '':
+                continue
+            if hasattr(object_property, 'is_missing'):
+                continue
+            if isinstance(object_property, datetime):
+                object_property = object_property.timestamp()
+            normalized[property_name] = str(object_property)
+        return normalized
+
+    @classmethod
+    def generate_property_key(cls, object_type, normalized_properties):
+        property_tuple = sorted(normalized_properties.items())
+        property_hash = hashlib.sha256(json.dumps(property_tuple).encode('utf-8')).hexdigest()
+        return f'{object_type}#{property_hash}'
+
+    @classmethod
+    def generate_overflow_key(cls, object_type):
+        return f'{object_type}#overflow'
+
+    def generate_index_keys(self, object_type, object_properties):
+        normalized = self.normalize_properties(object_properties)
+        property_names = sorted(normalized.keys())
+        if not property_names:
+            return []
+        if len(property_names) > self._max_indexed_properties:
+            logging.warning(f'object of type {object_type} has {len(property_names)} properties, which is more than '
+                            f'the {self._max_indexed_properties} the property index will expand, '
+                            f'indexing only the complete property set')
+            return [self.generate_property_key(object_type, normalized), self.generate_overflow_key(object_type)]
+        index_keys = []
+        for subset_size in range(1, len(property_names) + 1):
+            for subset in combinations(property_names, subset_size):
+                subset_properties = {x: normalized[x] for x in subset}
+                index_keys.append(self.generate_property_key(object_type, subset_properties))
+        return index_keys
+
+    def generate_index_items(self, object_type, object_properties, key):
+        pointer = json.dumps(key, sort_keys=True)
+        return [{
+            'property_key': x,
+            'pointer': pointer,
+            'source_key': key,
+            'object_type': object_type
+        } for x in self.generate_index_keys(object_type, object_properties)]
+
+    def index_object(self, object_type, object_properties, key):
+        index_items = self.generate_index_items(object_type, object_properties, key)
+        if any(x['property_key'] == self.generate_overflow_key(object_type) for x in index_items):
+            self._overflowed_types.add(object_type)
+        with self._table.batch_writer(overwrite_by_pkeys=['property_key', 'pointer']) as writer:
+            for index_item in index_items:
+                writer.put_item(Item=index_item)
+        return len(index_items)
+
+    def find_objects(self, object_type, object_properties):
+        normalized = self.normalize_properties(object_properties)
+        if not normalized:
+            raise EmptyPropertyLookupException(
+                f'can not use the property index to find objects of type {object_type} without any properties')
+        if len(normalized) > self._max_indexed_properties:
+            raise EmptyPropertyLookupException(
+                f'property lookup for {object_type} uses more than the {self._max_indexed_properties} '
+                f'properties expanded into the index')
+        if self._is_overflowed(object_type):
+            raise EmptyPropertyLookupException(
+                f'some objects of type {object_type} have more than the {self._max_indexed_properties} '
+                f'properties expanded into the index, so a property lookup could miss them')
+        property_key = self.generate_property_key(object_type, normalized)
+        keys = [x for x in self._query_pointers(property_key)]
+        items = self._batch_get_items(keys)
+        return [x for x in items if self._check_properties(x, normalized)]
+
+    def backfill(self, segment=0, total_segments=1):
+        indexed = 0
+        paginator = self._resource.meta.client.get_paginator('scan')
+        pages = paginator.paginate(
+            TableName=self._source_table_name,
+            Segment=segment,
+            TotalSegments=total_segments,
+            FilterExpression='begins_with(identifier_stem, :v) AND attribute_exists(object_properties)',
+            ProjectionExpression='identifier_stem, sid_value, object_type, object_properties',
+            ExpressionAttributeValues={':v': {'S': '#vertex#'}}
+        )
+        deserializer = TypeDeserializer()
+        with self._table.batch_writer(overwrite_by_pkeys=['property_key', 'pointer']) as writer:
+            for page in pages:
+                for raw_item in page['Items']:
+                    item = {x: deserializer.deserialize(y) for x, y in raw_item.items()}
+                    object_type = item.get('object_type')
+                    if not object_type:
+                        continue
+                    key = {'identifier_stem': item['identifier_stem'], 'sid_value': item['sid_value']}
+                    for index_item in self.generate_index_items(object_type, item['object_properties'], key):
+                        writer.put_item(Item=index_item)
+                        indexed += 1
+        logging.info(f'completed backfill of segment {segment}/{total_segments}, wrote {indexed} index entries')
+        return indexed
+
+    def _is_overflowed(self, object_type):
+        if object_type in self._overflowed_types:
+            return True
+        results = self._table.query(
+            KeyConditionExpression=Key('property_key').eq(self.generate_overflow_key(object_type)),
+            ProjectionExpression='property_key',
+            Limit=1
+        )
+        if results['Items']:
+            self._overflowed_types.add(object_type)
+            return True
+        return False
+
+    def _query_pointers(self, property_key):
+        query_args = {
+            'KeyConditionExpression': Key('property_key').eq(property_key),
+            'ProjectionExpression': 'source_key'
+        }
+        while True:
+            results = self._table.query(**query_args)
+            for item in results['Items']:
+                yield item['source_key']
+            token = results.get('LastEvaluatedKey', None)
+            if not token:
+                return
+            query_args['ExclusiveStartKey'] = token
+
+    def _batch_get_items(self, keys):
+        items = []
+        for start in range(0, len(keys), self._batch_get_size):
+            request_items = {self._source_table_name: {'Keys': keys[start:start + self._batch_get_size]}}
+            while request_items:
+                results = self._resource.batch_get_item(RequestItems=request_items)
+                items.extend(results['Responses'].get(self._source_table_name, []))
+                request_items = results.get('UnprocessedKeys', None)
+        return items
+
+    def _check_properties(self, item, normalized_properties):
+        item_properties = self.normalize_properties(item.get('object_properties', {}))
+        for property_name, property_value in normalized_properties.items():
+            if item_properties.get(property_name) != property_value:
+                return False
+        return True
+
+
+class EmptyPropertyLookupException(Exception):
+    pass
@@ -5,18 +5,18 @@ from toll_booth.alg_obj import AlgObject
 
 
 class ObjectDownloadLink(AlgObject):
-    def __init__(self, bucket_name, remote_file_path, expiration_seconds=172800, local_file_path=None):
+    def __init__(self, bucket_name, remote_file_path, expiration_seconds=172800, local_file_path=None, stored=False):
         self._bucket_name = bucket_name
         self._remote_file_path = remote_file_path
         self._expiration_seconds = expiration_seconds
         self._local_file_path = local_file_path
-        self._stored = False
+        self._stored = stored
 
     @classmethod
     def parse_json(cls, json_dict):
         return cls(
             json_dict['bucket_name'], json_dict['remote_file_path'],
-            json_dict.get('expiration_seconds', 172800), json_dict.get('local_file_path')
+            json_dict.get('expiration_seconds', 172800), json_dict.get('local_file_path'), json_dict.get('stored', False)
         )
 
     def _store(self):
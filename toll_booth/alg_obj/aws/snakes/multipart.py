@@ -0,0 +1,109 @@
+import logging
+import os
+
+import boto3
+
+_minimum_part_bytes = 5 * 1024 * 1024
+
+
+class S3MultipartWriter:
+    def __init__(self, bucket_name, object_key, **kwargs):
+        part_bytes = kwargs.get('part_bytes', int(os.getenv('S3_MULTIPART_PART_BYTES', 8 * 1024 * 1024)))
+        self._bucket_name = bucket_name
+        self._object_key = object_key
+        self._part_bytes = max(part_bytes, _minimum_part_bytes)
+        self._client = kwargs.get('client')
+        if self._client is None:
+            self._client = boto3.client('s3')
+        self._extra_args = kwargs.get('extra_args', {})
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+        self._bytes_written = 0
+        self._closed = False
+
+    @property
+    def bucket_name(self):
+        return self._bucket_name
+
+    @property
+    def object_key(self):
+        return self._object_key
+
+    @property
+    def bytes_written(self):
+        return self._bytes_written
+
+    @property
+    def part_count(self):
+        return len(self._parts)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if self._closed:
+            raise ValueError(f'write to a closed upload of s3://{self._bucket_name}/{self._object_key}')
+        self._buffer.extend(data)
+        self._bytes_written += len(data)
+        while len(self._buffer) >= self._part_bytes:
+            part = bytes(self._buffer[:self._part_bytes])
+            del self._buffer[:self._part_bytes]
+            self._upload_part(part)
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        if self._upload_id is None:
+            self._client.put_object(
+                Bucket=self._bucket_name, Key=self._object_key, Body=bytes(self._buffer), **self._extra_args)
+            self._buffer = bytearray()
+            return
+        if self._buffer:
+            self._upload_part(bytes(self._buffer))
+            self._buffer = bytearray()
+        self._client.complete_multipart_upload(
+            Bucket=self._bucket_name, Key=self._object_key, UploadId=self._upload_id,
+            MultipartUpload={'Parts': self._parts}
+        )
+        logging.info(f'completed the upload of {self._bytes_written} bytes in {len(self._parts)} parts '
+                     f'to s3://{self._bucket_name}/{self._object_key}')
+
+    def abort(self):
+        self._closed = True
+        self._buffer = bytearray()
+        if self._upload_id is None:
+            return
+        self._client.abort_multipart_upload(
+            Bucket=self._bucket_name, Key=self._object_key, UploadId=self._upload_id)
+        self._upload_id = None
+
+    def _upload_part(self, part):
+        if self._upload_id is None:
+            response = self._client.create_multipart_upload(
+                Bucket=self._bucket_name, Key=self._object_key, **self._extra_args)
+            self._upload_id = response['UploadId']
+        part_number = len(self._parts) + 1
+        response = self._client.upload_part(
+            Bucket=self._bucket_name, Key=self._object_key, UploadId=self._upload_id,
+            PartNumber=part_number, Body=part
+        )
+        self._parts.append({'PartNumber': part_number, 'ETag': response['ETag']})
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.abort()
+            return
+        self.close()
@@ -3,6 +3,7 @@ import os
 
 import boto3
 import jsonref
+from botocore.exceptions import ClientError
 
 from toll_booth.alg_obj.serializers import AlgDecoder
 
@@ -17,6 +18,14 @@ class SchemaSnek:
         self._bucket_name = bucket_name
         self._folder_name = folder_name
 
+    @property
+    def bucket_name(self):
+        return self._bucket_name
+
+    @property
+    def folder_name(self):
+        return self._folder_name
+
     def get_validation_schema(self, schema_name=None):
         if not schema_name:
             schema_name = 'master_schema.json'
@@ -28,14 +37,26 @@ class SchemaSnek:
         return self.put_schema(file_path, master_schema_name)
 
     def get_schema(self, schema_name=None):
+        schema, etag = self.get_schema_if_modified(schema_name)
+        return schema
+
+    def get_schema_if_modified(self, schema_name=None, etag=None):
         if not schema_name:
             schema_name = 'schema.json'
         s3 = boto3.resource('s3')
         object_key = f'{self._folder_name}/{schema_name}'
-        stored_object = s3.Object(self._bucket_name, object_key).get()
+        get_kwargs = {}
+        if etag:
+            get_kwargs['IfNoneMatch'] = etag
+        try:
+            stored_object = s3.Object(self._bucket_name, object_key).get(**get_kwargs)
+        except ClientError as e:
+            if e.response['Error']['Code'] in ['304', 'NotModified']:
+                return None, etag
+            raise e
         stored_schema_string = stored_object['Body'].read()
         schema = jsonref.loads(stored_schema_string, cls=AlgDecoder)
-        return schema
+        return schema, stored_object.get('ETag')
 
     def put_schema(self, file_path, schema_name=None):
         if not schema_name:
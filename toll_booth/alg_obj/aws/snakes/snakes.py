@@ -1,7 +1,12 @@
+import gzip
+import hashlib
 import rapidjson
 import json
 import logging
 import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 from datetime import datetime
 
@@ -11,10 +16,77 @@ from botocore.exceptions import ClientError
 from toll_booth.alg_obj import AlgObject
 from toll_booth.alg_obj.serializers import AlgEncoder, AlgDecoder
 
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class StoredDataCache:
+    def __init__(self, max_bytes):
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def current_bytes(self):
+        return self._current_bytes
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    def __contains__(self, data_key):
+        with self._lock:
+            return data_key in self._entries
+
+    def get(self, data_key):
+        with self._lock:
+            body = self._entries.get(data_key)
+            if body is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(data_key)
+            self._hits += 1
+            return body
+
+    def put(self, data_key, body):
+        if len(body) > self._max_bytes:
+            return
+        with self._lock:
+            if data_key in self._entries:
+                self._entries.move_to_end(data_key)
+                return
+            self._entries[data_key] = body
+            self._current_bytes += len(body)
+            while self._current_bytes > self._max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._current_bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
 
 class StoredData(AlgObject):
+    _format_marker = b'SD2:'
+    _compressions = ('none', 'gzip', 'zstd')
+    _stored_keys = set()
+    _stored_lock = threading.Lock()
+    _client = None
+    _cache = None
+    _cache_lock = threading.Lock()
+
     def __init__(self, data_name, data_string, bucket_name=None, folder_name=None, timestamp=None, full_unpack=False,
-                 is_stored=None):
+                 is_stored=None, data_key=None):
         if not bucket_name:
             bucket_name = os.getenv('LEECH_BUCKET', 'the-leech')
         if not folder_name:
@@ -28,19 +100,28 @@ class StoredData(AlgObject):
         self._timestamp = timestamp
         self._full_unpack = full_unpack
         self._is_stored = is_stored
+        self._data_key = data_key
+        self._inline_bytes = int(os.getenv('STORED_DATA_INLINE_BYTES', 2048))
+        self._compress_bytes = int(os.getenv('STORED_DATA_COMPRESS_BYTES', 1024))
+        self._compression = os.getenv('STORED_DATA_COMPRESSION', 'gzip')
+        if self._compression not in self._compressions:
+            raise ValueError(f'STORED_DATA_COMPRESSION must be one of {self._compressions}, not {self._compression}')
 
     @property
     def to_json(self):
-        if not self.check:
-            self.store()
+        if self._is_stored and self._data_key:
+            return {'pointer': self.pointer}
+        body_string = self._encode_body()
+        if len(body_string) <= self._inline_bytes:
+            return {'data_name': self._data_name, 'inline': body_string}
+        self._store_body(body_string)
         return {'pointer': self.pointer}
 
     @property
     def check(self):
         if self._is_stored is True:
             return True
-        resource = boto3.resource('s3')
-        object_resource = resource.Object(self._bucket_name, self.data_key)
+        object_resource = boto3.resource('s3').Object(self._bucket_name, self.data_key)
         try:
             object_resource.load()
         except ClientError as e:
@@ -53,7 +134,10 @@ class StoredData(AlgObject):
 
     @property
     def data_key(self):
-        return f'{self._folder_name}/{self._data_name}!{self._timestamp}.json'
+        if self._data_key is None:
+            content_hash = hashlib.sha256(self._encode_body().encode('utf-8')).hexdigest()
+            self._data_key = f'{self._folder_name}/v2/{content_hash}'
+        return self._data_key
 
     @property
     def data_string(self):
@@ -65,31 +149,32 @@ class StoredData(AlgObject):
 
     @classmethod
     def retrieve(cls, pointer):
-        pointer_parts = pointer.split('#')
-        key_parts = pointer_parts[1].split('!')
-        folder_data_name = key_parts[0].split('/')
-        folder_name = folder_data_name[0]
-        data_name = folder_data_name[1]
-        timestamp = key_parts[1].replace('.json', '')
-        resource = boto3.resource('s3')
-        stored_object = resource.Object(pointer_parts[0], pointer_parts[1]).get()
-        string_body = stored_object['Body'].read()
-        body = rapidjson.loads(string_body, object_hook=AlgDecoder.object_hook)
+        bucket_name, data_key = pointer.split('#', 1)
+        body = rapidjson.loads(cls._fetch_body(bucket_name, data_key), object_hook=AlgDecoder.object_hook)
+        folder_name, data_name = data_key.split('/', 1)
+        timestamp = None
+        if '!' in data_name:
+            data_name, timestamp = data_name.split('!', 1)
+            timestamp = timestamp.replace('.json', '')
         cls_args = {
             'data_name': data_name,
             'data_string': body['data_string'],
-            'bucket_name': pointer_parts[0],
+            'bucket_name': bucket_name,
             'folder_name': folder_name,
             'timestamp': timestamp,
             'full_unpack': body['full_unpack'],
-            'is_stored': True
+            'is_stored': True,
+            'data_key': data_key
         }
         return cls(**cls_args)
 
     @classmethod
     def parse_json(cls, json_dict):
-        pointer = json_dict['pointer']
-        stored_data = cls.retrieve(pointer)
+        if 'inline' in json_dict:
+            body = cls._decode_body(json_dict['inline'])
+            stored_data = cls(json_dict['data_name'], body['data_string'], full_unpack=body['full_unpack'])
+        else:
+            stored_data = cls.retrieve(json_dict['pointer'])
         if stored_data.full_unpack:
             return stored_data.data_string
         return stored_data
@@ -102,21 +187,142 @@ class StoredData(AlgObject):
             return alg_object
         return cls(data_name, alg_object, full_unpack=full_unpack)
 
+    @classmethod
+    def prefetch(cls, encoded_values, max_workers=None):
+        if max_workers is None:
+            max_workers = int(os.getenv('STORED_DATA_PREFETCH_WORKERS', 8))
+        if isinstance(encoded_values, (str, bytes)) and cls.__name__ not in str(encoded_values):
+            return 0
+        cache = cls.get_cache()
+        seen = set()
+        pending = [x for x in cls._find_pointers(encoded_values)]
+        fetched = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending:
+                pointers = [x for x in set(pending) if x not in seen]
+                seen.update(pointers)
+                to_fetch = [x.split('#', 1) for x in pointers if tuple(x.split('#', 1)) not in cache]
+                bodies = list(executor.map(lambda x: cls._fetch_body(*x), to_fetch))
+                fetched += len(to_fetch)
+                pending = []
+                for body in bodies:
+                    if b'StoredData' in body:
+                        pending.extend(cls._find_pointers(body))
+        logging.debug(f'prefetched {fetched} stored data objects into the local cache')
+        return fetched
+
+    @classmethod
+    def get_cache(cls):
+        with cls._cache_lock:
+            if cls._cache is None:
+                cls._cache = StoredDataCache(int(os.getenv('STORED_DATA_CACHE_BYTES', 67108864)))
+            return cls._cache
+
+    @classmethod
+    def _fetch_body(cls, bucket_name, data_key):
+        cache = cls.get_cache()
+        body = cache.get((bucket_name, data_key))
+        if body is not None:
+            return body
+        stored_object = cls._get_client().get_object(Bucket=bucket_name, Key=data_key)
+        body = cls._unpack_body(stored_object['Body'].read())
+        cache.put((bucket_name, data_key), body)
+        return body
+
+    @classmethod
+    def _find_pointers(cls, encoded_values):
+        if isinstance(encoded_values, (str, bytes)):
+            encoded_values = json.loads(encoded_values)
+        pointers = []
+        pending = [encoded_values]
+        while pending:
+            entry = pending.pop()
+            if isinstance(entry, list):
+                pending.extend(entry)
+                continue
+            if not isinstance(entry, dict):
+                continue
+            if entry.get('_alg_class') == cls.__name__ and isinstance(entry.get('value'), dict):
+                stored_value = entry['value']
+                if 'pointer' in stored_value:
+                    pointers.append(stored_value['pointer'])
+                    continue
+                if 'inline' in stored_value:
+                    pending.append(json.loads(stored_value['inline']))
+                    continue
+            pending.extend(entry.values())
+        return pointers
+
     def store(self):
-        if self.check:
-            raise RuntimeError('can not overwrite stored data')
-        self._overwrite_store()
+        self._store_body(self._encode_body())
+        return self.pointer
+
+    def _store_body(self, body_string):
+        data_key = self.data_key
+        with self._stored_lock:
+            if (self._bucket_name, data_key) in self._stored_keys:
+                self._is_stored = True
+                return
+        try:
+            self._get_client().put_object(
+                Bucket=self._bucket_name, Key=data_key, Body=self._pack_body(body_string), IfNoneMatch='*')
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('PreconditionFailed', 'ConditionalRequestConflict'):
+                raise
+            logging.debug(f'stored data: {data_key} was already written, skipping the upload')
+        with self._stored_lock:
+            self._stored_keys.add((self._bucket_name, data_key))
+        self.get_cache().put((self._bucket_name, data_key), body_string.encode('utf-8'))
+        self._is_stored = True
 
-    def _overwrite_store(self):
-        resource = boto3.resource('s3')
+    def _encode_body(self):
         body = {'data_string': self._data_string, 'full_unpack': self._full_unpack}
         try:
-            body_string = rapidjson.dumps(body, default=AlgEncoder.default)
+            return rapidjson.dumps(body, default=AlgEncoder.default)
         except TypeError:
-            body_string = json.dumps(body, cls=AlgEncoder)
-        resource.Object(self._bucket_name, self.data_key).put(Body=body_string)
-        self._is_stored = True
-        return self.pointer
+            return json.dumps(body, cls=AlgEncoder)
+
+    def _pack_body(self, body_string):
+        body_bytes = body_string.encode('utf-8')
+        compression = 'none'
+        if len(body_bytes) >= self._compress_bytes:
+            compression = self._compression
+        if compression == 'zstd' and zstandard is None:
+            logging.warning('zstd compression was requested for stored data, but zstandard is not installed, '
+                            'falling back to gzip')
+            compression = 'gzip'
+        if compression == 'zstd':
+            body_bytes = zstandard.ZstdCompressor().compress(body_bytes)
+        elif compression == 'gzip':
+            body_bytes = gzip.compress(body_bytes)
+        return self._format_marker + compression.encode('utf-8') + b'\n' + body_bytes
+
+    @classmethod
+    def _decode_body(cls, raw_body):
+        return rapidjson.loads(cls._unpack_body(raw_body), object_hook=AlgDecoder.object_hook)
+
+    @classmethod
+    def _unpack_body(cls, raw_body):
+        if isinstance(raw_body, bytes) and raw_body.startswith(cls._format_marker):
+            header, _, raw_body = raw_body.partition(b'\n')
+            compression = header[len(cls._format_marker):].decode('utf-8')
+            if compression == 'zstd':
+                if zstandard is None:
+                    raise RuntimeError('stored data is compressed with zstd, but zstandard is not installed')
+                raw_body = zstandard.ZstdDecompressor().decompress(raw_body)
+            elif compression == 'gzip':
+                raw_body = gzip.decompress(raw_body)
+            elif compression != 'none':
+                raise ValueError(f'stored data has an unrecognised compression header: {compression}')
+        if isinstance(raw_body, str):
+            raw_body = raw_body.encode('utf-8')
+        return raw_body
+
+    @classmethod
+    def _get_client(cls):
+        if cls._client is None:
+            cls._client = boto3.client('s3')
+        return cls._client
 
     def __str__(self):
         return self.pointer
@@ -138,5 +344,6 @@ class StoredData(AlgObject):
         if current_data == self._data_string:
             return False
         self._data_string = current_data
-        self._overwrite_store()
+        self._data_key = None
+        self._is_stored = False
         return True
@@ -3,15 +3,23 @@ import hashlib
 import hmac
 import json
 import os
-import urllib.parse
+import re
+import threading
 
+import boto3
 import requests
+from botocore.utils import parse_timestamp
+from requests.adapters import HTTPAdapter
 
 from toll_booth.alg_obj.aws.squirrels.squirrel import Opossum
 from toll_booth.alg_obj.aws.trident.trident_obj import TridentVertex, TridentEdge, TridentProperty, TridentPath
 
 
 class TridentDecoder(json.JSONDecoder):
+    _results_pattern = re.compile(
+        r'"data"\s*:\s*\{\s*"@type"\s*:\s*"g:List"\s*,\s*"@value"\s*:\s*\[')
+    _whitespace = re.compile(r'[\s,]*')
+
     def __init__(self, *args, **kwargs):
         json.JSONDecoder.__init__(self, object_hook=self.object_hook, *args, **kwargs)
 
@@ -19,57 +27,154 @@ class TridentDecoder(json.JSONDecoder):
     def object_hook(obj):
         if '@type' not in obj:
             return obj
-        obj_type = obj['@type']
-        obj_value = obj['@value']
-        if obj_type == 'g:T':
-            if obj_value == 'id':
-                return 'internal_id'
-            if obj_value == 'label':
-                return 'label'
-        if obj_type == 'g:Int32':
-            return int(obj_value)
-        if obj_type == 'g:Int64':
-            return int(obj_value)
-        if obj_type == 'g:List':
-            return obj_value
-        if obj_type == 'g:Set':
-            return set(obj_value)
-        if obj_type == 'g:Date':
-            return datetime.datetime.fromtimestamp(obj_value/1000)
-        if obj_type == 'g:Map':
-            created_map = {}
-            i = 0
-            while i < len(obj_value):
-                created_map[obj_value[i]] = obj_value[i + 1]
-                i += 2
-            return created_map
-        if obj_type == 'g:Vertex':
-            try:
-                trident_vertex = TridentVertex(obj_value['id'], obj_value['label'], obj_value['properties'])
-                return trident_vertex
-            except KeyError:
-                return TridentVertex(obj_value['id'], obj_value['label'])
-        if obj_type == 'g:Edge':
-            from_vertex = TridentVertex(obj_value['inV'], obj_value['inVLabel'])
-            to_vertex = TridentVertex(obj_value['outV'], obj_value['outVLabel'])
-            return TridentEdge(obj_value['id'], obj_value['label'],
-                               from_vertex, to_vertex)
-        if obj_type == 'g:VertexProperty':
-            return TridentProperty(obj_value['label'], obj_value['value'])
-        if obj_type == 'g:Path':
-            return TridentPath(obj_value['labels'], obj_value['objects'])
-        return obj
+        try:
+            type_decoder = _type_decoders[obj['@type']]
+        except KeyError:
+            return obj
+        return type_decoder(obj['@value'], obj)
+
+    @classmethod
+    def decode_results(cls, response_body):
+        response_json = json.loads(response_body, object_hook=cls.object_hook)
+        return response_json['result']['data']
 
+    @classmethod
+    def stream_results(cls, response_body):
+        if isinstance(response_body, bytes):
+            response_body = response_body.decode('utf-8')
+        result_start = response_body.find('"result"')
+        match = None
+        if result_start >= 0:
+            match = cls._results_pattern.search(response_body, result_start)
+        if match is None:
+            yield from cls.decode_results(response_body)
+            return
+        decoder = cls()
+        position = match.end()
+        while True:
+            position = cls._whitespace.match(response_body, position).end()
+            if response_body[position] == ']':
+                return
+            result, position = decoder.raw_decode(response_body, position)
+            yield result
 
-class TridentNotary:
+
+def _decode_token(obj_value, obj):
+    if obj_value == 'id':
+        return 'internal_id'
+    if obj_value == 'label':
+        return 'label'
+    return obj
+
+
+def _decode_map(obj_value, obj):
+    return dict(zip(obj_value[::2], obj_value[1::2]))
+
+
+def _decode_vertex(obj_value, obj):
+    try:
+        return TridentVertex(obj_value['id'], obj_value['label'], obj_value['properties'])
+    except KeyError:
+        return TridentVertex(obj_value['id'], obj_value['label'])
+
+
+def _decode_edge(obj_value, obj):
+    from_vertex = TridentVertex(obj_value['inV'], obj_value['inVLabel'])
+    to_vertex = TridentVertex(obj_value['outV'], obj_value['outVLabel'])
+    return TridentEdge(obj_value['id'], obj_value['label'], from_vertex, to_vertex)
+
+
+_type_decoders = {
+    'g:T': _decode_token,
+    'g:Int32': lambda obj_value, obj: int(obj_value),
+    'g:Int64': lambda obj_value, obj: int(obj_value),
+    'g:Double': lambda obj_value, obj: float(obj_value),
+    'g:Float': lambda obj_value, obj: float(obj_value),
+    'g:List': lambda obj_value, obj: obj_value,
+    'g:Set': lambda obj_value, obj: set(obj_value),
+    'g:Date': lambda obj_value, obj: datetime.datetime.fromtimestamp(obj_value/1000),
+    'g:Map': _decode_map,
+    'g:Vertex': _decode_vertex,
+    'g:Edge': _decode_edge,
+    'g:VertexProperty': lambda obj_value, obj: TridentProperty(obj_value['label'], obj_value['value']),
+    'g:Path': lambda obj_value, obj: TridentPath(obj_value['labels'], obj_value['objects'])
+}
+
+
+class TridentCredentials:
+    _expiration_variables = ('AWS_SESSION_EXPIRATION', 'AWS_CREDENTIAL_EXPIRATION')
+
+    def __init__(self, access_key, secret_key, session_token=None, expires_at=None):
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self._session_token = session_token
+        self._expires_at = expires_at
+
+    @classmethod
+    def retrieve(cls):
+        access_key = os.getenv('AWS_ACCESS_KEY_ID', None)
+        secret_key = os.getenv('AWS_SECRET_ACCESS_KEY', None)
+        session_token = os.getenv('AWS_SESSION_TOKEN', None)
+        if access_key is None or secret_key is None:
+            access_key, secret_key = Opossum.get_trident_user_key()
+            return cls(access_key, secret_key)
+        return cls(access_key, secret_key, session_token, cls._derive_expiration(access_key))
+
+    @classmethod
+    def _derive_expiration(cls, access_key):
+        for variable_name in cls._expiration_variables:
+            expiration = os.getenv(variable_name, None)
+            if expiration:
+                return cls._to_utc(parse_timestamp(expiration))
+        boto_credentials = boto3.Session().get_credentials()
+        expiry_time = getattr(boto_credentials, '_expiry_time', None)
+        if expiry_time is None or boto_credentials.access_key != access_key:
+            return None
+        return cls._to_utc(expiry_time)
+
+    @classmethod
+    def _to_utc(cls, timestamp):
+        if timestamp.tzinfo is None:
+            return timestamp
+        return timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+    @property
+    def access_key(self):
+        return self._access_key
+
+    @property
+    def secret_key(self):
+        return self._secret_key
+
+    @property
+    def session_token(self):
+        return self._session_token
+
+    @property
+    def expires_at(self):
+        return self._expires_at
+
+    def is_expiring(self, refresh_window):
+        if self._expires_at is None:
+            return False
+        return datetime.datetime.utcnow() + refresh_window >= self._expires_at
+
+
+class TridentTransport:
     _region = os.getenv('AWS_REGION', 'us-east-1')
     _service = 'neptune-db'
+    _transports = {}
+    _transports_lock = threading.Lock()
 
-    def __init__(self, neptune_endpoint, session=None):
+    def __init__(self, neptune_endpoint, session=None, **kwargs):
         if neptune_endpoint is None:
             raise RuntimeError('must specify neptune endpoint when calling the trident_notary')
+        pool_size = kwargs.get('pool_size', int(os.getenv('TRIDENT_POOL_SIZE', 25)))
+        refresh_window = kwargs.get('credential_refresh_seconds', int(os.getenv('TRIDENT_CREDENTIAL_REFRESH', 300)))
         if not session:
             session = requests.session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount('https://', adapter)
         self._session = session
         self._neptune_endpoint = neptune_endpoint
         self._uri = '/gremlin/'
@@ -77,42 +182,60 @@ class TridentNotary:
         self._host = neptune_endpoint + ':8182'
         self._signed_headers = 'host;x-amz-date'
         self._algorithm = 'AWS4-HMAC-SHA256'
-        access_key = os.getenv('AWS_ACCESS_KEY_ID', None)
-        secret_key = os.getenv('AWS_SECRET_ACCESS_KEY', None)
-        self._session_token = os.getenv('AWS_SESSION_TOKEN', None)
-        if access_key is None or secret_key is None:
-            access_key, secret_key = Opossum.get_trident_user_key()
-        self._access_key = access_key
-        self._secret_key = secret_key
-        self._credentials = f"Credentials={self._access_key}"
         self._request_url = f'https://{neptune_endpoint}:8182{self._uri}'
+        self._refresh_window = datetime.timedelta(seconds=refresh_window)
+        self._credential_source = kwargs.get('credential_source', TridentCredentials.retrieve)
+        self._credentials = None
+        self._signing_date = None
+        self._signing_key = None
+        self._lock = threading.Lock()
 
     @classmethod
-    def get_for_writer(cls, **kwargs):
-        endpoint = kwargs.get('graph_db_endpoint', os.getenv('GRAPH_DB_ENDPOINT', None))
-        return cls(endpoint)
+    def get_for_endpoint(cls, neptune_endpoint, **kwargs):
+        transport = cls._transports.get(neptune_endpoint)
+        if transport is not None:
+            return transport
+        with cls._transports_lock:
+            transport = cls._transports.get(neptune_endpoint)
+            if transport is None:
+                transport = cls(neptune_endpoint, **kwargs)
+                cls._transports[neptune_endpoint] = transport
+            return transport
 
-    @classmethod
-    def get_for_reader(cls, **kwargs):
-        endpoint = kwargs.get('graph_db_reader_endpoint', os.getenv('GRAPH_DB_READER_ENDPOINT', None))
-        return cls(endpoint)
+    def post(self, command):
+        response = self._post(command)
+        if response.status_code == 403:
+            self._refresh_credentials()
+            response = self._post(command)
+        return response
 
-    def send(self, command):
+    def _post(self, command):
         t = datetime.datetime.utcnow()
         amz_date = t.strftime('%Y%m%dT%H%M%SZ')
         date_stamp = t.strftime('%Y%m%d')
+        credentials, signing_key = self._get_signing_materials(date_stamp)
         canonical_request, request_parameters = self._generate_canonical_request(amz_date, command)
         credential_scope = self._generate_scope(date_stamp)
         string_to_sign = self._generate_string_to_sign(canonical_request, amz_date, credential_scope)
-        signature = self._generate_signature(string_to_sign, date_stamp)
-        headers = self._generate_headers(credential_scope, signature, amz_date)
-        get_results = self._session.post(self._request_url, headers=headers, data=request_parameters)
-        if get_results.status_code != 200:
-            raise RuntimeError(f'error passing command to remote database: {get_results.text}, command: {command}')
-        response_json = json.loads(get_results.text)
-        results = response_json['result']['data']
-        results = json.loads(json.dumps(results), cls=TridentDecoder)
-        return results
+        signature = hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
+        headers = self._generate_headers(credentials, credential_scope, signature, amz_date)
+        return self._session.post(self._request_url, headers=headers, data=request_parameters)
+
+    def _get_signing_materials(self, date_stamp):
+        with self._lock:
+            if self._credentials is None or self._credentials.is_expiring(self._refresh_window):
+                self._credentials = self._credential_source()
+                self._signing_date = None
+            if self._signing_date != date_stamp:
+                self._signing_key = self._get_signature_key(self._credentials.secret_key, date_stamp)
+                self._signing_date = date_stamp
+            return self._credentials, self._signing_key
+
+    def _refresh_credentials(self):
+        with self._lock:
+            self._credentials = None
+            self._signing_date = None
+            self._signing_key = None
 
     def _generate_canonical_request(self, amz_date, command):
         payload = json.dumps({'gremlin': command})
@@ -129,35 +252,59 @@ class TridentNotary:
     def _generate_scope(self, date_stamp):
         return f"{date_stamp}/{self._region}/{self._service}/aws4_request"
 
-    def _get_signature_key(self, date_stamp):
-        k_date = self._sign(f'AWS4{self._secret_key}'.encode('utf-8'), date_stamp)
+    def _get_signature_key(self, secret_key, date_stamp):
+        k_date = self._sign(f'AWS4{secret_key}'.encode('utf-8'), date_stamp)
         k_region = self._sign(k_date, self._region)
         k_service = self._sign(k_region, self._service)
         k_signing = self._sign(k_service, 'aws4_request')
         return k_signing
 
-    def _generate_signature(self, string_to_sign, date_stamp):
-        signing_key = self._get_signature_key(date_stamp)
-        signature = hmac.new(signing_key, string_to_sign.encode('utf-8'), hashlib.sha256).hexdigest()
-        return signature
-
-    def _generate_headers(self, credential_scope, signature, amz_date):
-        credentials_entry = f'Credential={self._access_key}/{credential_scope}'
+    def _generate_headers(self, credentials, credential_scope, signature, amz_date):
+        credentials_entry = f'Credential={credentials.access_key}/{credential_scope}'
         headers_entry = f'SignedHeaders={self._signed_headers}'
         signature_entry = f'Signature={signature}'
         authorization_header = f"{self._algorithm} {credentials_entry}, {headers_entry}, {signature_entry}"
         headers = {'x-amz-date': amz_date, 'Authorization': authorization_header}
-        if self._session_token:
-            headers['x-amz-security-token'] = self._session_token
+        if credentials.session_token:
+            headers['x-amz-security-token'] = credentials.session_token
         return headers
 
-    @classmethod
-    def _generate_request_parameters(cls, command):
-        payload = {'gremlin': command}
-        request_parameters = urllib.parse.urlencode(payload, quote_via=urllib.parse.quote)
-        payload_hash = hashlib.sha256(''.encode('utf-8')).hexdigest()
-        return payload_hash, request_parameters
-
     @classmethod
     def _sign(cls, key, message):
         return hmac.new(key, message.encode('utf-8'), hashlib.sha256).digest()
+
+
+class TridentNotary:
+    def __init__(self, neptune_endpoint, session=None):
+        if neptune_endpoint is None:
+            raise RuntimeError('must specify neptune endpoint when calling the trident_notary')
+        if session:
+            transport = TridentTransport(neptune_endpoint, session)
+        else:
+            transport = TridentTransport.get_for_endpoint(neptune_endpoint)
+        self._transport = transport
+        self._neptune_endpoint = neptune_endpoint
+
+    @classmethod
+    def get_for_writer(cls, **kwargs):
+        endpoint = kwargs.get('graph_db_endpoint', os.getenv('GRAPH_DB_ENDPOINT', None))
+        return cls(endpoint)
+
+    @classmethod
+    def get_for_reader(cls, **kwargs):
+        endpoint = kwargs.get('graph_db_reader_endpoint', os.getenv('GRAPH_DB_READER_ENDPOINT', None))
+        return cls(endpoint)
+
+    def send(self, command):
+        get_results = self._post(command)
+        return TridentDecoder.decode_results(get_results.content)
+
+    def stream(self, command):
+        get_results = self._post(command)
+        return TridentDecoder.stream_results(get_results.content)
+
+    def _post(self, command):
+        get_results = self._transport.post(command)
+        if get_results.status_code != 200:
+            raise RuntimeError(f'error passing command to remote database: {get_results.text}, command: {command}')
+        return get_results
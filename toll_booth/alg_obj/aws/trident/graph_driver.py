@@ -1,3 +1,7 @@
+import threading
+import time
+from queue import Queue, Full
+
 from toll_booth.alg_obj.aws.trident.connections import TridentNotary
 
 
@@ -38,11 +42,16 @@ class TridentDriver:
 
 
 class TridentScanner:
+    _hex_digits = '0123456789abcdef'
+
     def __init__(self, object_type, object_properties=None, is_edge=False, **kwargs):
         if not object_properties:
             object_properties = {}
         self._object_type = object_type
-        self._trident_notary = kwargs.get('trident_notary', TridentNotary.get_for_reader(**kwargs))
+        trident_notary = kwargs.get('trident_notary')
+        if trident_notary is None:
+            trident_notary = TridentNotary.get_for_reader(**kwargs)
+        self._trident_notary = trident_notary
         self._object_properties = object_properties
         object_identifier = 'V'
         if is_edge:
@@ -50,6 +59,11 @@ class TridentScanner:
         self._object_identifier = object_identifier
         self._is_edge = is_edge
         self._segment_size = kwargs.get('segment_size', 50)
+        self._min_segment_size = kwargs.get('min_segment_size', 10)
+        self._max_segment_size = kwargs.get('max_segment_size', 2000)
+        self._target_latency = kwargs.get('target_latency', 1.0)
+        self._worker_count = kwargs.get('worker_count', 4)
+        self._queue_size = kwargs.get('queue_size', 2000)
 
     def get_max_min_internal_id(self):
         query = self._build_max_min_query()
@@ -60,35 +74,118 @@ class TridentScanner:
         return max_id[0], min_id[0]
 
     def full_scan(self):
-        scan_results = []
-        results, cursor = self._scan()
-        scan_results.extend(results)
-        while cursor != 0:
-            results, cursor = self._scan(after_value=cursor)
-            scan_results.extend(results)
-        return scan_results
-
-    def scan(self, cursor=0):
-        results, cursor = self._scan(after_value=cursor)
-        return cursor, results
-
-    def _scan(self, after_value=0):
-        scan_query = self._build_scan_query()
-        next_value = after_value + self._segment_size
-        query = scan_query % (after_value, next_value)
-        results = self._trident_notary.send(query)
-        if not results:
-            next_value = 0
-        return results, next_value
+        return [x for x in self.stream()]
+
+    def stream(self, after_id=None, before_id=None, inclusive=False):
+        segment_size = self._segment_size
+        cursor = after_id
+        while True:
+            started = time.monotonic()
+            results = self._scan(cursor, before_id, segment_size, inclusive)
+            elapsed = time.monotonic() - started
+            for result in results:
+                yield result
+            if len(results) < segment_size:
+                return
+            cursor = self._derive_object_id(results[-1])
+            inclusive = False
+            segment_size = self._adjust_segment_size(segment_size, elapsed)
+
+    def parallel_stream(self, partitions=None):
+        if not partitions:
+            partitions = self.generate_id_partitions(self._worker_count)
+        results = Queue(maxsize=self._queue_size)
+        stop_signal = threading.Event()
+        workers = []
+        for lower, upper in partitions:
+            worker_kwargs = {'lower': lower, 'upper': upper, 'results': results, 'stop_signal': stop_signal}
+            worker = threading.Thread(target=self._stream_partition, kwargs=worker_kwargs, daemon=True)
+            worker.start()
+            workers.append(worker)
+        finished = 0
+        try:
+            while finished < len(workers):
+                result = results.get()
+                if result is _PartitionComplete:
+                    finished += 1
+                    continue
+                if isinstance(result, _PartitionFailed):
+                    raise result.exception
+                yield result
+        finally:
+            stop_signal.set()
+
+    def scan(self, cursor=None):
+        results = self._scan(cursor, None, self._segment_size)
+        if len(results) < self._segment_size:
+            return None, results
+        return self._derive_object_id(results[-1]), results
+
+    @classmethod
+    def generate_id_partitions(cls, partition_count):
+        partition_count = max(1, min(partition_count, len(cls._hex_digits)))
+        boundaries = [cls._hex_digits[(x * len(cls._hex_digits)) // partition_count] for x in range(partition_count)]
+        partitions = []
+        for position, lower in enumerate(boundaries):
+            upper = None
+            if position + 1 < len(boundaries):
+                upper = boundaries[position + 1]
+            if position == 0:
+                lower = None
+            partitions.append((lower, upper))
+        return partitions
+
+    def _stream_partition(self, lower, upper, results, stop_signal):
+        try:
+            for result in self.stream(lower, upper, inclusive=True):
+                if not self._put_result(results, result, stop_signal):
+                    return
+            self._put_result(results, _PartitionComplete, stop_signal)
+        except Exception as e:
+            self._put_result(results, _PartitionFailed(e), stop_signal)
+
+    @classmethod
+    def _put_result(cls, results, result, stop_signal):
+        while not stop_signal.is_set():
+            try:
+                results.put(result, timeout=1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _scan(self, after_id, before_id, segment_size, inclusive=False):
+        query = self._build_scan_query(after_id, before_id, segment_size, inclusive)
+        return [x for x in self._trident_notary.stream(query)]
+
+    def _adjust_segment_size(self, segment_size, elapsed):
+        if elapsed > self._target_latency:
+            return max(self._min_segment_size, segment_size // 2)
+        if elapsed < self._target_latency / 2:
+            return min(self._max_segment_size, segment_size * 2)
+        return segment_size
+
+    def _derive_object_id(self, result):
+        if self._is_edge:
+            return result.internal_id
+        return result.vertex_id
 
     def _build_max_min_query(self):
         query = f"g.{self._object_identifier}().hasLabel('{self._object_type}')" \
                 f"{self._build_properties()}.order().by(id, %s).limit(1).id()"
         return query
 
-    def _build_scan_query(self):
+    def _build_scan_query(self, after_id, before_id, segment_size, inclusive=False):
+        bounds = []
+        if after_id is not None:
+            comparison = 'gt'
+            if inclusive:
+                comparison = 'gte'
+            bounds.append(f".has(id, {comparison}('{after_id}'))")
+        if before_id is not None:
+            bounds.append(f".has(id, lt('{before_id}'))")
         query = f"g.{self._object_identifier}().hasLabel('{self._object_type}')" \
-                f"{self._build_properties()}.order().by(id, incr).range(%s, %s)"
+                f"{''.join(bounds)}{self._build_properties()}.order().by(id, incr).limit({segment_size})"
         return query
 
     def _build_properties(self):
@@ -96,3 +193,12 @@ class TridentScanner:
         for property_name, object_property in self._object_properties.items():
             results.append(f".has('{property_name}', '{object_property}')")
         return ''.join(results)
+
+
+class _PartitionComplete:
+    pass
+
+
+class _PartitionFailed:
+    def __init__(self, exception):
+        self.exception = exception
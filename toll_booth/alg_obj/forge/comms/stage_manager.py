@@ -1,10 +1,7 @@
-import json
 import logging
 import os
 
-import boto3
-
-from toll_booth.alg_obj.serializers import AlgEncoder, AlgDecoder
+from toll_booth.alg_obj.aws.couriers.courier import LambdaCourier, LambdaInvocationException
 
 
 class RemoteFunctionExecutionException(Exception):
@@ -30,16 +27,33 @@ class RemoteFunctionExecutionException(Exception):
 class StageManager:
     @classmethod
     def _run(cls, function_name, step_args, payload):
-        client = boto3.client('lambda')
-        response = client.invoke(
-            FunctionName=function_name,
-            InvocationType='RequestResponse',
-            Payload=json.dumps(payload, cls=AlgEncoder)
-        )
-        if response['StatusCode'] != 200:
-            raise RemoteFunctionExecutionException.generate(function_name, step_args, response)
-        result_stream = response['Payload'].read()
-        return json.loads(result_stream, cls=AlgDecoder)
+        courier = LambdaCourier.get_courier()
+        try:
+            return courier.invoke(function_name, payload)
+        except LambdaInvocationException as e:
+            raise RemoteFunctionExecutionException(
+                function_name, step_args, e.status_code, e.function_error, e.details)
+
+    @classmethod
+    def _run_many(cls, function_name, step_name, step_args_list):
+        courier = LambdaCourier.get_courier()
+        pending = [(x, courier.submit(function_name, {'step_name': step_name, 'step_args': x})) for x in step_args_list]
+        results = []
+        for step_args, future in pending:
+            try:
+                results.append(future.result())
+            except LambdaInvocationException as e:
+                raise RemoteFunctionExecutionException(
+                    function_name, step_args, e.status_code, e.function_error, e.details)
+        return results
+
+    @classmethod
+    def dispatch(cls, function_name, step_name, step_args):
+        payload = {
+            'step_name': step_name,
+            'step_args': step_args
+        }
+        return LambdaCourier.get_courier().dispatch(function_name, payload)
 
     @classmethod
     def run_index_query(cls, function_name, step_args):
@@ -57,10 +71,14 @@ class StageManager:
         }
         logging.info('started to run an extraction with payload: %s' % payload)
         results = cls._run(function_name, step_args, payload)
-        results = json.loads(results, cls=AlgDecoder)
         logging.info('completed an extraction with payload: %s, results: %s' % (payload, results))
         return results
 
+    @classmethod
+    def run_extractions(cls, function_name, step_args_list):
+        logging.info(f'started to run {len(step_args_list)} extractions concurrently on {function_name}')
+        return cls._run_many(function_name, 'extraction', step_args_list)
+
     @classmethod
     def run_monitoring_extraction(cls, function_name, step_args):
         payload = {
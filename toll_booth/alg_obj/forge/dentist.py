@@ -17,15 +17,26 @@ class Dentist:
     @classmethod
     def extract_bulk(cls, metal_orders):
         results = []
+        dentists = {}
         for metal_order in metal_orders:
             dentist = cls(metal_order)
-            result = dentist.extract()
-            results.append(result)
+            function_name = dentist._extraction_function_name
+            if function_name not in dentists:
+                dentists[function_name] = []
+            dentists[function_name].append(dentist)
+        for function_name, function_dentists in dentists.items():
+            extractions = StageManager.run_extractions(
+                function_name, [x._extraction_properties for x in function_dentists])
+            for dentist, extracted_data in zip(function_dentists, extractions):
+                results.append(dentist._process_extraction(extracted_data))
         return results
 
     def extract(self):
         extracted_data = StageManager.run_extraction(
             self._extraction_function_name, self._extraction_properties)
+        return self._process_extraction(extracted_data)
+
+    def _process_extraction(self, extracted_data):
         source_data = extracted_data['source']
         if len(source_data) > 1:
             raise InvalidExtractionMultipleSourceException(self._extraction_function_name, self._extraction_order)
@@ -1,41 +1,202 @@
+import logging
+import os
+import threading
+from datetime import datetime
+
+import boto3
+from botocore.exceptions import ClientError
+
 from toll_booth.alg_obj import AlgObject
 
+_working = 'working'
+
 
 class CachedEmployeeIds:
-    def __init__(self, emp_ids=None):
-        if not emp_ids:
-            emp_ids = {}
+    _stores = {}
+    _ambiguous_stores = {}
+    _store_lock = threading.Lock()
+
+    def __init__(self, emp_ids=None, **kwargs):
+        domain_name = kwargs.get('domain_name')
+        cache_name = kwargs.get('cache_name', 'emp_ids')
+        table_name = kwargs.get('emp_id_cache_table', os.getenv('EMP_ID_CACHE_TABLE'))
+        self._domain_name = domain_name
+        self._cache_key = f'{domain_name}#{cache_name}'
+        self._emp_id_ttl = kwargs.get('emp_id_ttl', int(os.getenv('EMP_ID_CACHE_TTL', 604800)))
+        self._negative_ttl = kwargs.get('negative_ttl', int(os.getenv('EMP_ID_CACHE_NEGATIVE_TTL', 86400)))
+        self._lock = threading.RLock()
         self._promises = {}
-        self._names = {}
-        self._emp_ids = emp_ids
+        self._working = set()
+        self._store = self._get_store(self._stores, domain_name, self._cache_key)
+        self._ambiguous = self._get_store(self._ambiguous_stores, domain_name, self._cache_key)
+        self._table = kwargs.get('table')
+        if self._table is None and table_name and domain_name:
+            self._table = boto3.resource('dynamodb').Table(table_name)
+        if emp_ids:
+            for full_name, emp_id in emp_ids.items():
+                self._set_local(full_name, emp_id)
+
+    @classmethod
+    def _get_store(cls, stores, domain_name, cache_key):
+        if domain_name is None:
+            return {}
+        with cls._store_lock:
+            return stores.setdefault(cache_key, {})
+
+    @classmethod
+    def clear(cls):
+        with cls._store_lock:
+            cls._stores.clear()
+            cls._ambiguous_stores.clear()
 
     @property
     def emp_ids(self):
-        return self._emp_ids
+        now = datetime.utcnow().timestamp()
+        with self._lock:
+            emp_ids = {x: y[0] for x, y in self._store.items() if y[1] > now}
+            emp_ids.update({x: _working for x in self._working})
+        return emp_ids
 
     def add_emp_id(self, last_name, first_initial, emp_id):
         full_name = self._build_name(last_name, first_initial)
-        self._emp_ids[full_name] = emp_id
+        with self._lock:
+            self._set_local(full_name, emp_id)
+            self._working.discard(full_name)
+        self._put_stored(full_name, emp_id)
+
+    def warm_up(self, emp_names):
+        warmed_ids = {}
+        for last_name, first_initial, emp_id in emp_names:
+            warmed_ids.setdefault(self._build_name(last_name, first_initial), set()).add(emp_id)
+        new_names = []
+        conflicted_names = []
+        with self._lock:
+            for full_name, emp_ids in warmed_ids.items():
+                if full_name in self._ambiguous:
+                    continue
+                current_id = self._get_local(full_name)
+                if len(emp_ids) > 1 or (current_id and current_id not in emp_ids):
+                    self._ambiguous[full_name] = True
+                    self._store.pop(full_name, None)
+                    conflicted_names.append(full_name)
+                    continue
+                emp_id = emp_ids.pop()
+                if current_id != emp_id:
+                    new_names.append((full_name, emp_id))
+                self._set_local(full_name, emp_id)
+                self._working.discard(full_name)
+        if conflicted_names:
+            logging.warning(f'names: {conflicted_names} belong to more than one emp_id, '
+                            f'they will be searched for rather than cached')
+        self._delete_stored_batch(conflicted_names)
+        self._put_stored_batch(new_names)
+        return len(new_names)
 
-    def get_emp_id(self, last_name, first_initial, timestamp):
+    def get_emp_id(self, last_name, first_initial, timestamp=None):
         full_name = self._build_name(last_name, first_initial)
-        emp_id = self._emp_ids.get(full_name, None)
-        if emp_id == 'working':
-            self._promises[timestamp] = full_name
-            return PromiseToken(timestamp, self.fill_promise)
-        return emp_id
+        with self._lock:
+            if full_name in self._working:
+                self._promises[timestamp] = full_name
+                return PromiseToken(timestamp, self.fill_promise)
+            emp_id = self._get_local(full_name)
+            if emp_id is not None:
+                return emp_id
+            emp_id = self._get_stored(full_name)
+            if emp_id is not None:
+                self._set_local(full_name, emp_id)
+                return emp_id
+            self._working.add(full_name)
+            return None
 
     def mark_emp_id_working(self, last_name, first_initial, timestamp):
         full_name = self._build_name(last_name, first_initial)
-        self._emp_ids[full_name] = 'working'
-        self._promises[timestamp] = full_name
+        with self._lock:
+            self._working.add(full_name)
+            self._promises[timestamp] = full_name
+
+    def release_emp_id(self, last_name, first_initial):
+        full_name = self._build_name(last_name, first_initial)
+        with self._lock:
+            if full_name not in self._working:
+                return
+            self._working.discard(full_name)
+            self._promises = {x: y for x, y in self._promises.items() if y != full_name}
 
     def fill_promise(self, timestamp):
-        promised_name = self._promises[timestamp]
-        emp_id = self._emp_ids[promised_name]
-        del(self._promises[timestamp])
+        with self._lock:
+            promised_name = self._promises.pop(timestamp, None)
+            if promised_name is None:
+                raise RuntimeError(f'the emp_id promised for {timestamp} was released before it was found')
+            if promised_name in self._working:
+                return _working
+            return self._get_local(promised_name, include_expired=True)
+
+    def _get_local(self, full_name, include_expired=False):
+        entry = self._store.get(full_name)
+        if entry is None:
+            return None
+        emp_id, expires_at = entry
+        if not include_expired and expires_at <= datetime.utcnow().timestamp():
+            return None
         return emp_id
 
+    def _set_local(self, full_name, emp_id):
+        self._store[full_name] = (emp_id, self._generate_expiration(emp_id))
+
+    def _generate_expiration(self, emp_id):
+        ttl = self._emp_id_ttl
+        if not emp_id:
+            ttl = self._negative_ttl
+        return int(datetime.utcnow().timestamp() + ttl)
+
+    def _get_stored(self, full_name):
+        if self._table is None:
+            return None
+        try:
+            item = self._table.get_item(Key={'domain_name': self._cache_key, 'emp_name': full_name}).get('Item')
+        except ClientError as e:
+            logging.warning(f'could not retrieve the cached emp_id for {full_name}, {e}')
+            return None
+        if item is None or item['expires_at'] <= datetime.utcnow().timestamp():
+            return None
+        return item['emp_id']
+
+    def _put_stored(self, full_name, emp_id):
+        if self._table is None:
+            return
+        try:
+            self._table.put_item(Item=self._generate_item(full_name, emp_id))
+        except ClientError as e:
+            logging.warning(f'could not store the cached emp_id for {full_name}, {e}')
+
+    def _put_stored_batch(self, emp_names):
+        if self._table is None or not emp_names:
+            return
+        try:
+            with self._table.batch_writer(overwrite_by_pkeys=['domain_name', 'emp_name']) as batch:
+                for full_name, emp_id in emp_names:
+                    batch.put_item(Item=self._generate_item(full_name, emp_id))
+        except ClientError as e:
+            logging.warning(f'could not store {len(emp_names)} cached emp_ids for {self._domain_name}, {e}')
+
+    def _delete_stored_batch(self, full_names):
+        if self._table is None or not full_names:
+            return
+        try:
+            with self._table.batch_writer(overwrite_by_pkeys=['domain_name', 'emp_name']) as batch:
+                for full_name in full_names:
+                    batch.delete_item(Key={'domain_name': self._cache_key, 'emp_name': full_name})
+        except ClientError as e:
+            logging.warning(f'could not remove {len(full_names)} cached emp_ids for {self._domain_name}, {e}')
+
+    def _generate_item(self, full_name, emp_id):
+        return {
+            'domain_name': self._cache_key,
+            'emp_name': full_name,
+            'emp_id': emp_id,
+            'expires_at': self._generate_expiration(emp_id)
+        }
+
     @classmethod
     def _build_name(cls, last_name, first_initial):
         return f'{last_name}, {first_initial}'
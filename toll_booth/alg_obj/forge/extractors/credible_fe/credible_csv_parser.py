@@ -1,10 +1,112 @@
 import csv
 import datetime
 import io
+import os
+import re
 from decimal import Decimal
 
 import pytz
 
+_datetime_format = '%m/%d/%Y %I:%M:%S %p'
+_date_format = '%m/%d/%Y'
+_datetime_pattern = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4}) (\d{1,2}):(\d{1,2}):(\d{1,2}) ([AaPp])[Mm]\Z')
+_date_pattern = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})\Z')
+_number_pattern = re.compile(r'-?\d+(\.\d+)?\Z')
+
+
+def _parse_full_datetime(entry):
+    match = _datetime_pattern.match(entry)
+    if match is None:
+        return None
+    month, day, year, hour, minute, second, meridiem = match.groups()
+    hour = int(hour)
+    if not 1 <= hour <= 12:
+        return None
+    if hour == 12:
+        hour = 0
+    if meridiem in 'Pp':
+        hour += 12
+    try:
+        return datetime.datetime(int(year), int(month), int(day), hour, int(minute), int(second))
+    except ValueError:
+        return None
+
+
+def _parse_date_only(entry):
+    match = _date_pattern.match(entry)
+    if match is None:
+        return None
+    month, day, year = match.groups()
+    try:
+        return datetime.datetime(int(year), int(month), int(day))
+    except ValueError:
+        return None
+
+
+class CsvColumn:
+    _date_parsers = (_parse_full_datetime, _parse_date_only)
+
+    def __init__(self, header_name, data_type):
+        self._header_name = header_name
+        self._data_type = data_type
+        self._preferred_parser = 0
+        self._convert = getattr(self, f'_convert_{data_type}', self._convert_string)
+
+    @property
+    def header_name(self):
+        return self._header_name
+
+    @property
+    def data_type(self):
+        return self._data_type
+
+    @property
+    def detected_format(self):
+        if self._data_type not in ('datetime', 'utc_datetime'):
+            return None
+        return (_datetime_format, _date_format)[self._preferred_parser]
+
+    def convert(self, entry):
+        if not entry:
+            return None
+        return self._convert(entry)
+
+    def convert_all(self, entries):
+        convert = self._convert
+        return [convert(x) if x else None for x in entries]
+
+    @classmethod
+    def _convert_string(cls, entry):
+        return str(entry)
+
+    @classmethod
+    def _convert_number(cls, entry):
+        return Decimal(entry)
+
+    @classmethod
+    def _convert_date(cls, entry):
+        converted = _parse_date_only(entry)
+        if converted is None:
+            converted = datetime.datetime.strptime(entry, _date_format)
+        return converted
+
+    def _convert_datetime(self, entry):
+        converted = self._date_parsers[self._preferred_parser](entry)
+        if converted is not None:
+            return converted
+        for parser_index, date_parser in enumerate(self._date_parsers):
+            converted = date_parser(entry)
+            if converted is not None:
+                self._preferred_parser = parser_index
+                return converted
+        try:
+            return datetime.datetime.strptime(entry, _datetime_format)
+        except ValueError:
+            return datetime.datetime.strptime(f'{entry} 12:00:00 AM', _datetime_format)
+
+    def _convert_utc_datetime(self, entry):
+        return self._convert_datetime(entry).replace(tzinfo=pytz.UTC)
+
 
 class CredibleCsvParser:
     _field_value_maps = {
@@ -21,60 +123,77 @@ class CredibleCsvParser:
     }
 
     @classmethod
-    def parse_csv_response(cls, csv_string, key_name=None):
-        response = []
+    def parse_csv_response(cls, csv_string, key_name=None, schema=None, infer_types=False):
+        reader = cls._generate_reader(csv_string)
+        header = next(reader, [])
+        rows = list(reader)
+        columns = cls.generate_columns(header, schema, rows if infer_types else None)
+        if header and all(len(x) == len(header) for x in rows):
+            converted = [x.convert_all(y) for x, y in zip(columns, zip(*rows))]
+            entries = [dict(zip(header, x)) for x in zip(*converted)]
+        else:
+            entries = [cls._convert_row(header, columns, x) for x in rows]
         if key_name:
-            response = {}
-        header = []
-        first = True
-        with io.StringIO(csv_string, newline='\r\n') as csv_string:
-            reader = csv.reader(csv_string, delimiter=',', quotechar='"')
+            return {x[key_name]: x for x in entries}
+        return entries
+
+    @classmethod
+    def iter_csv_rows(cls, csv_lines, schema=None, infer_types=False, **kwargs):
+        sample_size = kwargs.get('sample_size', int(os.getenv('CREDIBLE_CSV_SAMPLE_ROWS', 100)))
+        reader = cls._generate_reader(csv_lines)
+        header = next(reader, [])
+        sample = []
+        if infer_types:
             for row in reader:
-                header_index = 0
-                row_entry = {}
-                if first:
-                    for entry in row:
-                        header.append(entry)
-                    first = False
-                    continue
-                for entry in row:
-                    try:
-                        header_name = header[header_index]
-                    except IndexError:
-                        raise RuntimeError(
-                            'the returned data from a csv query contained insufficient information to create the table')
-                    entry = cls._set_data_type(header_name, entry)
-                    row_entry[header_name] = entry
-                    header_index += 1
-                if key_name:
-                    key_value = row_entry[key_name]
-                    response[key_value] = row_entry
-                    continue
-                response.append(row_entry)
-        return response
+                sample.append(row)
+                if len(sample) >= sample_size:
+                    break
+        columns = cls.generate_columns(header, schema, sample if infer_types else None)
+        for row in sample:
+            yield cls._convert_row(header, columns, row)
+        for row in reader:
+            yield cls._convert_row(header, columns, row)
+
+    @classmethod
+    def generate_columns(cls, header, schema=None, sample_rows=None):
+        field_value_maps = cls._field_value_maps
+        if schema:
+            field_value_maps = field_value_maps.copy()
+            field_value_maps.update(schema)
+        columns = []
+        for column_index, header_name in enumerate(header):
+            data_type = field_value_maps.get(header_name)
+            if data_type is None and sample_rows:
+                data_type = cls._infer_data_type(x[column_index] for x in sample_rows if len(x) > column_index)
+            columns.append(CsvColumn(header_name, data_type or 'string'))
+        return columns
+
+    @classmethod
+    def _infer_data_type(cls, entries):
+        entries = [x for x in entries if x]
+        if not entries:
+            return 'string'
+        if all(_parse_full_datetime(x) or _parse_date_only(x) for x in entries):
+            if all(_parse_date_only(x) for x in entries):
+                return 'date'
+            return 'datetime'
+        if all(_number_pattern.match(x) for x in entries):
+            return 'number'
+        return 'string'
+
+    @classmethod
+    def _generate_reader(cls, csv_lines):
+        if isinstance(csv_lines, str):
+            csv_lines = io.StringIO(csv_lines, newline='\r\n')
+        return csv.reader(csv_lines, delimiter=',', quotechar='"')
+
+    @classmethod
+    def _convert_row(cls, header, columns, row):
+        if len(row) > len(header):
+            raise RuntimeError(
+                'the returned data from a csv query contained insufficient information to create the table')
+        return {x.header_name: x.convert(y) for x, y in zip(columns, row)}
 
     @classmethod
     def _set_data_type(cls, header_name, entry):
-        data_type = cls._field_value_maps.get(header_name, 'string')
-        if not entry:
-            return None
-        if data_type == 'string':
-            entry = str(entry)
-        if data_type == 'datetime':
-            try:
-                entry = datetime.datetime.strptime(entry, '%m/%d/%Y %I:%M:%S %p')
-            except ValueError:
-                entry = f'{entry} 12:00:00 AM'
-                entry = datetime.datetime.strptime(entry, '%m/%d/%Y %I:%M:%S %p')
-        if data_type == 'date':
-            entry = datetime.datetime.strptime(entry, '%m/%d/%Y')
-        if data_type == 'utc_datetime':
-            try:
-                entry = datetime.datetime.strptime(entry, '%m/%d/%Y %I:%M:%S %p')
-            except ValueError:
-                entry = f'{entry} 12:00:00 AM'
-                entry = datetime.datetime.strptime(entry, '%m/%d/%Y %I:%M:%S %p')
-            entry = entry.replace(tzinfo=pytz.UTC)
-        if data_type == 'number':
-            entry = Decimal(entry)
-        return entry
+        return CsvColumn(header_name, cls._field_value_maps.get(header_name, 'string')).convert(entry)
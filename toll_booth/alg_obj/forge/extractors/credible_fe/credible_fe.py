@@ -1,10 +1,10 @@
 import datetime
 import logging
 import re
+import threading
 from decimal import Decimal
 
 import bs4
-import pytz
 import requests
 from requests import cookies
 from retrying import retry
@@ -13,6 +13,8 @@ from toll_booth.alg_obj import AlgObject
 from toll_booth.alg_obj.aws.squirrels.squirrel import Opossum
 from toll_booth.alg_obj.forge.extractors.credible_fe.credible_csv_parser import CredibleCsvParser
 from toll_booth.alg_obj.forge.extractors.credible_fe.cache import CachedEmployeeIds
+from toll_booth.alg_obj.forge.extractors.credible_fe.fetcher import CredibleFetcher
+from toll_booth.alg_obj.forge.extractors.credible_fe.page_parser import CrediblePageParser
 
 _base_stem = 'https://www.crediblebh.com'
 _url_stems = {
@@ -40,6 +42,8 @@ class CredibleFrontEndLoginException(Exception):
 
 
 class CredibleLoginCredentials(AlgObject):
+    _refresh_lock = threading.Lock()
+
     def __init__(self, domain_name, cookie_value, time_generated):
         self._domain_name = domain_name
         self._cookie_value = cookie_value
@@ -115,12 +119,22 @@ class CredibleLoginCredentials(AlgObject):
         return cookie_age >= (lifetime_minutes * 60)
 
     def refresh_if_stale(self, lifetime_minutes=30, **kwargs):
-        if self.is_stale(lifetime_minutes):
-            self.refresh(**kwargs)
-
-    def refresh(self, session=None, username=None, password=None):
+        if not self.is_stale(lifetime_minutes):
+            return
+        with self._refresh_lock:
+            if self.is_stale(lifetime_minutes):
+                self._refresh(**kwargs)
+
+    def refresh(self, session=None, username=None, password=None, stale_cookie_value=None):
+        with self._refresh_lock:
+            if stale_cookie_value is not None and stale_cookie_value != self._cookie_value:
+                return
+            self._refresh(session, username, password)
+
+    def _refresh(self, session=None, username=None, password=None):
         new_credentials = self.retrieve(self._domain_name, session, username, password)
         self._cookie_value = new_credentials.cookie_value
+        self._time_generated = new_credentials.time_generated
 
     def destroy(self, session=None):
         if not session:
@@ -158,6 +172,7 @@ class CredibleFrontEndDriver:
         session.cookies = credentials.as_request_cookie_jar
         self._session = session
         self._credentials = credentials
+        self._fetcher = None
 
     def __enter__(self):
         session = requests.Session()
@@ -169,6 +184,9 @@ class CredibleFrontEndDriver:
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._fetcher is not None:
+            self._fetcher.close()
+            self._fetcher = None
         self._credentials.destroy(self._session)
         if exc_type:
             raise exc_val
@@ -182,6 +200,12 @@ class CredibleFrontEndDriver:
     def session(self):
         return self._session
 
+    @property
+    def fetcher(self):
+        if self._fetcher is None:
+            self._fetcher = CredibleFetcher(self._credentials)
+        return self._fetcher
+
     @_login_required
     def get_clients_max_min(self):
         with self:
@@ -376,24 +400,29 @@ class CredibleFrontEndDriver:
 
     def enrich_change_logs(self, **kwargs):
         enrichment = {}
-        cached_emp_ids = CachedEmployeeIds()
-        kwargs['cached_emp_ids'] = cached_emp_ids
-        enriched_data, page_number = self._get_changelog_page(**kwargs)
-        for enriched_name, entry in enriched_data.items():
-            enrichment[enriched_name] = entry
+        if 'cached_emp_ids' not in kwargs:
+            kwargs['cached_emp_ids'] = CachedEmployeeIds(domain_name=self._id_source)
+        page_number = kwargs.get('page_number', 1)
         while page_number is not None:
-            kwargs['page_number'] = page_number
-            enriched_data, page_number = self._get_changelog_page(**kwargs)
-            for enriched_name, entry in enriched_data.items():
-                enrichment[enriched_name].update(entry)
+            page_numbers = range(page_number, page_number + self.fetcher.max_workers)
+            page_texts = self.fetcher.fetch_all([self._generate_changelog_page_request(x, **kwargs) for x in page_numbers])
+            for window_page_number, page_text in zip(page_numbers, page_texts):
+                kwargs['page_number'] = window_page_number
+                enriched_data, page_number = self._parse_changelog_page(page_text, **kwargs)
+                for enriched_name, entry in enriched_data.items():
+                    if enriched_name not in enrichment:
+                        enrichment[enriched_name] = {}
+                    enrichment[enriched_name].update(entry)
+                if page_number is None:
+                    break
         return enrichment
 
     def _get_changelog_page(self, **kwargs):
-        changelog_data = {}
-        row_pattern = re.compile(
-            '(<table border=\"\d\"\scellpadding=\"\d\"\scellspacing=\"\d\"\swidth=\"[\d]+%\">)(?P<rows>[.\s\S]+?)(</table>)')
-        url = _base_stem + _url_stems[kwargs['driving_id_type']]
         page_number = kwargs.get('page_number', 1)
+        page_text = self.fetcher.fetch(**self._generate_changelog_page_request(page_number, **kwargs))
+        return self._parse_changelog_page(page_text, **kwargs)
+
+    def _generate_changelog_page_request(self, page_number, **kwargs):
         data = {
             kwargs['driving_id_name']: kwargs['driving_id_value'],
             'start_date': self._format_datetime_id_value(kwargs['local_max_value']),
@@ -401,17 +430,19 @@ class CredibleFrontEndDriver:
             'changelogtype_id': kwargs.get('action_id', ''),
             'page': page_number
         }
-        page_number += 1
-        response = self._session.post(url, data=data)
-        if response.status_code != 200:
-            raise RuntimeError('could not retrieve change details for %s' % data)
-        row_match = re.compile(row_pattern).search(response.text).group('rows')
-        row_soup = bs4.BeautifulSoup(row_match, features='html.parser')
+        return {'method': 'POST', 'url': _base_stem + _url_stems[kwargs['driving_id_type']], 'data': data}
+
+    def _parse_changelog_page(self, page_text, **kwargs):
+        changelog_data = {}
+        page_number = kwargs.get('page_number', 1) + 1
+        row_soup = CrediblePageParser.parse_changelog_table(page_text)
         table_rows = row_soup.find_all('tr')
         if len(table_rows) <= 3:
             page_number = None
         if kwargs.get('get_emp_ids'):
-            emp_ids = self._strain_emp_ids(table_rows, kwargs.get('cached_emp_ids'))
+            cached_emp_ids = kwargs.get('cached_emp_ids')
+            cached_emp_ids.warm_up(CrediblePageParser.parse_emp_id_names(table_rows))
+            emp_ids = self._strain_emp_ids(table_rows, cached_emp_ids)
             changelog_data['emp_ids'] = emp_ids
         if kwargs.get('get_details'):
             change_details = self._strain_change_details(row_soup)
@@ -536,55 +567,40 @@ class CredibleFrontEndDriver:
         results = self._session.get(url, data=data)
 
     def _strain_emp_ids(self, table_rows, cached_emp_ids):
-        name_pattern = re.compile("(?P<last_name>\w+),\s+(?P<first_initial>\w)")
         emp_ids = {}
-        for row in table_rows:
-            if 'style' in row.attrs:
-                utc_change_date_string = row.contents[15].string
+        for change_timestamp, last_name, first_initial in CrediblePageParser.parse_done_by_rows(table_rows):
+            emp_id = cached_emp_ids.get_emp_id(last_name, first_initial, change_timestamp)
+            if emp_id is None:
                 try:
-                    change_date_utc = datetime.datetime.strptime(utc_change_date_string, '%m/%d/%Y %I:%M:%S %p')
-                except ValueError:
-                    utc_change_date_string = f'{utc_change_date_string} 12:00:00 AM'
-                    change_date_utc = datetime.datetime.strptime(utc_change_date_string, '%m/%d/%Y %I:%M:%S %p')
-                change_date_utc = change_date_utc.replace(tzinfo=pytz.UTC)
-                done_by_entry = row.contents[9]
-                done_by_name = done_by_entry.string
-                matches = name_pattern.search(done_by_name)
-                last_name = matches.group('last_name')
-                first_initial = matches.group('first_initial')
-                emp_id = cached_emp_ids.get_emp_id(last_name, first_initial)
-                if emp_id is None:
-                    try:
-                        emp_id = self.search_employees(last_name, first_initial)
-                    except RuntimeError:
-                        logging.warning('could not determine the emp_id from their name: %s' %
-                                        f'{last_name}, {first_initial}, using default value of 0')
-                        emp_id = 0
-                    cached_emp_ids.add_emp_id(last_name, first_initial, emp_id)
-                emp_ids[change_date_utc.timestamp()] = emp_id
+                    emp_id = self.search_employees(last_name, first_initial)
+                except RuntimeError:
+                    logging.warning('could not determine the emp_id from their name: %s' %
+                                    f'{last_name}, {first_initial}, using default value of 0')
+                    emp_id = 0
+                except Exception as e:
+                    cached_emp_ids.release_emp_id(last_name, first_initial)
+                    raise e
+                cached_emp_ids.add_emp_id(last_name, first_initial, emp_id)
+            emp_ids[change_timestamp] = emp_id
         return emp_ids
 
     def _strain_change_details(self, row_soup):
         change_details = {}
-        table_rows = row_soup.find_all('a')
-        if len(table_rows) <= 6:
+        anchors = row_soup.find_all('a')
+        if len(anchors) <= 6:
             return {}
-        for row in table_rows:
-            if 'clid' in row.attrs:
-                changelog_id = row.attrs['clid']
-                # changelog_id = re.compile('changelog_id=(?P<changelog_id>\d+)').search(target).group('changelog_id')
-                changes = self.__get_change_details(changelog_id)
-                containing_row = row.parent.parent
-                utc_change_date_string = containing_row.contents[15].string
-                try:
-                    change_date_utc = datetime.datetime.strptime(utc_change_date_string, '%m/%d/%Y %I:%M:%S %p')
-                except ValueError:
-                    utc_change_date_string = f'{utc_change_date_string} 12:00:00 AM'
-                    change_date_utc = datetime.datetime.strptime(utc_change_date_string, '%m/%d/%Y %I:%M:%S %p')
-                change_date_utc = change_date_utc.replace(tzinfo=pytz.UTC)
-                change_details[change_date_utc.timestamp()] = changes
+        changelog_links = CrediblePageParser.parse_clid_links(anchors)
+        changelog_ids = [x[0] for x in changelog_links]
+        change_dates = [x[1] for x in changelog_links]
+        for change_date, changes in zip(change_dates, self.fetch_change_details(changelog_ids)):
+            change_details[change_date] = changes
         return change_details
 
+    def fetch_change_details(self, changelog_ids):
+        url = _base_stem + _url_stems['ChangeDetail']
+        detail_requests = [{'method': 'GET', 'url': url, 'params': {'changelog_id': x}} for x in changelog_ids]
+        return [self._parse_change_details(x) for x in self.fetcher.fetch_all(detail_requests)]
+
     def get_emp_ids(self, **kwargs):
         emp_ids = {}
         emps, page_number = self._get_emp_ids(**kwargs)
@@ -596,9 +612,6 @@ class CredibleFrontEndDriver:
         return emp_ids
 
     def _get_emp_ids(self, **kwargs):
-        emp_ids = {}
-        row_pattern = re.compile(
-            '(<table border=\"\d\"\scellpadding=\"\d\"\scellspacing=\"\d\"\swidth=\"[\d]+%\">)(?P<rows>[.\s\S]+?)(</table>)')
         page_number = kwargs.get('page_number', 1)
         url = _base_stem + _url_stems[kwargs['driving_id_type']]
         data = {
@@ -610,23 +623,14 @@ class CredibleFrontEndDriver:
         }
         page_number += 1
         response = self._session.post(url, data=data)
-        row_match = row_pattern.search(response.text).group('rows')
-        row_soup = bs4.BeautifulSoup(row_match)
+        row_soup = CrediblePageParser.parse_changelog_table(response.text)
         table_rows = row_soup.find_all('tr')
         if len(table_rows) <= 3:
             return [], None
-        for row in table_rows:
-            if 'style' in row.attrs:
-                utc_change_date = row.contents[15].string
-                entry = datetime.datetime.strptime(utc_change_date, '%m/%d/%Y %I:%M:%S %p')
-                entry = entry.timestamp()
-                change_time = datetime.datetime.fromtimestamp(entry, tz=datetime.timezone.utc)
-                emp_entry = row.contents[3]
-                numeric_inside = re.compile('(?P<outside>[\w\s]+?)\s*\((?P<inside>[\d]+)\)')
-                match = numeric_inside.search(emp_entry.string).group('inside')
-                emp_id = Decimal(match)
-                emp_ids[change_time] = emp_id
-        return emp_ids, page_number
+        cached_emp_ids = kwargs.get('cached_emp_ids')
+        if cached_emp_ids is not None:
+            cached_emp_ids.warm_up(CrediblePageParser.parse_emp_id_names(table_rows))
+        return CrediblePageParser.parse_emp_id_rows(table_rows), page_number
 
     def get_change_details(self, **kwargs):
         details = {}
@@ -640,7 +644,6 @@ class CredibleFrontEndDriver:
 
     def _get_change_details(self, **kwargs):
         change_details = {}
-        row_pattern = '(<table border=\"\d\"\scellpadding=\"\d\"\scellspacing=\"\d\"\swidth=\"[\d]+%\">)(?P<rows>[.\s\S]+?)(<\/table>)'
         url = _base_stem + _url_stems[kwargs['driving_id_type']]
         page_number = kwargs.get('page_number', 1)
         data = {
@@ -654,40 +657,20 @@ class CredibleFrontEndDriver:
         response = self._session.post(url, data=data)
         if response.status_code != 200:
             raise RuntimeError('could not retrieve change details for %s' % data)
-        row_match = re.compile(row_pattern).search(response.text).group('rows')
-        row_soup = bs4.BeautifulSoup(row_match)
-        table_rows = row_soup.find_all('a')
-        if len(table_rows) <= 6:
+        row_soup = CrediblePageParser.parse_changelog_table(response.text)
+        anchors = row_soup.find_all('a')
+        if len(anchors) <= 6:
             return [], None
-        for row in table_rows:
-            if 'href' in row.attrs and 'title' in row.attrs and row.attrs['href'] != '#':
-                target = row.attrs['href']
-                changelog_id = re.compile('changelog_id=(?P<changelog_id>\d+)').search(target).group('changelog_id')
-                changes = self.__get_change_details(changelog_id)
-                containing_row = row.parent.parent
-                change_date_string = containing_row.contents[15].string
-                change_date = datetime.datetime.strptime(change_date_string, '%m/%d/%Y %I:%M:%S %p')
-                change_date = change_date.timestamp()
-                change_date = datetime.datetime.fromtimestamp(change_date, tz=datetime.timezone.utc)
-                change_details[change_date] = changes
+        changelog_links = CrediblePageParser.parse_href_links(anchors)
+        changelog_ids = [x[0] for x in changelog_links]
+        change_dates = [x[1] for x in changelog_links]
+        for change_date, changes in zip(change_dates, self.fetch_change_details(changelog_ids)):
+            change_details[change_date] = changes
         return change_details, page_number
 
-    @retry(wait_exponential_multiplier=1000, wait_exponential_max=10000)
-    @_login_required
-    def __get_change_details(self, changelog_id):
-        changes = []
-        url = _base_stem + _url_stems['ChangeDetail']
-        response = self._session.get(url, params={'changelog_id': changelog_id})
-        detail_soup = bs4.BeautifulSoup(response.content, features='html.parser')
-        all_rows = detail_soup.find_all('tr')
-        interesting_rows = all_rows[4:]
-        for row in interesting_rows:
-            changes.append({
-                'id_name': str(row.contents[1].string).lower(),
-                'old_value': str(row.contents[3].string),
-                'new_value': str(row.contents[5].string)
-            })
-        return changes
+    @classmethod
+    def _parse_change_details(cls, detail_page):
+        return CrediblePageParser.parse_change_details(detail_page)
 
     @classmethod
     def _format_datetime_id_value(cls, id_value):
@@ -0,0 +1,166 @@
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+
+
+class CredibleFetchException(Exception):
+    pass
+
+
+class DomainRateLimiter:
+    _limiters = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, requests_per_second):
+        self._interval = 0
+        if requests_per_second:
+            self._interval = 1.0 / requests_per_second
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_for_domain(cls, domain_name, requests_per_second):
+        limiter_key = (domain_name, requests_per_second)
+        with cls._registry_lock:
+            if limiter_key not in cls._limiters:
+                cls._limiters[limiter_key] = cls(requests_per_second)
+            return cls._limiters[limiter_key]
+
+    @property
+    def interval(self):
+        return self._interval
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+
+
+class CredibleFetcher:
+    _retry_status_codes = (429, 500, 502, 503, 504)
+    _logged_out_status_codes = (401, 403)
+
+    def __init__(self, credentials, **kwargs):
+        max_workers = kwargs.get('max_workers', int(os.getenv('CREDIBLE_FETCH_WORKERS', 8)))
+        requests_per_second = kwargs.get(
+            'requests_per_second', float(os.getenv('CREDIBLE_REQUESTS_PER_SECOND', 10)))
+        max_attempts = kwargs.get('max_attempts', int(os.getenv('CREDIBLE_FETCH_ATTEMPTS', 5)))
+        self._credentials = credentials
+        self._max_workers = max_workers
+        self._requests_per_second = requests_per_second
+        self._max_attempts = max_attempts
+        self._backoff_base = kwargs.get('backoff_base', 0.5)
+        self._backoff_cap = kwargs.get('backoff_cap', 10)
+        self._session_factory = kwargs.get('session_factory', requests.Session)
+        self._local = threading.local()
+        self._sessions = []
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def credentials(self):
+        return self._credentials
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    def fetch(self, method, url, **kwargs):
+        domain_name = urlparse(url).netloc
+        limiter = DomainRateLimiter.get_for_domain(domain_name, self._requests_per_second)
+        attempt = 0
+        while True:
+            attempt += 1
+            self._credentials.refresh_if_stale()
+            session, cookie_value = self._get_session()
+            limiter.acquire()
+            try:
+                response = session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                if attempt >= self._max_attempts:
+                    raise CredibleFetchException(f'could not {method} {url} after {attempt} attempts: {e}')
+                logging.warning(f'{method} {url} raised {e}, attempt {attempt} of {self._max_attempts}')
+                self._back_off(attempt)
+                continue
+            if self._is_logged_out(response):
+                if attempt >= self._max_attempts:
+                    raise CredibleFetchException(f'credible session for {url} could not be restored')
+                logging.info(f'credible session expired while calling {url}, refreshing the login cookie')
+                self._credentials.refresh(stale_cookie_value=cookie_value)
+                continue
+            if response.status_code in self._retry_status_codes:
+                if attempt >= self._max_attempts:
+                    raise CredibleFetchException(
+                        f'could not {method} {url} after {attempt} attempts, response code: {response.status_code}')
+                logging.warning(f'{method} {url} returned {response.status_code}, '
+                                f'attempt {attempt} of {self._max_attempts}')
+                self._back_off(attempt)
+                continue
+            if response.status_code != 200:
+                raise CredibleFetchException(f'could not {method} {url}, response code: {response.status_code}')
+            return response.text
+
+    def fetch_all(self, fetch_requests):
+        fetch_requests = list(fetch_requests)
+        if not fetch_requests:
+            return []
+        return list(self._get_executor().map(lambda x: self.fetch(**x), fetch_requests))
+
+    def close(self):
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+            sessions, self._sessions = self._sessions, []
+        if executor is not None:
+            executor.shutdown(wait=True)
+        for session in sessions:
+            close = getattr(session, 'close', None)
+            if close is not None:
+                close()
+        self._local = threading.local()
+
+    def _get_executor(self):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix='credible_fetcher')
+            return self._executor
+
+    def _get_session(self):
+        cookie_value = self._credentials.cookie_value
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._session_factory()
+            with self._executor_lock:
+                self._sessions.append(session)
+            self._local.session = session
+            self._local.cookie_value = None
+        if self._local.cookie_value != cookie_value:
+            session.cookies = self._credentials.as_request_cookie_jar
+            self._local.cookie_value = cookie_value
+        return session, cookie_value
+
+    def _back_off(self, attempt):
+        ceiling = min(self._backoff_cap, self._backoff_base * (2 ** (attempt - 1)))
+        time.sleep(random.uniform(0, ceiling))
+
+    @classmethod
+    def _is_logged_out(cls, response):
+        if response.status_code in cls._logged_out_status_codes:
+            return True
+        return 'login' in str(getattr(response, 'url', '')).lower()
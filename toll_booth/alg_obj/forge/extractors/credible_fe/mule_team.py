@@ -1,100 +1,170 @@
-import datetime
 import logging
-import re
 import threading
 import time
-from collections import deque
 from decimal import Decimal
-from queue import Queue
-
-import bs4
-import pytz
+from queue import Queue, Empty
 
 from toll_booth.alg_obj.forge.extractors.credible_fe import CredibleFrontEndDriver
 from toll_booth.alg_obj.forge.extractors.credible_fe.base_stems import BASE_STEM, URL_STEMS
 from toll_booth.alg_obj.forge.extractors.credible_fe.cache import CachedEmployeeIds
 from toll_booth.alg_obj.forge.extractors.credible_fe.credible_csv_parser import CredibleCsvParser
-from toll_booth.alg_obj.forge.extractors.credible_fe.regex_patterns import ROW_PATTERN, NAME_PATTERN
-from toll_booth.alg_obj.utils import recursively_update
+from toll_booth.alg_obj.forge.extractors.credible_fe.page_parser import CrediblePageParser
+from toll_booth.alg_obj.forge.extractors.credible_fe.regex_patterns import NAME_REGEX
 
 
 class CredibleMuleTeam:
     def __init__(self, id_source, **kwargs):
         self._id_source = id_source
         self._thread_count = kwargs.get('thread_count', 5)
+        self._backlog_per_mule = kwargs.get('backlog_per_mule', 10)
+        self._timeout = kwargs.get('timeout', None)
+        self._join_timeout = kwargs.get('join_timeout', 30)
         self._workers = []
+        self._mule_count = 0
         self._work = Queue()
         self._driver_work = Queue()
-        self._driver_results = {x: Queue() for x in range(self._thread_count)}
-        self._results = deque()
-        self._worker_results = Queue()
-        self._row_pattern = re.compile(ROW_PATTERN)
-        self._name_pattern = re.compile(NAME_PATTERN)
-        self._cached_emp_ids = kwargs.get('cached_emp_ids', CachedEmployeeIds())
-        self._cached_entity_ids = kwargs.get('cached_client_ids', CachedEmployeeIds())
-        self._score_board = {}
+        self._results = {}
+        self._results_lock = threading.Lock()
+        self._assignment_lock = threading.Lock()
+        self._outstanding = 0
+        self._finished = threading.Event()
+        self._stopped = threading.Event()
+        self._abandoned = threading.Event()
+        self._errors = []
+        self._name_pattern = NAME_REGEX
+        self._cached_emp_ids = kwargs.get('cached_emp_ids', CachedEmployeeIds(domain_name=id_source))
+        self._cached_client_ids = kwargs.get('cached_client_ids')
+        self._cached_entity_ids = {}
+        self._entity_cache_lock = threading.Lock()
 
     def _start_threads(self):
-        for worker_id in range(self._thread_count):
-            t = threading.Thread(target=self._lash_mules)
-            t.start()
-            self._workers.append(t)
-        driver_thread = threading.Thread(target=self._lash_driver)
+        driver_thread = threading.Thread(target=self._lash_driver, daemon=True)
         driver_thread.start()
-        self._workers.append(driver_thread)
+        with self._assignment_lock:
+            self._workers.append(driver_thread)
+            self._add_mule()
+
+    def _add_mule(self):
+        self._mule_count += 1
+        t = threading.Thread(target=self._lash_mules, daemon=True)
+        t.start()
+        self._workers.append(t)
 
-    def _stop_threads(self):
+    def _scale_mules(self):
+        with self._assignment_lock:
+            if self._stopped.is_set():
+                return
+            if self._mule_count >= self._thread_count:
+                return
+            if self._work.qsize() <= self._mule_count * self._backlog_per_mule:
+                return
+            logging.debug(f'mule team backlog is {self._work.qsize()}, adding a mule to the team')
+            self._add_mule()
+
+    def _stop_threads(self, abandon=False):
         logging.debug('called to stop the threads in the mule team')
-        for worker_id in range(self._thread_count):
+        with self._assignment_lock:
+            self._stopped.set()
+            mule_count = self._mule_count
+            workers = list(self._workers)
+        join_timeout = None
+        if abandon:
+            self._abandoned.set()
+            self._drain(self._work)
+            self._drain(self._driver_work)
+            join_timeout = self._join_timeout
+        for worker_id in range(mule_count):
             self._work.put(None)
         self._driver_work.put(None)
-        for worker in self._workers:
-            worker.join()
+        deadline = None if join_timeout is None else time.time() + join_timeout
+        for worker in workers:
+            worker.join(None if deadline is None else max(deadline - time.time(), 0))
+            if worker.is_alive():
+                logging.warning(f'mule team worker {worker.name} did not stop within {join_timeout} seconds, '
+                                f'abandoning it')
+
+    def _drain(self, work_queue):
+        while True:
+            try:
+                assignment = work_queue.get_nowait()
+            except Empty:
+                return
+            if assignment is not None:
+                self._release_search(assignment['fn_kwargs'])
 
     def enrich_data(self, **kwargs):
-        score_checks = 0
-        check_threshold = 3
-        enrichment = {}
         self._enrich_data(**kwargs)
         self._start_threads()
-        while score_checks < check_threshold:
-            logging.debug(self._score_board)
-            if not self._score_board:
-                score_checks += 1
-            time.sleep(3)
-        self._stop_threads()
-        for result in self._results:
-            for entry_name, entry in result.items():
-                if entry_name not in enrichment:
-                    enrichment[entry_name] = {}
-                recursively_update(enrichment[entry_name], entry)
-        return enrichment
+        finished = False
+        try:
+            finished = self._finished.wait(self._timeout)
+        finally:
+            self._stop_threads(abandon=not finished or bool(self._errors))
+        if self._errors:
+            raise self._errors[0]
+        if not finished:
+            raise TimeoutError(f'mule team did not finish enrichment within {self._timeout} seconds')
+        return self._results
 
     def _enrich_data(self, **kwargs):
+        self._assign_mule('_extract_changelog_page', kwargs)
+
+    def _assign_mule(self, function_name, function_kwargs):
+        self._open_assignment()
         self._work.put({
-            'fn_name': '_extract_changelog_page',
-            'fn_kwargs': kwargs
+            'fn_name': function_name,
+            'fn_kwargs': function_kwargs
         })
+        if self._mule_count:
+            self._scale_mules()
+
+    def _assign_driver(self, function_name, function_kwargs):
+        self._open_assignment()
+        self._driver_work.put({
+            'fn_name': function_name,
+            'fn_kwargs': function_kwargs
+        })
+
+    def _open_assignment(self):
+        with self._assignment_lock:
+            self._outstanding += 1
+
+    def _close_assignment(self):
+        with self._assignment_lock:
+            self._outstanding -= 1
+            if self._outstanding == 0:
+                self._finished.set()
+
+    def _fail(self, error):
+        with self._assignment_lock:
+            self._errors.append(error)
+        self._finished.set()
+
+    def _add_result(self, result_location, result_key, result_value):
+        with self._results_lock:
+            if result_location not in self._results:
+                self._results[result_location] = {}
+            self._results[result_location][result_key] = result_value
 
     def _lash_driver(self):
         logging.debug('starting the threaded driver')
-        with CredibleFrontEndDriver(self._id_source) as driver:
-            logging.debug('got the tokens, going to work with the threaded driver')
-            while True:
-                assignment = self._driver_work.get()
-                if assignment is None:
-                    logging.debug('work is done, credible driver leaving')
-                    return
-                function_name = assignment['fn_name']
-                function_kwargs = assignment['fn_kwargs']
-                logging.debug('the credible driver got an assignment: %s' % function_name)
-                function_kwargs['driver'] = driver
-                try:
-                    getattr(self, function_name)(**function_kwargs)
-                except Exception as e:
-                    print(e)
-                logging.debug('the credible driver finished an assignment: %s' % function_name)
-                self._driver_work.task_done()
+        try:
+            with CredibleFrontEndDriver(self._id_source) as driver:
+                logging.debug('got the tokens, going to work with the threaded driver')
+                while True:
+                    assignment = self._driver_work.get()
+                    if assignment is None:
+                        logging.debug('work is done, credible driver leaving')
+                        return
+                    function_name = assignment['fn_name']
+                    function_kwargs = assignment['fn_kwargs']
+                    logging.debug('the credible driver got an assignment: %s' % function_name)
+                    function_kwargs['driver'] = driver
+                    self._perform(function_name, function_kwargs)
+                    logging.debug('the credible driver finished an assignment: %s' % function_name)
+        except Exception as e:
+            logging.error(f'the credible driver for the mule team failed: {e}')
+            self._fail(e)
 
     def _lash_mules(self):
         logging.debug('started a mule for the mule train')
@@ -103,61 +173,52 @@ class CredibleMuleTeam:
             if assignment is None:
                 logging.debug('work is done, mule is leaving')
                 return
-            function_name = assignment['fn_name']
-            function_kwargs = assignment['fn_kwargs']
-            try:
-                getattr(self, function_name)(**function_kwargs)
-            except Exception as e:
-                print(e)
-            self._work.task_done()
+            self._perform(assignment['fn_name'], assignment['fn_kwargs'])
+
+    def _perform(self, function_name, function_kwargs):
+        try:
+            if self._errors or self._abandoned.is_set():
+                self._release_search(function_kwargs)
+                return
+            getattr(self, function_name)(**function_kwargs)
+        except Exception as e:
+            logging.error(f'mule team assignment {function_name} failed: {e}')
+            self._release_search(function_kwargs)
+            self._fail(e)
+        finally:
+            self._close_assignment()
+
+    def _release_search(self, function_kwargs):
+        if 'last_name' not in function_kwargs:
+            return
+        cache = self._cached_emp_ids
+        if function_kwargs.get('result_location') == 'entity_ids':
+            cache = self._get_entity_cache(function_kwargs['entity_type'])
+        cache.release_emp_id(function_kwargs['last_name'], function_kwargs['first_initial'])
 
     def _extract_changelog_page(self, **kwargs):
         url = BASE_STEM + URL_STEMS[kwargs['driving_id_type']]
-        page_number = kwargs.get('page_number', 1)
         extract_kwargs = kwargs.copy()
         extract_kwargs['url'] = url
-        self._driver_work.put({
-            'fn_name': '_get_changelog_page',
-            'fn_kwargs': extract_kwargs
-        })
-        task_name = f'extract_changelog_page_{page_number}'
-        self._score_board[task_name] = False
+        self._assign_driver('_get_changelog_page', extract_kwargs)
 
     def _parse_changelog_page(self, **kwargs):
         page_number = kwargs.get('page_number', 1)
         response = kwargs['results']
-        row_match = self._row_pattern.search(response).group('rows')
-        row_soup = bs4.BeautifulSoup(row_match, features='html.parser')
+        row_soup = CrediblePageParser.parse_changelog_table(response)
         table_rows = row_soup.find_all('tr')
         if kwargs['get_by_emp_ids']:
             emp_id_kwargs = kwargs.copy()
             emp_id_kwargs['results'] = table_rows
-            self._work.put({
-                'fn_name': '_strain_by_emp_ids',
-                'fn_kwargs': emp_id_kwargs
-            })
-            emp_task_name = f'strain_emp_ids_{page_number}'
-            self._score_board[emp_task_name] = False
+            self._assign_mule('_strain_by_emp_ids', emp_id_kwargs)
         if kwargs['get_details']:
             details_kwargs = kwargs.copy()
             details_kwargs['results'] = row_soup
-            self._work.put({
-                'fn_name': '_strain_change_details',
-                'fn_kwargs': details_kwargs
-            })
-            detail_task_name = f'strain_change_details_{page_number}'
-            self._score_board[detail_task_name] = False
+            self._assign_mule('_strain_change_details', details_kwargs)
         if kwargs['get_entity_ids']:
             entity_kwargs = kwargs.copy()
             entity_kwargs['results'] = table_rows
-            self._work.put({
-                'fn_name': '_strain_entity_ids',
-                'fn_kwargs': entity_kwargs
-            })
-            entity_task_name = f'strain_entity_ids_{page_number}'
-            self._score_board[entity_task_name] = False
-        task_name = f'extract_changelog_page_{page_number}'
-        del (self._score_board[task_name])
+            self._assign_mule('_strain_entity_ids', entity_kwargs)
         if len(table_rows) <= 3:
             page_number = None
         if page_number:
@@ -165,23 +226,23 @@ class CredibleMuleTeam:
             extract_kwargs = kwargs.copy()
             extract_kwargs['page_number'] = page_number
             del(extract_kwargs['results'])
-            self._work.put({
-                'fn_name': '_extract_changelog_page',
-                'fn_kwargs': extract_kwargs
-            })
+            self._assign_mule('_extract_changelog_page', extract_kwargs)
+
+    def _get_entity_cache(self, entity_type):
+        if self._cached_client_ids is not None:
+            return self._cached_client_ids
+        with self._entity_cache_lock:
+            if entity_type not in self._cached_entity_ids:
+                self._cached_entity_ids[entity_type] = CachedEmployeeIds(
+                    domain_name=self._id_source, cache_name=f'{entity_type}#entity_ids')
+            return self._cached_entity_ids[entity_type]
 
     def _strain_entity_ids(self, **kwargs):
         table_rows = kwargs['results']
         entity_type = kwargs['entity_type']
         for row in table_rows:
             if 'style' in row.attrs:
-                utc_change_date_string = row.contents[15].string
-                try:
-                    change_date_utc = datetime.datetime.strptime(utc_change_date_string, '%m/%d/%Y %I:%M:%S %p')
-                except ValueError:
-                    utc_change_date_string = f'{utc_change_date_string} 12:00:00 AM'
-                    change_date_utc = datetime.datetime.strptime(utc_change_date_string, '%m/%d/%Y %I:%M:%S %p')
-                change_date_utc = change_date_utc.replace(tzinfo=pytz.UTC)
+                change_date_utc = CrediblePageParser.parse_utc_change_date(row.contents[15].string)
                 utc_timestamp = change_date_utc.timestamp()
                 entity_entry = row.contents[7]
                 entity_name = entity_entry.string
@@ -191,11 +252,12 @@ class CredibleMuleTeam:
                     raise RuntimeError()
                 last_name = matches.group('last_name')
                 first_initial = matches.group('first_initial')
-                entity_id = self._cached_entity_ids.get_emp_id(last_name, first_initial, utc_timestamp)
+                entity_cache = self._get_entity_cache(entity_type)
+                entity_id = entity_cache.get_emp_id(last_name, first_initial, utc_timestamp)
                 if entity_id is None:
                     entity_kwargs = kwargs.copy()
                     del(entity_kwargs['results'])
-                    self._cached_entity_ids.mark_emp_id_working(last_name, first_initial, utc_timestamp)
+                    entity_cache.mark_emp_id_working(last_name, first_initial, utc_timestamp)
                     entity_kwargs['last_name'] = last_name
                     entity_kwargs['first_initial'] = first_initial
                     entity_kwargs['change_date_utc'] = utc_timestamp
@@ -204,27 +266,16 @@ class CredibleMuleTeam:
                     fn_name = '_search_clients'
                     if entity_type == 'Employees':
                         fn_name = '_search_employees'
-                    self._work.put({
-                        'fn_name': fn_name,
-                        'fn_kwargs': entity_kwargs
-                    })
+                    self._assign_mule(fn_name, entity_kwargs)
                     continue
-                self._results.append({'entity_ids': {utc_timestamp: entity_id}})
-        page_number = kwargs.get('page_number', 1)
-        emp_task_name = f'strain_entity_ids_{page_number}'
-        del(self._score_board[emp_task_name])
+                self._add_result('entity_ids', utc_timestamp, entity_id)
 
     def _strain_by_emp_ids(self, **kwargs):
         table_rows = kwargs['results']
+        self._cached_emp_ids.warm_up(CrediblePageParser.parse_emp_id_names(table_rows))
         for row in table_rows:
             if 'style' in row.attrs:
-                utc_change_date_string = row.contents[15].string
-                try:
-                    change_date_utc = datetime.datetime.strptime(utc_change_date_string, '%m/%d/%Y %I:%M:%S %p')
-                except ValueError:
-                    utc_change_date_string = f'{utc_change_date_string} 12:00:00 AM'
-                    change_date_utc = datetime.datetime.strptime(utc_change_date_string, '%m/%d/%Y %I:%M:%S %p')
-                change_date_utc = change_date_utc.replace(tzinfo=pytz.UTC)
+                change_date_utc = CrediblePageParser.parse_utc_change_date(row.contents[15].string)
                 utc_timestamp = change_date_utc.timestamp()
                 done_by_entry = row.contents[9]
                 done_by_name = done_by_entry.string
@@ -244,23 +295,14 @@ class CredibleMuleTeam:
                     emp_id_kwargs['change_date_utc'] = utc_timestamp
                     emp_id_kwargs['result_location'] = 'by_emp_ids'
                     logging.debug('calling for a search employees operation')
-                    self._work.put({
-                        'fn_name': '_search_employees',
-                        'fn_kwargs': emp_id_kwargs
-                    })
+                    self._assign_mule('_search_employees', emp_id_kwargs)
                     continue
-                self._results.append({'by_emp_ids': {utc_timestamp: emp_id}})
-        page_number = kwargs.get('page_number', 1)
-        emp_task_name = f'strain_emp_ids_{page_number}'
-        del(self._score_board[emp_task_name])
+                self._add_result('by_emp_ids', utc_timestamp, emp_id)
 
     def _strain_change_details(self, **kwargs):
-        page_number = kwargs.get('page_number', 1)
-        task_name = f'strain_change_details_{page_number}'
         row_soup = kwargs['results']
         table_rows = row_soup.find_all('a')
         if len(table_rows) <= 6:
-            del (self._score_board[task_name])
             return
         for row in table_rows:
             if 'clid' in row.attrs:
@@ -269,54 +311,31 @@ class CredibleMuleTeam:
                 # changelog_id = re.compile('changelog_id=(?P<changelog_id>\d+)').search(target).group('changelog_id')
                 detail_kwargs['changelog_id'] = changelog_id
                 del(detail_kwargs['results'])
-                self._work.put({
-                    'fn_name': '_get_change_details',
-                    'fn_kwargs': detail_kwargs
-                })
+                self._assign_mule('_get_change_details', detail_kwargs)
                 containing_row = row.parent.parent
-                utc_change_date_string = containing_row.contents[15].string
-                try:
-                    change_date_utc = datetime.datetime.strptime(utc_change_date_string, '%m/%d/%Y %I:%M:%S %p')
-                except ValueError:
-                    utc_change_date_string = f'{utc_change_date_string} 12:00:00 AM'
-                    change_date_utc = datetime.datetime.strptime(utc_change_date_string, '%m/%d/%Y %I:%M:%S %p')
-                change_date_utc = change_date_utc.replace(tzinfo=pytz.UTC)
-                self._results.append({
-                    'change_detail': {change_date_utc.timestamp(): changelog_id}
-                })
-        del (self._score_board[task_name])
+                change_date_utc = CrediblePageParser.parse_utc_change_date(containing_row.contents[15].string)
+                self._add_result('change_detail', change_date_utc.timestamp(), changelog_id)
 
     def _search_employees(self, **kwargs):
         logging.debug('started a search employees operation')
         url = BASE_STEM + URL_STEMS['Employee Advanced']
-        result_location = kwargs['result_location']
         search_kwargs = kwargs.copy()
         search_kwargs['url'] = url
-        self._driver_work.put({
-            'fn_name': '_get_emp_id_search',
-            'fn_kwargs': search_kwargs
-        })
-        task_name = f'search_employees_for_{result_location}_{kwargs["last_name"]}_{kwargs["first_initial"]}'
-        self._score_board[task_name] = False
+        self._assign_driver('_get_emp_id_search', search_kwargs)
 
     def _search_clients(self, **kwargs):
         logging.debug('started a search clients operation')
         url = BASE_STEM + URL_STEMS['Clients Advanced']
         search_kwargs = kwargs.copy()
         search_kwargs['url'] = url
-        self._driver_work.put({
-            'fn_name': '_get_client_id_search',
-            'fn_kwargs': search_kwargs
-        })
-        task_name = f'search_clients_for_{kwargs["last_name"]}_{kwargs["first_initial"]}'
-        self._score_board[task_name] = False
+        self._assign_driver('_get_client_id_search', search_kwargs)
 
     def _parse_emp_id_search(self, **kwargs):
         results = kwargs['results']
         result_location = kwargs['result_location']
         cache = self._cached_emp_ids
         if result_location == 'entity_ids':
-            cache = self._cached_entity_ids
+            cache = self._get_entity_cache(kwargs['entity_type'])
         try:
             possible_employees = CredibleCsvParser.parse_csv_response(results)
         except RuntimeError:
@@ -332,9 +351,7 @@ class CredibleMuleTeam:
                             f'{kwargs["last_name"]}, {kwargs["first_initial"]}, using default value of 0')
             emp_id = 0
         cache.add_emp_id(kwargs['last_name'], kwargs['first_initial'], emp_id)
-        self._results.append({result_location: {kwargs['change_date_utc']: emp_id}})
-        task_name = f'search_employees_for_{result_location}_{kwargs["last_name"]}_{kwargs["first_initial"]}'
-        del(self._score_board[task_name])
+        self._add_result(result_location, kwargs['change_date_utc'], emp_id)
         logging.debug('completed a search employees operation')
 
     def _parse_client_id_search(self, **kwargs):
@@ -353,10 +370,9 @@ class CredibleMuleTeam:
             logging.warning('could not determine the client_id from their name: %s' %
                             f'{kwargs["last_name"]}, {kwargs["first_initial"]}, using default value of 0')
             client_id = 0
-        self._cached_entity_ids.add_emp_id(kwargs['last_name'], kwargs['first_initial'], client_id)
-        self._results.append({'client_ids': {kwargs['change_date_utc']: client_id}})
-        task_name = f'search_clients_for_{kwargs["last_name"]}_{kwargs["first_initial"]}'
-        del(self._score_board[task_name])
+        entity_cache = self._get_entity_cache(kwargs['entity_type'])
+        entity_cache.add_emp_id(kwargs['last_name'], kwargs['first_initial'], client_id)
+        self._add_result('client_ids', kwargs['change_date_utc'], client_id)
         logging.debug('completed a search employees operation')
 
     def _get_change_details(self, **kwargs):
@@ -364,30 +380,13 @@ class CredibleMuleTeam:
         url = BASE_STEM + URL_STEMS['ChangeDetail']
         detail_kwargs = kwargs.copy()
         detail_kwargs['url'] = url
-        self._driver_work.put({
-            'fn_name': '_get_change_detail_page',
-            'fn_kwargs': detail_kwargs
-        })
-        task_name = f'get_change_detail_{kwargs["changelog_id"]}'
-        self._score_board[task_name] = False
+        self._assign_driver('_get_change_detail_page', detail_kwargs)
 
     def _parse_change_details(self, **kwargs):
         results = kwargs['results']
-        detail_soup = bs4.BeautifulSoup(results, features='html.parser')
-        all_rows = detail_soup.find_all('tr')
-        interesting_rows = all_rows[4:]
-        for row in interesting_rows:
-            self._results.append({
-                'change_details': {
-                    kwargs['changelog_id']: [{
-                        'id_name': str(row.contents[1].string).lower(),
-                        'old_value': str(row.contents[3].string),
-                        'new_value': str(row.contents[5].string)
-                    }]
-                }
-            })
-        task_name = f'get_change_detail_{kwargs["changelog_id"]}'
-        del (self._score_board[task_name])
+        changes = CrediblePageParser.parse_change_details(results)
+        if changes:
+            self._add_result('change_details', kwargs['changelog_id'], changes)
         logging.debug('completed a get change detail operation')
 
     def _get_changelog_page(self, url, **kwargs):
@@ -398,10 +397,7 @@ class CredibleMuleTeam:
         logging.debug('the driver retrieved a changelog page: %s' % kwargs)
         parse_kwargs = kwargs.copy()
         parse_kwargs['results'] = results
-        self._work.put({
-            'fn_name': '_parse_changelog_page',
-            'fn_kwargs': parse_kwargs
-        })
+        self._assign_mule('_parse_changelog_page', parse_kwargs)
 
     def _get_change_detail_page(self, url, **kwargs):
         logging.debug('the driver is retrieving a change detail page: %s' % kwargs)
@@ -411,10 +407,7 @@ class CredibleMuleTeam:
         results = driver.retrieve_change_detail_page(url, changelog_id)
         detail_kwargs = kwargs.copy()
         detail_kwargs['results'] = results
-        self._work.put({
-            'fn_name': '_parse_change_details',
-            'fn_kwargs': detail_kwargs
-        })
+        self._assign_mule('_parse_change_details', detail_kwargs)
         logging.debug('the driver retrieved a change detail page: %s' % kwargs)
 
     def _get_emp_id_search(self, url, **kwargs):
@@ -425,10 +418,7 @@ class CredibleMuleTeam:
         results = driver.retrieve_emp_id_search(url, last_name, first_initial)
         emp_kwargs = kwargs.copy()
         emp_kwargs['results'] = results
-        self._work.put({
-            'fn_name': '_parse_emp_id_search',
-            'fn_kwargs': emp_kwargs
-        })
+        self._assign_mule('_parse_emp_id_search', emp_kwargs)
         logging.debug('the driver retrieved a emp search page: %s' % kwargs)
 
     def _get_client_id_search(self, url, **kwargs):
@@ -439,8 +429,5 @@ class CredibleMuleTeam:
         results = driver.retrieve_client_id_search(url, last_name, first_initial)
         client_kwargs = kwargs.copy()
         client_kwargs['results'] = results
-        self._work.put({
-            'fn_name': '_parse_client_id_search',
-            'fn_kwargs': client_kwargs
-        })
+        self._assign_mule('_parse_client_id_search', client_kwargs)
         logging.debug('the driver retrieved a client search page: %s' % kwargs)
@@ -0,0 +1,98 @@
+import datetime
+from decimal import Decimal
+
+import bs4
+import pytz
+
+from toll_booth.alg_obj.forge.extractors.credible_fe.regex_patterns import ROW_REGEX, NAME_REGEX, \
+    NUMERIC_INSIDE_REGEX, CHANGELOG_ID_REGEX
+
+_change_date_format = '%m/%d/%Y %I:%M:%S %p'
+
+
+class CrediblePageParser:
+    _row_strainer = bs4.SoupStrainer('tr')
+
+    @classmethod
+    def parse_changelog_table(cls, page_text):
+        row_match = ROW_REGEX.search(page_text).group('rows')
+        return cls._strain_rows(row_match)
+
+    @classmethod
+    def parse_done_by_rows(cls, table_rows):
+        done_by = []
+        for row in table_rows:
+            if 'style' in row.attrs:
+                change_date_utc = cls.parse_utc_change_date(row.contents[15].string)
+                matches = NAME_REGEX.search(row.contents[9].string)
+                done_by.append((change_date_utc.timestamp(), matches.group('last_name'), matches.group('first_initial')))
+        return done_by
+
+    @classmethod
+    def parse_emp_id_rows(cls, table_rows):
+        emp_ids = {}
+        for row in table_rows:
+            if 'style' in row.attrs:
+                entry = datetime.datetime.strptime(row.contents[15].string, _change_date_format)
+                change_time = datetime.datetime.fromtimestamp(entry.timestamp(), tz=datetime.timezone.utc)
+                match = NUMERIC_INSIDE_REGEX.search(row.contents[3].string).group('inside')
+                emp_ids[change_time] = Decimal(match)
+        return emp_ids
+
+    @classmethod
+    def parse_emp_id_names(cls, table_rows):
+        emp_names = []
+        for row in table_rows:
+            if 'style' in row.attrs:
+                employee_entry = row.contents[3].string
+                name_match = NAME_REGEX.search(employee_entry)
+                id_match = NUMERIC_INSIDE_REGEX.search(employee_entry)
+                if name_match is None or id_match is None:
+                    continue
+                emp_id = Decimal(id_match.group('inside'))
+                emp_names.append((name_match.group('last_name'), name_match.group('first_initial'), emp_id))
+        return emp_names
+
+    @classmethod
+    def parse_clid_links(cls, anchors):
+        changelog_links = []
+        for anchor in anchors:
+            if 'clid' in anchor.attrs:
+                containing_row = anchor.parent.parent
+                change_date_utc = cls.parse_utc_change_date(containing_row.contents[15].string)
+                changelog_links.append((anchor.attrs['clid'], change_date_utc.timestamp()))
+        return changelog_links
+
+    @classmethod
+    def parse_href_links(cls, anchors):
+        changelog_links = []
+        for anchor in anchors:
+            if 'href' in anchor.attrs and 'title' in anchor.attrs and anchor.attrs['href'] != '#':
+                changelog_id = CHANGELOG_ID_REGEX.search(anchor.attrs['href']).group('changelog_id')
+                containing_row = anchor.parent.parent
+                change_date = datetime.datetime.strptime(containing_row.contents[15].string, _change_date_format)
+                change_date = datetime.datetime.fromtimestamp(change_date.timestamp(), tz=datetime.timezone.utc)
+                changelog_links.append((changelog_id, change_date))
+        return changelog_links
+
+    @classmethod
+    def parse_change_details(cls, detail_page):
+        detail_soup = cls._strain_rows(detail_page)
+        return [{
+            'id_name': str(row.contents[1].string).lower(),
+            'old_value': str(row.contents[3].string),
+            'new_value': str(row.contents[5].string)
+        } for row in detail_soup.find_all('tr')[4:]]
+
+    @classmethod
+    def parse_utc_change_date(cls, change_date_string):
+        try:
+            change_date_utc = datetime.datetime.strptime(change_date_string, _change_date_format)
+        except ValueError:
+            change_date_string = f'{change_date_string} 12:00:00 AM'
+            change_date_utc = datetime.datetime.strptime(change_date_string, _change_date_format)
+        return change_date_utc.replace(tzinfo=pytz.UTC)
+
+    @classmethod
+    def _strain_rows(cls, markup):
+        return bs4.BeautifulSoup(markup, features='html.parser', parse_only=cls._row_strainer)
@@ -1,2 +1,11 @@
-ROW_PATTERN = '(<table border=\"\d\"\scellpadding=\"\d\"\scellspacing=\"\d\"\swidth=\"[\d]+%\">)(?P<rows>[.\s\S]+?)(</table>)'
-NAME_PATTERN = '(?P<last_name>\w+),\s+(?P<first_initial>\w)'
+import re
+
+ROW_PATTERN = r'(<table border="\d"\scellpadding="\d"\scellspacing="\d"\swidth="[\d]+%">)(?P<rows>[.\s\S]+?)(</table>)'
+NAME_PATTERN = r'(?P<last_name>\w+),\s+(?P<first_initial>\w)'
+NUMERIC_INSIDE_PATTERN = r'(?P<outside>[\w\s]+?)\s*\((?P<inside>[\d]+)\)'
+CHANGELOG_ID_PATTERN = r'changelog_id=(?P<changelog_id>\d+)'
+
+ROW_REGEX = re.compile(ROW_PATTERN)
+NAME_REGEX = re.compile(NAME_PATTERN)
+NUMERIC_INSIDE_REGEX = re.compile(NUMERIC_INSIDE_PATTERN)
+CHANGELOG_ID_REGEX = re.compile(CHANGELOG_ID_PATTERN)
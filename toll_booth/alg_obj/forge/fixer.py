@@ -23,8 +23,7 @@ class Fixer:
         self._extraction_queue = ForgeQueue.get_for_extraction_queue()
 
     def fix(self):
-        stalled_objects = self._scanner.scan_stalled_objects()
-        for stalled_object in stalled_objects:
+        for stalled_object in self._scanner.stream_stalled_objects():
             stalled_stage = stalled_object['last_stage_seen']
             if stalled_stage == 'assimilation':
                 self._load(stalled_object)
@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import re
+
+_edge_start_pattern = re.compile(r"g\.E\((?P<edge_id>[^)]*)\)")
+_edge_from_pattern = re.compile(r"\.from\(g\.V\((?P<from_id>'[^']*')\)\)")
+
+
+class UpsertResult:
+    def __init__(self, graph_object, command, succeeded, error=None):
+        self._graph_object = graph_object
+        self._command = command
+        self._succeeded = succeeded
+        self._error = error
+
+    @property
+    def graph_object(self):
+        return self._graph_object
+
+    @property
+    def command(self):
+        return self._command
+
+    @property
+    def succeeded(self):
+        return self._succeeded
+
+    @property
+    def error(self):
+        return self._error
+
+    def __str__(self):
+        if self._succeeded:
+            return f'{self._graph_object}: graphed'
+        return f'{self._graph_object}: failed, {self._error}'
+
+
+class UpsertResults:
+    def __init__(self, results=None):
+        if not results:
+            results = []
+        self._results = results
+
+    @property
+    def results(self):
+        return self._results
+
+    @property
+    def succeeded(self):
+        return [x for x in self._results if x.succeeded]
+
+    @property
+    def failed(self):
+        return [x for x in self._results if not x.succeeded]
+
+    @property
+    def failed_objects(self):
+        return [x.graph_object for x in self.failed]
+
+    @property
+    def is_complete(self):
+        return not self.failed
+
+    def extend(self, other_results):
+        self._results.extend(other_results.results)
+
+    def __iter__(self):
+        return iter(self._results)
+
+    def __len__(self):
+        return len(self._results)
+
+
+class UpsertBatch:
+    _query_start = 'g.inject(0).union('
+    _query_end = ')'
+
+    def __init__(self, max_size, max_bytes):
+        self._max_size = max_size
+        self._max_bytes = max_bytes
+        self._entries = []
+        self._branches = []
+        self._size = self._calculate_overhead()
+
+    @property
+    def entries(self):
+        return self._entries
+
+    @property
+    def is_empty(self):
+        return not self._entries
+
+    def add(self, graph_object, command):
+        branch = self._generate_branch(len(self._entries), command)
+        branch_size = len(json.dumps(branch)) - 1
+        if self._entries:
+            if len(self._entries) >= self._max_size:
+                return False
+            if self._size + branch_size > self._max_bytes:
+                return False
+        self._entries.append((graph_object, command))
+        self._branches.append(branch)
+        self._size += branch_size
+        return True
+
+    def build_query(self):
+        return f"{self._query_start}{','.join(self._branches)}{self._query_end}"
+
+    @classmethod
+    def is_batchable(cls, command):
+        command = command.strip()
+        if not command.startswith('g.E('):
+            return True
+        return _edge_from_pattern.search(command) is not None
+
+    @classmethod
+    def _generate_branch(cls, position, command):
+        command = command.strip()
+        if command.startswith('g.E('):
+            command = cls._root_edge_command(command)
+        elif command.startswith('g.'):
+            command = command[2:]
+        return f"__.{command}.constant({position})"
+
+    @classmethod
+    def _root_edge_command(cls, command):
+        edge_start = _edge_start_pattern.match(command)
+        from_id = _edge_from_pattern.search(command).group('from_id')
+        rooted = f"V({from_id}).outE()"
+        if edge_start.group('edge_id'):
+            rooted += f".hasId({edge_start.group('edge_id')})"
+        return rooted + command[edge_start.end():]
+
+    @classmethod
+    def _calculate_overhead(cls):
+        return len(json.dumps({'gremlin': f'{cls._query_start}{cls._query_end}'}))
+
+
+class BatchUpsertEngine:
+    def __init__(self, trident_driver, **kwargs):
+        batch_size = kwargs.get('batch_size', int(os.getenv('GRAPH_BATCH_SIZE', 100)))
+        max_request_bytes = kwargs.get('max_request_bytes', int(os.getenv('GRAPH_BATCH_MAX_BYTES', 262144)))
+        if batch_size < 1:
+            raise ValueError(f'batch_size must be at least one, received: {batch_size}')
+        self._trident_driver = trident_driver
+        self._batch_size = batch_size
+        self._max_request_bytes = max_request_bytes
+        self._isolate_failures = kwargs.get('isolate_failures', True)
+
+    def upsert(self, graph_commands):
+        results = UpsertResults()
+        unbatched = []
+        for batch in self._generate_batches(graph_commands, unbatched):
+            results.extend(self._send_batch(batch))
+        for graph_object, command in unbatched:
+            results.extend(self._send_command(graph_object, command))
+        return results
+
+    def _generate_batches(self, graph_commands, unbatched):
+        batch = UpsertBatch(self._batch_size, self._max_request_bytes)
+        for graph_object, command in graph_commands:
+            if not UpsertBatch.is_batchable(command):
+                unbatched.append((graph_object, command))
+                continue
+            if batch.add(graph_object, command):
+                continue
+            yield batch
+            batch = UpsertBatch(self._batch_size, self._max_request_bytes)
+            batch.add(graph_object, command)
+        if not batch.is_empty:
+            yield batch
+
+    def _send_batch(self, batch):
+        entries = batch.entries
+        try:
+            graphed = self._trident_driver.execute(batch.build_query(), False)
+        except Exception as e:
+            if self._isolate_failures and len(entries) > 1:
+                logging.warning(f'batch of {len(entries)} graph commands failed: {e}, splitting to isolate the failure')
+                return self._split_batch(entries)
+            logging.warning(f'graph commands failed: {e}, affected objects: {[str(x[0]) for x in entries]}')
+            return UpsertResults([UpsertResult(x, y, False, e) for x, y in entries])
+        graphed_positions = set(graphed) if graphed else set()
+        results = []
+        for position, entry in enumerate(entries):
+            graph_object, command = entry
+            if position in graphed_positions:
+                results.append(UpsertResult(graph_object, command, True))
+                continue
+            error = RuntimeError(f'graph command for {graph_object} did not report back from the batch')
+            results.append(UpsertResult(graph_object, command, False, error))
+        return UpsertResults(results)
+
+    def _send_command(self, graph_object, command):
+        try:
+            self._trident_driver.execute(command, False)
+        except Exception as e:
+            logging.warning(f'graph command failed: {e}, affected object: {graph_object}')
+            return UpsertResults([UpsertResult(graph_object, command, False, e)])
+        return UpsertResults([UpsertResult(graph_object, command, True)])
+
+    def _split_batch(self, entries):
+        results = UpsertResults()
+        midpoint = len(entries) // 2
+        for half in (entries[:midpoint], entries[midpoint:]):
+            batch = UpsertBatch(len(half), float('inf'))
+            for graph_object, command in half:
+                batch.add(graph_object, command)
+            results.extend(self._send_batch(batch))
+        return results
@@ -3,6 +3,7 @@ import logging
 
 from toll_booth.alg_obj.aws.trident.graph_driver import TridentDriver
 from toll_booth.alg_obj.aws.trident.trident_obj import TridentEdgeConnection
+from toll_booth.alg_obj.graph.ogm.batches import BatchUpsertEngine
 from toll_booth.alg_obj.graph.ogm.generator import CommandGenerator, VertexCommandGenerator, EdgeCommandGenerator
 from toll_booth.alg_obj.graph.ogm.pages import PaginationToken
 from toll_booth.alg_obj.graph.schemata.schema import Schema
@@ -10,34 +11,40 @@ from toll_booth.alg_obj.graph.schemata.schema import Schema
 
 class Ogm:
     def __init__(self, **kwargs):
-        self._schema = kwargs.get('schema', Schema.retrieve(**kwargs))
-        self._trident_driver = kwargs.get('trident_driver', TridentDriver())
+        schema = kwargs.get('schema')
+        if schema is None:
+            schema = Schema.retrieve(**kwargs)
+        self._schema = schema
+        trident_driver = kwargs.get('trident_driver')
+        if trident_driver is None:
+            trident_driver = TridentDriver()
+        self._trident_driver = trident_driver
+        self._upsert_engine = BatchUpsertEngine(self._trident_driver, **self._derive_batch_kwargs(kwargs))
 
     def execute(self, query):
         results = self._trident_driver.execute(query, False)
         return results
 
     def graph_objects(self, vertexes=None, edges=None):
-        logging.info(f'')
+        results = self.bulk_graph_objects(vertexes, edges)
+        if not results.is_complete:
+            failed = [str(x) for x in results.failed]
+            raise RuntimeError(f'could not graph all requested objects, failures: {failed}')
+
+    def bulk_graph_objects(self, vertexes=None, edges=None):
         if not vertexes:
             vertexes = []
         if not edges:
             edges = []
-        vertex_commands = {self._generate_vertex_command(x) for x in vertexes}
-        edge_commands = {self._generate_edge_command(x) for x in edges}
+        vertex_commands = self._generate_commands(vertexes, self._generate_vertex_command)
+        edge_commands = self._generate_commands(edges, self._generate_edge_command)
         logging.info(f'generated graph commands: {vertex_commands, edge_commands} for vertexes/edges: {vertexes}/{edges}')
         return self._graph_objects(vertex_commands, edge_commands)
 
     def graph_object(self, object_entry):
-        vertex_commands = set()
-        edge_commands = set()
-        vertex_commands.add(self._generate_vertex_command(object_entry['source']))
-        for vertex in object_entry['others']:
-            vertex_commands.add(self._generate_vertex_command(vertex))
-        for edge in object_entry['edges']:
-            edge_commands.add(self._generate_edge_command(edge))
-        logging.info(f'generated graph commands: {vertex_commands, edge_commands} for potential object: {object_entry}')
-        return self._graph_objects(vertex_commands, edge_commands)
+        vertexes = [object_entry['source']]
+        vertexes.extend(object_entry['others'])
+        return self.graph_objects(vertexes, object_entry['edges'])
 
     def _generate_vertex_command(self, potential_vertex):
         schema_entry = self._schema.get(potential_vertex.object_type)
@@ -52,12 +59,32 @@ class Ogm:
         return graph_command
 
     def _graph_objects(self, vertex_commands, edge_commands):
-        for command in vertex_commands:
-            self._trident_driver.execute(command, False)
-        for command in edge_commands:
-            self._trident_driver.execute(command, False)
-        logging.info(f'submitted graph commands: {vertex_commands, edge_commands}')
-        return
+        results = self._upsert_engine.upsert(vertex_commands)
+        results.extend(self._upsert_engine.upsert(edge_commands))
+        logging.info(f'submitted graph commands: {vertex_commands, edge_commands}, '
+                     f'{len(results.succeeded)} succeeded, {len(results.failed)} failed')
+        return results
+
+    @classmethod
+    def _generate_commands(cls, graph_objects, command_generator):
+        commands = []
+        generated = set()
+        for graph_object in graph_objects:
+            command = command_generator(graph_object)
+            if command in generated:
+                continue
+            generated.add(command)
+            commands.append((graph_object, command))
+        return commands
+
+    @classmethod
+    def _derive_batch_kwargs(cls, kwargs):
+        batch_kwargs = {}
+        if 'graph_batch_size' in kwargs:
+            batch_kwargs['batch_size'] = kwargs['graph_batch_size']
+        if 'graph_batch_max_bytes' in kwargs:
+            batch_kwargs['max_request_bytes'] = kwargs['graph_batch_max_bytes']
+        return batch_kwargs
 
 
 class OgmReader:
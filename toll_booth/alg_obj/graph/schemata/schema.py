@@ -3,6 +3,7 @@ from jsonschema import validate
 
 from toll_booth.alg_obj import AlgObject
 from toll_booth.alg_obj.aws.snakes.schema_snek import SchemaSnek
+from toll_booth.alg_obj.graph.schemata.schema_cache import SchemaCache
 from toll_booth.alg_obj.graph.schemata.schema_parser import SchemaParer
 
 
@@ -37,6 +38,11 @@ class Schema(AlgObject):
 
     @classmethod
     def retrieve(cls, **kwargs):
+        schema_cache = SchemaCache.get_process_cache()
+        return schema_cache.get_schema(**kwargs)
+
+    @classmethod
+    def retrieve_uncached(cls, **kwargs):
         schema_writer = SchemaSnek(**kwargs)
         json_schema = schema_writer.get_schema()
         vertex_entries, edge_entries = SchemaParer.parse(json_schema)
@@ -51,6 +57,7 @@ class Schema(AlgObject):
             validate(working_schema, master_schema)
             schema_snek.put_schema(schema_file_path, **kwargs)
             schema_snek.put_validation_schema(schema_file_path, **kwargs)
+            SchemaCache.get_process_cache().invalidate(**kwargs)
             vertex_entries = {x['vertex_name'] for x in working_schema['vertex']}
             edge_entries = {x['edge_label'] for x in working_schema['edge']}
             return cls(vertex_entries, edge_entries)
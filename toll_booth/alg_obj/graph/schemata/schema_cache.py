@@ -0,0 +1,116 @@
+import logging
+import os
+import threading
+from datetime import datetime
+
+from toll_booth.alg_obj.aws.snakes.schema_snek import SchemaSnek
+from toll_booth.alg_obj.graph.schemata.schema_parser import SchemaParer
+
+
+class CachedSchema:
+    def __init__(self, schema, etag, checked_at=None):
+        if not checked_at:
+            checked_at = datetime.utcnow().timestamp()
+        self._schema = schema
+        self._etag = etag
+        self._checked_at = checked_at
+        self._entries = {}
+        self._entries.update(schema.edge_entries)
+        self._entries.update(schema.vertex_entries)
+
+    @property
+    def schema(self):
+        return self._schema
+
+    @property
+    def etag(self):
+        return self._etag
+
+    @property
+    def checked_at(self):
+        return self._checked_at
+
+    def mark_checked(self):
+        self._checked_at = datetime.utcnow().timestamp()
+
+    def is_stale(self, revalidate_interval):
+        return datetime.utcnow().timestamp() - self._checked_at >= revalidate_interval
+
+    def __getitem__(self, item):
+        return self._entries[item]
+
+
+class SchemaCache:
+    _process_cache = None
+    _process_lock = threading.Lock()
+
+    def __init__(self, revalidate_interval=None):
+        if revalidate_interval is None:
+            revalidate_interval = float(os.getenv('SCHEMA_REVALIDATE_INTERVAL', 300))
+        self._revalidate_interval = revalidate_interval
+        self._holdings = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_process_cache(cls):
+        if cls._process_cache is None:
+            with cls._process_lock:
+                if cls._process_cache is None:
+                    cls._process_cache = cls()
+        return cls._process_cache
+
+    @classmethod
+    def clear_process_cache(cls):
+        with cls._process_lock:
+            cls._process_cache = None
+
+    @property
+    def revalidate_interval(self):
+        return self._revalidate_interval
+
+    def get_schema(self, schema_name=None, **kwargs):
+        return self._get_cached_schema(schema_name, **kwargs).schema
+
+    def get_entry(self, entry_name, schema_name=None, **kwargs):
+        return self._get_cached_schema(schema_name, **kwargs)[entry_name]
+
+    def invalidate(self, schema_name=None, **kwargs):
+        schema_snek = SchemaSnek(**kwargs)
+        with self._lock:
+            self._holdings.pop(self._generate_cache_key(schema_snek, schema_name), None)
+
+    def _get_cached_schema(self, schema_name=None, **kwargs):
+        schema_snek = SchemaSnek(**kwargs)
+        cache_key = self._generate_cache_key(schema_snek, schema_name)
+        cached = self._holdings.get(cache_key)
+        if cached is not None and not cached.is_stale(self._revalidate_interval):
+            return cached
+        with self._lock:
+            cached = self._holdings.get(cache_key)
+            if cached is not None and not cached.is_stale(self._revalidate_interval):
+                return cached
+            cached = self._load(schema_snek, schema_name, cached)
+            self._holdings[cache_key] = cached
+            return cached
+
+    @classmethod
+    def _load(cls, schema_snek, schema_name, cached=None):
+        from toll_booth.alg_obj.graph.schemata.schema import Schema
+
+        etag = None
+        if cached is not None:
+            etag = cached.etag
+        json_schema, etag = schema_snek.get_schema_if_modified(schema_name, etag)
+        if json_schema is None:
+            logging.debug(f'schema {schema_name} has not changed since last check, retaining the cached version')
+            cached.mark_checked()
+            return cached
+        logging.debug(f'schema {schema_name} was modified or not yet cached, parsing a fresh copy')
+        vertex_entries, edge_entries = SchemaParer.parse(json_schema)
+        return CachedSchema(Schema(vertex_entries, edge_entries), etag)
+
+    @staticmethod
+    def _generate_cache_key(schema_snek, schema_name):
+        if not schema_name:
+            schema_name = 'schema.json'
+        return schema_snek.bucket_name, schema_snek.folder_name, schema_name
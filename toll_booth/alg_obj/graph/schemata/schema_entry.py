@@ -14,10 +14,10 @@ class SchemaEntry(AlgObject):
         raise NotImplementedError
 
     @classmethod
-    def retrieve(cls, entry_name):
-        from toll_booth.alg_obj.graph.schemata.schema import Schema
-        schema = Schema.retrieve()
-        return schema[entry_name]
+    def retrieve(cls, entry_name, **kwargs):
+        from toll_booth.alg_obj.graph.schemata.schema_cache import SchemaCache
+        schema_cache = SchemaCache.get_process_cache()
+        return schema_cache.get_entry(entry_name, **kwargs)
 
     @classmethod
     def get_for_index(cls, index_name):
@@ -23,6 +23,8 @@ def filter_caseload_report(**kwargs):
 
 
 def filter_psi_caseload_report(**kwargs):
+    from toll_booth.alg_obj.posts.accountant.joins import PatientIndex, ProviderIndex, EncounterIndex
+
     reports = {
         'missing': {'clients': [], 'providers': []},
         'duplicates': {'clients': [], 'providers': []}
@@ -33,14 +35,18 @@ def filter_psi_caseload_report(**kwargs):
     clients, employees, encounters = query_data['clients'], query_data['employees'], query_data['encounters']
     providers = {}
     caseloads = {x: y for x, y in caseloads.items() if y['Clinic Supervisor Name'] and y['CSW Name'] and y['Client Name']}
+    patient_index = PatientIndex.for_caseloads(clients, caseloads)
+    provider_index = ProviderIndex(employees)
+    assessment_index = EncounterIndex(service_assessments)
+    encounter_index = EncounterIndex(encounters)
     for medicaid_number, caseload_entry in caseloads.items():
         patient_name = caseload_entry['Client Name']
         provider_name = caseload_entry['CSW Name']
         supervisor_name = caseload_entry['Clinic Supervisor Name']
         try:
-            patient_id = _search_for_patient(medicaid_number, patient_name, clients)
-            provider_id = _find_provider(provider_name, employees, providers)
-            supervisor_id = _find_supervisor(supervisor_name, employees, providers)
+            patient_id = patient_index.search(medicaid_number, patient_name)
+            provider_id = _find_provider(provider_name, provider_index, providers)
+            supervisor_id = _find_supervisor(supervisor_name, provider_index, providers)
         except RecordMatchFailedException as e:
             if e.failure_type == 'duplicates':
                 reports['duplicates'][e.matched_type].append({'provided': caseload_entry, 'found': e.duplicate_records})
@@ -55,8 +61,8 @@ def filter_psi_caseload_report(**kwargs):
             caseload_reports[supervisor_id][provider_id] = []
         if provider_id not in caseload_reports:
             caseload_reports[provider_id] = []
-        patient_assessments = _filter_encounter_records(patient_id, service_assessments)
-        patient_encounters = _filter_encounter_records(patient_id, encounters)
+        patient_assessments = assessment_index.for_patient(patient_id)
+        patient_encounters = encounter_index.for_patient(patient_id)
         patient_report = {
             'patient_id': patient_id,
             'patient_name': patient_name,
@@ -70,77 +76,20 @@ def filter_psi_caseload_report(**kwargs):
     return reports
 
 
-def _filter_encounter_records(patient_id, encounter_records):
-    filtered_records = {}
-    for record in encounter_records:
-        record_patient_id = record['Consumer ID']
-        if patient_id == record_patient_id:
-            filtered_records[record['Service ID']] = record
-    return filtered_records
-
-
-def _search_for_patient(medicaid_number, patient_name, patient_records):
-    try:
-        last_name, first_name = patient_name.split(', ')
-    except ValueError:
-        first_name, last_name = patient_name.split(' ')
-    matches = []
-    for record in patient_records:
-        record_last_name = record['Last Name']
-        record_first_name = record['First Name']
-        record_medicaid_number = record['Medicaid ID']
-        if record_last_name is None or record_first_name is None:
-            continue
-        # if record_last_name.lower() == last_name.lower() and record_first_name.lower() == first_name.lower():
-        if record_medicaid_number is None:
-            if record_last_name.lower() == last_name.lower() and record_first_name.lower() == first_name.lower():
-                matches.append(record)
-            continue
-        if medicaid_number in record_medicaid_number:
-            if record_last_name.lower() == last_name.lower() or record_first_name.lower() == first_name.lower():
-                matches.append(record)
-            continue
-    if len(matches) != 1:
-        match_criteria = (first_name, last_name, medicaid_number)
-        if len(matches) > 1:
-            raise RecordMatchFailedException('clients', match_criteria, 'duplicates', matches)
-        raise RecordMatchFailedException('clients', match_criteria, 'not found')
-    for match in matches:
-        return match[' Id']
-
-
-def _find_provider(provider_name, employees, found_providers):
+def _find_provider(provider_name, provider_index, found_providers):
     provider_id = found_providers.get(provider_name, None)
     if provider_id is None:
         try:
             last_name, first_name = provider_name.split(', ')
         except ValueError:
             first_name, last_name = provider_name.split(' ')
-        provider_id = _search_for_provider(last_name, first_name, employees)
+        provider_id = provider_index.search(last_name, first_name)
     return provider_id
 
 
-def _find_supervisor(supervisor_name, employees, found_providers):
+def _find_supervisor(supervisor_name, provider_index, found_providers):
     supervisor_id = found_providers.get(supervisor_name, None)
     if supervisor_id is None:
         first_name, last_name = supervisor_name.split(' ')
-        supervisor_id = _search_for_provider(last_name, first_name, employees)
+        supervisor_id = provider_index.search(last_name, first_name)
     return supervisor_id
-
-
-def _search_for_provider(last_name, first_name, provider_records):
-    matches = set()
-    for record in provider_records:
-        record_first_name = record['First Name']
-        record_last_name = record['Last Name']
-        if record_first_name is None or record_last_name is None:
-            continue
-        if record_first_name.lower() == first_name.lower() and record_last_name.lower() == last_name.lower():
-            matches.add(record['Employee ID'])
-    if len(matches) != 1:
-        match_criteria = (first_name, last_name)
-        if len(matches) > 1:
-            raise RecordMatchFailedException('providers', match_criteria, 'duplicates')
-        raise RecordMatchFailedException('providers', match_criteria, 'not found')
-    for match in matches:
-        return match
@@ -0,0 +1,104 @@
+from toll_booth.alg_obj.posts.accountant.filters import RecordMatchFailedException
+
+
+class PatientIndex:
+    def __init__(self, patient_records, medicaid_lengths=None):
+        if medicaid_lengths is None:
+            medicaid_lengths = set()
+        self._patient_records = patient_records
+        self._medicaid_lengths = set(medicaid_lengths)
+        self._by_name = {}
+        self._by_medicaid = {}
+        self._with_medicaid = []
+        for position, record in enumerate(patient_records):
+            self._index_record(position, record)
+
+    @classmethod
+    def for_caseloads(cls, patient_records, caseloads):
+        return cls(patient_records, {len(x) for x in caseloads})
+
+    def _index_record(self, position, record):
+        record_last_name = record['Last Name']
+        record_first_name = record['First Name']
+        if record_last_name is None or record_first_name is None:
+            return
+        record_medicaid_number = record['Medicaid ID']
+        if record_medicaid_number is None:
+            name_key = (record_last_name.lower(), record_first_name.lower())
+            self._by_name.setdefault(name_key, []).append(position)
+            return
+        self._with_medicaid.append(position)
+        for length in self._medicaid_lengths:
+            self._index_medicaid(position, record_medicaid_number, length)
+
+    def _index_medicaid(self, position, record_medicaid_number, length):
+        if not length:
+            return
+        seen = set()
+        for start in range(len(record_medicaid_number) - length + 1):
+            fragment = record_medicaid_number[start:start + length]
+            if fragment in seen:
+                continue
+            seen.add(fragment)
+            self._by_medicaid.setdefault(fragment, []).append(position)
+
+    def search(self, medicaid_number, patient_name):
+        try:
+            last_name, first_name = patient_name.split(', ')
+        except ValueError:
+            first_name, last_name = patient_name.split(' ')
+        lower_last, lower_first = last_name.lower(), first_name.lower()
+        positions = list(self._by_name.get((lower_last, lower_first), []))
+        for position in self._find_medicaid_candidates(medicaid_number):
+            record = self._patient_records[position]
+            if record['Last Name'].lower() == lower_last or record['First Name'].lower() == lower_first:
+                positions.append(position)
+        if len(positions) != 1:
+            match_criteria = (first_name, last_name, medicaid_number)
+            if len(positions) > 1:
+                matches = [self._patient_records[x] for x in sorted(positions)]
+                raise RecordMatchFailedException('clients', match_criteria, 'duplicates', matches)
+            raise RecordMatchFailedException('clients', match_criteria, 'not found')
+        return self._patient_records[positions[0]][' Id']
+
+    def _find_medicaid_candidates(self, medicaid_number):
+        if not medicaid_number:
+            return self._with_medicaid
+        if len(medicaid_number) not in self._medicaid_lengths:
+            self._medicaid_lengths.add(len(medicaid_number))
+            for position in self._with_medicaid:
+                record_medicaid_number = self._patient_records[position]['Medicaid ID']
+                self._index_medicaid(position, record_medicaid_number, len(medicaid_number))
+        return self._by_medicaid.get(medicaid_number, [])
+
+
+class ProviderIndex:
+    def __init__(self, provider_records):
+        self._by_name = {}
+        for record in provider_records:
+            record_first_name = record['First Name']
+            record_last_name = record['Last Name']
+            if record_first_name is None or record_last_name is None:
+                continue
+            name_key = (record_first_name.lower(), record_last_name.lower())
+            self._by_name.setdefault(name_key, set()).add(record['Employee ID'])
+
+    def search(self, last_name, first_name):
+        matches = self._by_name.get((first_name.lower(), last_name.lower()), set())
+        if len(matches) != 1:
+            match_criteria = (first_name, last_name)
+            if len(matches) > 1:
+                raise RecordMatchFailedException('providers', match_criteria, 'duplicates')
+            raise RecordMatchFailedException('providers', match_criteria, 'not found')
+        for match in matches:
+            return match
+
+
+class EncounterIndex:
+    def __init__(self, encounter_records):
+        self._by_patient = {}
+        for record in encounter_records:
+            self._by_patient.setdefault(record['Consumer ID'], {})[record['Service ID']] = record
+
+    def for_patient(self, patient_id):
+        return dict(self._by_patient.get(patient_id, {}))
@@ -1,3 +1,13 @@
+class SupervisionCycleException(Exception):
+    def __init__(self, cycle):
+        super().__init__(f'supervision data contains a cycle: {" -> ".join(str(x) for x in cycle)}')
+        self._cycle = cycle
+
+    @property
+    def cycle(self):
+        return self._cycle
+
+
 class SupervisionBranch:
     def __init__(self, branch_id, supervisor_ids=None, supervised_ids=None):
         if not supervised_ids:
@@ -29,39 +39,177 @@ class SupervisionBranch:
             self._supervisor_ids.append(supervisor_id)
 
 
+class SupervisionIndex:
+    def __init__(self, ancestors=None, descendants=None):
+        if ancestors is None:
+            ancestors = {}
+        if descendants is None:
+            descendants = {}
+        self._ancestors = ancestors
+        self._descendants = descendants
+
+    @classmethod
+    def build(cls, branches):
+        ancestors = cls._close(branches, lambda x: branches[x].supervisor_ids)
+        descendants = cls._close(branches, lambda x: branches[x].supervised_ids)
+        return cls(ancestors, descendants)
+
+    @classmethod
+    def _close(cls, branches, get_neighbours):
+        closures = {}
+        for root_id in branches:
+            if root_id in closures:
+                continue
+            path = [root_id]
+            on_path = {root_id: 0}
+            stack = [(root_id, iter(get_neighbours(root_id)))]
+            while stack:
+                branch_id, neighbours = stack[-1]
+                for neighbour_id in neighbours:
+                    if neighbour_id in closures:
+                        continue
+                    if neighbour_id in on_path:
+                        raise SupervisionCycleException(path[on_path[neighbour_id]:] + [neighbour_id])
+                    on_path[neighbour_id] = len(path)
+                    path.append(neighbour_id)
+                    stack.append((neighbour_id, iter(get_neighbours(neighbour_id))))
+                    break
+                else:
+                    stack.pop()
+                    path.pop()
+                    del on_path[branch_id]
+                    closure = {}
+                    for neighbour_id in get_neighbours(branch_id):
+                        closure.setdefault(neighbour_id)
+                        for closure_id in closures[neighbour_id]:
+                            closure.setdefault(closure_id)
+                    closures[branch_id] = closure
+        return closures
+
+    def add_branch_id(self, branch_id):
+        self._ancestors.setdefault(branch_id, {})
+        self._descendants.setdefault(branch_id, {})
+
+    def add_link(self, supervisor_id, supervised_id):
+        self.add_branch_id(supervisor_id)
+        self.add_branch_id(supervised_id)
+        if supervisor_id == supervised_id or supervisor_id in self._descendants[supervised_id]:
+            raise SupervisionCycleException([supervised_id, supervisor_id, supervised_id])
+        if supervisor_id in self._ancestors[supervised_id]:
+            return
+        upper_ids = [supervisor_id]
+        upper_ids.extend(self._ancestors[supervisor_id])
+        lower_ids = [supervised_id]
+        lower_ids.extend(self._descendants[supervised_id])
+        for lower_id in lower_ids:
+            lower_ancestors = self._ancestors[lower_id]
+            for upper_id in upper_ids:
+                lower_ancestors.setdefault(upper_id)
+        for upper_id in upper_ids:
+            upper_descendants = self._descendants[upper_id]
+            for lower_id in lower_ids:
+                upper_descendants.setdefault(lower_id)
+
+    def get_ancestors(self, branch_id):
+        return list(self._ancestors.get(branch_id, {}))
+
+    def get_descendants(self, branch_id):
+        return list(self._descendants.get(branch_id, {}))
+
+    def is_ancestor(self, ancestor_id, branch_id):
+        return ancestor_id in self._ancestors.get(branch_id, {})
+
+    def is_descendant(self, descendant_id, branch_id):
+        return descendant_id in self._descendants.get(branch_id, {})
+
+
 class SupervisorTree:
     def __init__(self):
         self._branches = {}
+        self._index = SupervisionIndex()
+
+    @classmethod
+    def from_branches(cls, branches):
+        tree = cls()
+        for branch in branches:
+            tree._merge_branch(branch)
+            for supervisor_id in branch.supervisor_ids:
+                tree._get_branch(supervisor_id).add_supervised_id(branch.branch_id)
+            for supervised_id in branch.supervised_ids:
+                tree._get_branch(supervised_id).add_supervisor_id(branch.branch_id)
+        tree._index = SupervisionIndex.build(tree._branches)
+        return tree
+
+    @property
+    def index(self):
+        return self._index
 
     def add_branch(self, branch):
         branch_id = branch.branch_id
-        supervisor_ids = branch.supervisor_ids
-        supervised_ids = branch.supervised_ids
-        self._branches[branch_id] = branch
+        existing = self._branches.get(branch_id)
+        supervisor_ids = list(branch.supervisor_ids)
+        supervised_ids = list(branch.supervised_ids)
+        if existing is not None:
+            supervisor_ids.extend(x for x in existing.supervisor_ids if x not in supervisor_ids)
+            supervised_ids.extend(x for x in existing.supervised_ids if x not in supervised_ids)
+        self._check_links(branch_id, supervisor_ids, supervised_ids)
+        self._merge_branch(branch)
+        self._index.add_branch_id(branch_id)
         for supervisor_id in supervisor_ids:
-            if supervisor_id not in self._branches:
-                self._branches[supervisor_id] = SupervisionBranch(supervisor_id)
-            self._branches[supervisor_id].add_supervised_id(branch_id)
+            self._get_branch(supervisor_id).add_supervised_id(branch_id)
+            self._index.add_link(supervisor_id, branch_id)
         for supervised_id in supervised_ids:
-            if supervised_id not in self._branches:
-                self._branches[supervised_id] = SupervisionBranch(supervised_id)
-            self._branches[supervised_id].add_supervisor_id(branch_id)
+            self._get_branch(supervised_id).add_supervisor_id(branch_id)
+            self._index.add_link(branch_id, supervised_id)
 
     def get_parents(self, branch_id):
-        parents = []
-        branch = self._branches[branch_id]
-        for supervisor_id in branch.supervisor_ids:
-            parents.append(supervisor_id)
-            parents.extend(self.get_parents(supervisor_id))
-        return parents
+        if branch_id not in self._branches:
+            raise KeyError(branch_id)
+        return self._index.get_ancestors(branch_id)
 
     def get_children(self, branch_id):
-        children = []
-        branch = self._branches[branch_id]
-        for supervised_id in branch.supervised_ids:
-            children.append(supervised_id)
-            children.extend(self.get_children(supervised_id))
-        return children
+        if branch_id not in self._branches:
+            raise KeyError(branch_id)
+        return self._index.get_descendants(branch_id)
+
+    def is_supervised_by(self, branch_id, supervisor_id):
+        return self._index.is_ancestor(supervisor_id, branch_id)
+
+    def _merge_branch(self, branch):
+        existing = self._branches.get(branch.branch_id)
+        if existing is not None and existing is not branch:
+            for supervisor_id in existing.supervisor_ids:
+                branch.add_supervisor_id(supervisor_id)
+            for supervised_id in existing.supervised_ids:
+                branch.add_supervised_id(supervised_id)
+        self._branches[branch.branch_id] = branch
+
+    def _get_branch(self, branch_id):
+        if branch_id not in self._branches:
+            self._branches[branch_id] = SupervisionBranch(branch_id)
+        return self._branches[branch_id]
+
+    def _check_links(self, branch_id, supervisor_ids, supervised_ids):
+        for supervisor_id in supervisor_ids:
+            if supervisor_id == branch_id or self._index.is_descendant(supervisor_id, branch_id):
+                raise SupervisionCycleException(self._find_path(branch_id, supervisor_id) + [branch_id])
+        for supervised_id in supervised_ids:
+            if supervised_id == branch_id or self._index.is_ancestor(supervised_id, branch_id):
+                raise SupervisionCycleException(self._find_path(supervised_id, branch_id) + [supervised_id])
+            for supervisor_id in supervisor_ids:
+                if supervisor_id == supervised_id or self._index.is_descendant(supervisor_id, supervised_id):
+                    raise SupervisionCycleException(
+                        [branch_id] + self._find_path(supervised_id, supervisor_id) + [branch_id])
+
+    def _find_path(self, start_id, end_id):
+        path = [start_id]
+        while path[-1] != end_id:
+            branch = self._branches[path[-1]]
+            for supervised_id in branch.supervised_ids:
+                if supervised_id == end_id or self._index.is_descendant(end_id, supervised_id):
+                    path.append(supervised_id)
+                    break
+        return path
 
     def __contains__(self, item):
         return item in self._branches
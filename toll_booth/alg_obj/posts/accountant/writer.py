@@ -0,0 +1,153 @@
+import logging
+import os
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, NamedStyle
+from openpyxl.utils import get_column_letter
+
+from toll_booth.alg_obj.aws.snakes.multipart import S3MultipartWriter
+
+_max_sheet_rows = 1048576
+_max_sheet_name_length = 31
+_cell_overhead_bytes = 32
+
+
+class ReportStyles:
+    _declared = {
+        'report_title': {'font': {'bold': True, 'size': 18}},
+        'report_header': {'font': {'bold': True}}
+    }
+
+    @classmethod
+    def register(cls, workbook):
+        for style_name, style_args in cls._declared.items():
+            named_style = NamedStyle(name=style_name, font=Font(**style_args['font']))
+            workbook.add_named_style(named_style)
+
+
+class StreamingSheet:
+    def __init__(self, workbook, sheet_name, title=None, header=None, **kwargs):
+        self._workbook = workbook
+        self._sheet_name = sheet_name
+        self._title = title
+        self._header = header
+        self._max_sheet_bytes = kwargs['max_sheet_bytes']
+        self._max_sheet_rows = kwargs.get('max_sheet_rows', _max_sheet_rows)
+        self._sheets = []
+        self._worksheet = None
+        self._sheet_bytes = 0
+        self._sheet_rows = 0
+        self._max_row_length = 0
+        self._row_count = 0
+
+    @property
+    def sheet_names(self):
+        return [x.title for x in self._sheets]
+
+    @property
+    def row_count(self):
+        return self._row_count
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.append(row)
+        self.close()
+
+    def append(self, row):
+        row = list(row)
+        row_bytes = self._estimate_bytes(row)
+        if self._worksheet is None or self._is_full(row_bytes):
+            self._start_sheet()
+        self._worksheet.append(row)
+        self._sheet_bytes += row_bytes
+        self._sheet_rows += 1
+        self._max_row_length = max(self._max_row_length, len(row))
+        self._row_count += 1
+
+    def close(self):
+        if self._worksheet is None:
+            self._start_sheet()
+        self._finish_sheet()
+
+    def _is_full(self, row_bytes):
+        if self._sheet_rows >= self._max_sheet_rows:
+            return True
+        return self._max_sheet_bytes and self._sheet_bytes + row_bytes > self._max_sheet_bytes
+
+    def _start_sheet(self):
+        if self._worksheet is not None:
+            self._finish_sheet()
+            logging.info(f'sheet {self._worksheet.title} reached its budget of {self._max_sheet_bytes} bytes '
+                         f'or {self._max_sheet_rows} rows, continuing on a new sheet')
+        sheet_name = self._sheet_name
+        if self._sheets:
+            suffix = f' ({len(self._sheets) + 1})'
+            sheet_name = sheet_name[:_max_sheet_name_length - len(suffix)] + suffix
+        self._worksheet = self._workbook.create_sheet(sheet_name[:_max_sheet_name_length])
+        self._sheets.append(self._worksheet)
+        self._sheet_bytes = 0
+        self._sheet_rows = 0
+        self._max_row_length = 0
+        if self._title is not None:
+            self._append_styled([self._title], 'report_title')
+            self._worksheet.append([])
+            self._sheet_rows += 1
+        if self._header:
+            self._append_styled(self._header, 'report_header')
+
+    def _append_styled(self, values, style_name):
+        cells = []
+        for value in values:
+            cell = WriteOnlyCell(self._worksheet, value=value)
+            cell.style = style_name
+            cells.append(cell)
+        self._worksheet.append(cells)
+        self._sheet_bytes += self._estimate_bytes(values)
+        self._sheet_rows += 1
+        self._max_row_length = max(self._max_row_length, len(values))
+
+    def _finish_sheet(self):
+        if self._title is not None and self._max_row_length > 1:
+            self._worksheet.merged_cells.add(f'A1:{get_column_letter(self._max_row_length)}1')
+
+    @classmethod
+    def _estimate_bytes(cls, row):
+        return sum(len(str(x)) + _cell_overhead_bytes for x in row if x is not None)
+
+
+class StreamingReportWriter:
+    def __init__(self, **kwargs):
+        max_sheet_bytes = kwargs.get(
+            'max_sheet_bytes', int(os.getenv('REPORT_SHEET_BUDGET_BYTES', 64 * 1024 * 1024)))
+        self._max_sheet_bytes = max_sheet_bytes
+        self._max_sheet_rows = kwargs.get('max_sheet_rows', _max_sheet_rows)
+        self._workbook = Workbook(write_only=True)
+        ReportStyles.register(self._workbook)
+        self._sheets = []
+
+    @property
+    def sheet_names(self):
+        return [y for x in self._sheets for y in x.sheet_names]
+
+    @property
+    def row_count(self):
+        return sum(x.row_count for x in self._sheets)
+
+    def write_sheet(self, sheet_name, rows, title=None, header=None):
+        sheet = StreamingSheet(
+            self._workbook, sheet_name, title, header,
+            max_sheet_bytes=self._max_sheet_bytes, max_sheet_rows=self._max_sheet_rows)
+        sheet.write_rows(rows)
+        self._sheets.append(sheet)
+        return sheet
+
+    def save(self, file_object):
+        self._workbook.save(file_object)
+
+    def save_to_s3(self, bucket_name, object_key, **kwargs):
+        with S3MultipartWriter(bucket_name, object_key, **kwargs) as s3_writer:
+            self.save(s3_writer)
+        logging.info(f'streamed report with {self.row_count} rows across {len(self.sheet_names)} sheets '
+                     f'to s3://{bucket_name}/{object_key}')
+        return s3_writer.bytes_written
@@ -1,12 +1,14 @@
 import json
 import logging
 
+from toll_booth.alg_obj.aws.couriers.courier import reported
 from toll_booth.alg_obj.forge.extractors.credible_fe import CredibleFrontEndExtractor
 from toll_booth.alg_obj.serializers import AlgEncoder
 from toll_booth.alg_tasks.lambda_logging import lambda_logged
 
 
 @lambda_logged
+@reported
 def handler(event, context):
     logging.info('called the handler for the CredibleFE Extractor, event: %s' % event)
     step_name = event['step_name']
@@ -1,6 +1,8 @@
 import json
 import logging
 
+from toll_booth.alg_obj.aws.couriers.courier import reported
+from toll_booth.alg_obj.aws.snakes.snakes import StoredData
 from toll_booth.alg_obj.serializers import AlgEncoder, AlgDecoder
 from toll_booth.alg_tasks.lambda_logging import lambda_logged
 from toll_booth.alg_tasks.rivers.tasks.automation import automation_tasks
@@ -36,6 +38,7 @@ def lambda_work(production_fn):
         flow_id, run_id, task_id = event['flow_id'], event['run_id'], event['task_id']
         _set_run_id_logging(flow_id, run_id, task_id, context)
         logging.info(f'raw task_args for {task_name} are {event["task_args"]}')
+        StoredData.prefetch(event['task_args'])
         task_args = json.loads(json.dumps(event['task_args']), cls=AlgDecoder)
         register_results = event.get('register_results', False)
         if register_results is True:
@@ -89,6 +92,7 @@ def labor(event, context):
 
 
 @lambda_logged
+@reported
 @lambda_work
 def lambda_labor(task_name, task_args):
     from toll_booth.alg_tasks.rivers.tasks.fungi import fungi_tasks